@@ -6,8 +6,8 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_socketio import SocketIO
 from flask_cors import CORS
-from sqlalchemy.pool import NullPool
 from flask_migrate import Migrate
+from .pool import opcoes_engine
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -18,12 +18,16 @@ socketio = SocketIO(async_mode='eventlet')
 
 def create_app():
     app = Flask(__name__, instance_relative_config=True)
+    from .serializacao import JSONProviderRapido, modulo_json
+    app.json = JSONProviderRapido(app)
     logging.info("Iniciando a criação da aplicação Flask...")
 
     app.config['SECRET_KEY'] = os.environ.get("SECRET_KEY", "dev-secret-key")
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get("DATABASE_URL", f"sqlite:///{os.path.join(app.instance_path, 'banco.db')}")
-    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": NullPool}
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opcoes_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+    # Custo do bcrypt; hashes antigos com custo menor são refeitos no login (ver senhas.py)
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
     
     try:
         os.makedirs(app.instance_path)
@@ -34,16 +38,34 @@ def create_app():
     bcrypt.init_app(app)
     migrate.init_app(app, db)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
-    socketio.init_app(app, cors_allowed_origins="*")
+    socketio.init_app(app, cors_allowed_origins="*", json=modulo_json)
+    # Latência, SQL e Socket.IO por rota em /metrics (ver telemetria.py); antes da compressão para medi-la também
+    from .telemetria import init_telemetria
+    init_telemetria(app)
+    # Log de SQL lento e N+1 por amostragem, desligado por padrão (ver perfil_sql.py)
+    from .perfil_sql import init_perfil_sql
+    init_perfil_sql(app)
+    # gzip/brotli nas respostas grandes (ver compressao.py)
+    from .compressao import init_compressao
+    init_compressao(app)
     logging.info("Extensões Flask inicializadas.")
 
     with app.app_context():
         from app.routes import bp as routes_bp
         app.register_blueprint(routes_bp)
         logging.info("✅ Rotas do sistema de chamados registradas.")
+
+        # Os listeners de eventos dos modelos alimentam o Socket.IO e o log de alterações,
+        # então precisam estar ativos também nos comandos CLI e scripts que só chamam create_app().
+        from app import events, sockets
+        from app.commands import init_commands
+        init_commands(app)
+        logging.info("✅ Eventos e comandos CLI registrados.")
         
-        from app.chatbot import init_chatbot_routes
-        init_chatbot_routes(app)
-        logging.info("✅ Rotas da IA (chatbot) registradas.")
+        # O SDK do Gemini só é carregado na primeira pergunta ao chatbot (ver chatbot_core/provedor_modelo.py)
+        if os.environ.get('CHATBOT_HABILITADO', '1').lower() in ('1', 'true', 'yes'):
+            from app.chatbot import init_chatbot_routes
+            init_chatbot_routes(app)
+            logging.info("✅ Rotas da IA (chatbot) registradas.")
 
     return app
\ No newline at end of file
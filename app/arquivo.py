@@ -0,0 +1,114 @@
+# app/arquivo.py
+"""
+Arquivamento dos chamados finalizados: a tabela 'chamados' fica do tamanho do
+trabalho em aberto e os finalizados antigos vão, com o histórico, para
+'chamados_arquivo' e 'historico_chamado_arquivo'.
+
+Entram no arquivo os chamados com status finalizado (Finalizado, Resolvido, Concluído)
+e concluido_em mais antigo que ARQUIVO_IDADE_DIAS. Cada lote de ARQUIVO_TAMANHO_LOTE
+chamados é movido numa transação própria (copia para o arquivo, apaga da tabela
+quente); se o processo parar no meio, o lote em andamento é desfeito e a próxima
+execução continua de onde parou.
+
+O que fica consistente:
+    - contadores do dashboard e livro de etapas não mudam: os chamados continuam
+      contados, só mudam de tabela (os reconstruir_* leem as duas tabelas);
+    - o log de alterações ganha uma entrada 'arquivo' por chamado, que a
+      sincronização incremental trata como saída da listagem, e os dashboards
+      conectados recebem a remoção pelo Socket.IO;
+    - o índice de busca textual acompanha a tabela quente (triggers no SQLite, coluna
+      gerada no Postgres): chamados arquivados não aparecem na busca.
+
+Leituras de um chamado por id (detalhe, histórico, métricas) caem no arquivo quando o
+chamado não está na tabela quente; listagens só incluem o arquivo quando pedido
+(?arquivados=1).
+
+Variáveis (todas opcionais):
+    ARQUIVO_IDADE_DIAS     idade mínima, pela conclusão, para arquivar (padrão 90)
+    ARQUIVO_TAMANHO_LOTE   chamados por transação (padrão 500)
+"""
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, literal
+from . import db
+from .models import Chamado, HistoricoChamado, ChamadoArquivado, HistoricoChamadoArquivado, ChamadoAlteracao
+from .contadores import STATUS_FINALIZADOS
+from .dispatcher import adiar_evento
+
+IDADE_DIAS = int(os.environ.get('ARQUIVO_IDADE_DIAS', 90))
+TAMANHO_LOTE = int(os.environ.get('ARQUIVO_TAMANHO_LOTE', 500))
+
+QUENTE = (Chamado, HistoricoChamado)
+ARQUIVO = (ChamadoArquivado, HistoricoChamadoArquivado)
+
+
+def _copiar(origem, destino, filtro):
+    """INSERT INTO destino (...) SELECT ... FROM origem, só com as colunas que as duas têm."""
+    colunas = [c.name for c in destino.__table__.c if c.name in origem.__table__.c]
+    return destino.__table__.insert().from_select(
+        colunas, select(*[origem.__table__.c[nome] for nome in colunas]).where(filtro)
+    )
+
+
+def candidatos(antes_de, limite):
+    """Ids dos próximos chamados a arquivar, os mais antigos primeiro."""
+    # Os ids não colidem com os do arquivo: 'chamados' tem AUTOINCREMENT no SQLite e
+    # sequence no Postgres, então um id nunca volta depois de sair da tabela quente
+    return [chamado_id for (chamado_id,) in db.session.query(Chamado.id).filter(
+        Chamado.status.in_(STATUS_FINALIZADOS),
+        Chamado.concluido_em < antes_de,
+    ).order_by(Chamado.id).limit(limite)]
+
+
+def arquivar_lote(ids):
+    """Move os chamados e o histórico deles para o arquivo, numa transação."""
+    conexao = db.session.connection()
+    conexao.execute(_copiar(Chamado, ChamadoArquivado, Chamado.id.in_(ids)))
+    conexao.execute(_copiar(HistoricoChamado, HistoricoChamadoArquivado, HistoricoChamado.chamado_id.in_(ids)))
+    # Core, sem os eventos do ORM: os contadores continuam contando os chamados arquivados
+    conexao.execute(HistoricoChamado.__table__.delete().where(HistoricoChamado.chamado_id.in_(ids)))
+    conexao.execute(Chamado.__table__.delete().where(Chamado.id.in_(ids)))
+    conexao.execute(ChamadoAlteracao.__table__.insert().from_select(
+        ['chamado_id', 'operacao'],
+        select(ChamadoArquivado.id, literal('arquivo')).where(ChamadoArquivado.id.in_(ids)).order_by(ChamadoArquivado.id)
+    ))
+    for chamado_id in ids:
+        adiar_evento(db.session, 'delete', {'id': chamado_id})
+    db.session.commit()
+
+
+def arquivar(idade_dias=IDADE_DIAS, tamanho_lote=TAMANHO_LOTE, max_lotes=None, log=logging.info):
+    """Arquiva lote a lote até não sobrar candidato (ou até max_lotes). Retorna o total movido."""
+    antes_de = datetime.utcnow() - timedelta(days=idade_dias)
+    total, lotes = 0, 0
+    inicio = time.perf_counter()
+    while max_lotes is None or lotes < max_lotes:
+        ids = candidatos(antes_de, tamanho_lote)
+        if not ids:
+            break
+        try:
+            arquivar_lote(ids)
+        except Exception:
+            db.session.rollback()
+            raise
+        total += len(ids)
+        lotes += 1
+        log(f"📦 Lote {lotes}: {len(ids)} chamados arquivados (até o id {ids[-1]}; {total} no total).")
+    log(f"✅ {total} chamados concluídos antes de {antes_de:%Y-%m-%d} arquivados em "
+        f"{time.perf_counter() - inicio:.1f}s.")
+    return total
+
+
+def modelos_do_chamado(chamado_id):
+    """(modelo do chamado, modelo do histórico) da tabela onde o chamado está, ou None."""
+    for modelos in (QUENTE, ARQUIVO):
+        if db.session.query(select(modelos[0].id).where(modelos[0].id == chamado_id).exists()).scalar():
+            return modelos
+    return None
+
+
+def colunas(modelo, campos):
+    """As colunas 'campos' (ex.: CAMPOS_DETALHE) no modelo quente ou no arquivado."""
+    return tuple(getattr(modelo, campo) for campo in campos)
@@ -0,0 +1,157 @@
+# app/busca.py
+"""
+Busca textual dos chamados (nome, descrição e observação), ordenada por relevância.
+
+SQLite: tabela virtual FTS5 'chamados_fts' com conteúdo externo (aponta para
+'chamados', sem duplicar o texto), mantida por triggers de insert/update/delete.
+Postgres: coluna gerada 'busca_vetor' (tsvector com pesos A/B/C) e índice GIN.
+
+Nos dois casos quem mantém o índice é o próprio banco, então ele acompanha qualquer
+escrita, inclusive as feitas por Core/SQL direto que não passam pelos eventos do ORM.
+A coluna/tabela fica fora do modelo Chamado: é criada pela migração e, para quem usa
+db.create_all(), pelo listener 'after_create' abaixo.
+"""
+import re
+from markupsafe import escape
+from sqlalchemy import event, text, DateTime
+from .models import Chamado
+from .serializacao import data_iso
+
+# Marcadores de destaque devolvidos pelo banco; trocados por <mark> depois de escapar o texto
+_INICIO, _FIM = '\x02', '\x03'
+PALAVRAS_TRECHO = 16
+
+DDL_SQLITE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chamados_fts USING fts5(
+        nome, descricao, observacao,
+        content='chamados', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS chamados_fts_ai AFTER INSERT ON chamados BEGIN
+        INSERT INTO chamados_fts(rowid, nome, descricao, observacao)
+        VALUES (new.id, new.nome, new.descricao, new.observacao);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chamados_fts_ad AFTER DELETE ON chamados BEGIN
+        INSERT INTO chamados_fts(chamados_fts, rowid, nome, descricao, observacao)
+        VALUES ('delete', old.id, old.nome, old.descricao, old.observacao);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chamados_fts_au AFTER UPDATE OF nome, descricao, observacao ON chamados BEGIN
+        INSERT INTO chamados_fts(chamados_fts, rowid, nome, descricao, observacao)
+        VALUES ('delete', old.id, old.nome, old.descricao, old.observacao);
+        INSERT INTO chamados_fts(rowid, nome, descricao, observacao)
+        VALUES (new.id, new.nome, new.descricao, new.observacao);
+    END""",
+]
+
+DDL_POSTGRES = [
+    """ALTER TABLE chamados ADD COLUMN IF NOT EXISTS busca_vetor tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(nome, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'B') ||
+        setweight(to_tsvector('portuguese', coalesce(observacao, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_chamados_busca_vetor ON chamados USING GIN (busca_vetor)",
+]
+
+
+def criar_indice_busca(connection):
+    """Cria o índice de busca do dialeto da conexão (idempotente)."""
+    dialeto = connection.dialect.name
+    comandos = DDL_SQLITE if dialeto == 'sqlite' else DDL_POSTGRES if dialeto == 'postgresql' else []
+    for comando in comandos:
+        connection.exec_driver_sql(comando)
+
+
+def reconstruir_indice_busca(connection):
+    """Reindexa todos os chamados; no Postgres a coluna gerada já está sempre em dia."""
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("INSERT INTO chamados_fts(chamados_fts) VALUES ('rebuild')")
+
+
+@event.listens_for(Chamado.__table__, 'after_create')
+def _criar_indice_apos_tabela(tabela, connection, **kw):
+    criar_indice_busca(connection)
+
+
+def termos_da_busca(busca):
+    """Palavras da busca, sem operadores: o texto do usuário nunca vira sintaxe do FTS."""
+    return re.findall(r'\w+', busca or '')[:10]
+
+
+def _consulta_sqlite(termos):
+    # Cada termo entre aspas e como prefixo: "impres" encontra "impressora"
+    expressao = ' '.join(f'"{t}"*' for t in termos)
+    sql = text(f"""
+        SELECT c.id, c.nome, c.setor, c.status, c.criado_em, c.concluido_em,
+               snippet(chamados_fts, -1, :inicio, :fim, '…', {PALAVRAS_TRECHO}) AS trecho,
+               bm25(chamados_fts, 10.0, 4.0, 1.0) AS relevancia
+        FROM chamados_fts
+        JOIN chamados c ON c.id = chamados_fts.rowid
+        WHERE chamados_fts MATCH :expressao AND c.sistema_origem = 'novo'
+          AND (:setor IS NULL OR c.setor = :setor) AND (:status IS NULL OR c.status = :status)
+        ORDER BY relevancia, c.id DESC
+        LIMIT :limite OFFSET :deslocamento
+    """)
+    return sql, {'expressao': expressao}
+
+
+def _consulta_postgres(termos):
+    expressao = ' & '.join(f'{t}:*' for t in termos)
+    sql = text(f"""
+        SELECT c.id, c.nome, c.setor, c.status, c.criado_em, c.concluido_em,
+               ts_headline('portuguese', concat_ws(' ', c.nome, c.descricao, c.observacao), q,
+                           :opcoes_trecho) AS trecho,
+               ts_rank(c.busca_vetor, q) AS relevancia
+        FROM chamados c, to_tsquery('portuguese', :expressao) q
+        WHERE c.busca_vetor @@ q AND c.sistema_origem = 'novo'
+          AND (:setor IS NULL OR c.setor = :setor) AND (:status IS NULL OR c.status = :status)
+        ORDER BY relevancia DESC, c.id DESC
+        LIMIT :limite OFFSET :deslocamento
+    """)
+    opcoes = f'StartSel={_INICIO}, StopSel={_FIM}, MaxWords={PALAVRAS_TRECHO}, MinWords=5, MaxFragments=2'
+    return sql, {'expressao': expressao, 'opcoes_trecho': opcoes}
+
+
+def consulta_busca_sqlite(termos, limite, deslocamento=0):
+    """A consulta do SQLite com os parâmetros já ligados (usada pelo 'flask verificar-indices')."""
+    sql, parametros = _consulta_sqlite(termos)
+    return sql.bindparams(**parametros, inicio=_INICIO, fim=_FIM, limite=limite, deslocamento=deslocamento,
+                          setor=None, status=None)
+
+
+def destacar(trecho):
+    """Escapa o HTML do trecho e converte os marcadores de destaque em <mark>."""
+    seguro = str(escape(trecho or ''))
+    return seguro.replace(_INICIO, '<mark>').replace(_FIM, '</mark>')
+
+
+def buscar_chamados(session, busca, limite, deslocamento=0, setor=None, status=None):
+    """
+    Retorna (resultados, tem_mais). Cada resultado traz os campos da listagem, a
+    relevância e um 'trecho' com os termos encontrados entre <mark>. 'setor' e
+    'status', quando dados, restringem a busca como os filtros da listagem.
+    """
+    termos = termos_da_busca(busca)
+    if not termos:
+        return [], False
+
+    conexao = session.connection()
+    if conexao.dialect.name == 'postgresql':
+        sql, parametros = _consulta_postgres(termos)
+    else:
+        sql, parametros = _consulta_sqlite(termos)
+    parametros.update(inicio=_INICIO, fim=_FIM, limite=limite + 1, deslocamento=deslocamento,
+                      setor=setor or None, status=status or None)
+
+    # Tipando a coluna, o SQLite devolve datetime (e não o texto cru) como no ORM
+    linhas = conexao.execute(sql.columns(criado_em=DateTime, concluido_em=DateTime), parametros).all()
+    tem_mais = len(linhas) > limite
+    return [{
+        'id': linha.id,
+        'nome': linha.nome,
+        'setor': linha.setor,
+        'status': linha.status,
+        'criado_em': data_iso(linha.criado_em),
+        'concluido_em': data_iso(linha.concluido_em),
+        'trecho': destacar(linha.trecho),
+        'relevancia': round(abs(float(linha.relevancia)), 6),
+    } for linha in linhas[:limite]], tem_mais
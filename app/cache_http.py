@@ -0,0 +1,40 @@
+# app/cache_http.py
+"""
+GET condicional (ETag / If-None-Match) para as APIs de leitura.
+
+A ETag é derivada de um marcador barato de mudança (ex.: a última versão do log de
+alterações, ou contagem + maior id do histórico de um chamado) e da URL completa,
+então o 304 é decidido antes da consulta principal, sem montar o corpo.
+
+As ETags são fortes. Quando compressao.py comprime a resposta, acrescenta o sufixo da
+codificação ('-gzip', '-br'), pois cada variante tem bytes diferentes; nao_modificado
+aceita qualquer uma delas.
+"""
+import hashlib
+from flask import request, make_response
+
+SUFIXOS_CODIFICACAO = ('', '-gzip', '-br')
+
+
+def calcular_etag(*marcadores):
+    """ETag (sem aspas) a partir dos marcadores de mudança e da URL da requisição."""
+    bruto = repr((marcadores, request.full_path)).encode()
+    return hashlib.sha1(bruto).hexdigest()[:32]
+
+
+def nao_modificado(etag):
+    """O cliente já tem a versão atual (If-None-Match bate com a ETag, em qualquer codificação)?"""
+    if_none_match = request.if_none_match
+    return any(if_none_match.contains(etag + sufixo) for sufixo in SUFIXOS_CODIFICACAO)
+
+
+def resposta_304(etag):
+    resposta = make_response('', 304)
+    return com_etag(resposta, etag)
+
+
+def com_etag(resposta, etag):
+    """Anexa a ETag e obriga o navegador a revalidar (If-None-Match) antes de reusar o corpo."""
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
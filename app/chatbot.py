@@ -1,50 +1,37 @@
 # app/chatbot.py
-import os
-from flask import request, jsonify, current_app, session
-import google.generativeai as genai
-import logging
+from flask import request, jsonify, current_app, session, Response, stream_with_context
+from werkzeug.local import LocalProxy
+from chatbot_core.conversas import criar_armazem
+from chatbot_core.cache_respostas import criar_cache_respostas
+from chatbot_core.executor_modelo import criar_executor
+from chatbot_core.provedor_modelo import ProvedorModelo
+from chatbot_core.telemetria import registrar_executor_modelo
+from chatbot_core.fluxo import FluxoChatbot, formatar_sse
 
-GEMINI_API_KEY = os.getenv("key") 
-gemini_model = None
 SYSTEM_INSTRUCTION = """
 Você é um assistente virtual especializado em Tecnologia da Informação (TI) da empresa Nicopel Embalagens.
 Sua única função é responder perguntas sobre hardware, software, redes, programação e problemas técnicos.
 Se o usuário perguntar sobre qualquer outro assunto, recuse educadamente e reafirme sua especialidade.
 """
 
-if not GEMINI_API_KEY:
-    logging.warning("Variável de ambiente GEMINI_API_KEY não configurada. O chatbot não será inicializado.")
-else:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash-latest",
-            system_instruction=SYSTEM_INSTRUCTION
-        )
-        logging.info("✅ Modelo Gemini (API) configurado com sucesso.")
-    except Exception as e:
-        logging.error(f"❌ Erro ao configurar Gemini API: {e}")
-
-histories = {}
-MAX_HISTORY_TURNS = 5
-
-def generate_with_gemini(user_id, message):
-    if not gemini_model:
-        current_app.logger.error(f"[{user_id}] Chatbot chamado, mas modelo não inicializado.")
-        return "Desculpe, o serviço de chatbot está temporariamente indisponível."
+# O SDK só é importado e o modelo só é criado no primeiro uso (ver chatbot_core/provedor_modelo.py)
+provedor = ProvedorModelo("gemini-1.5-flash-latest", SYSTEM_INSTRUCTION)
 
-    chat_session = histories.setdefault(user_id, gemini_model.start_chat(history=[]))
-    
-    if len(chat_session.history) > MAX_HISTORY_TURNS * 2:
-        chat_session.history = chat_session.history[-(MAX_HISTORY_TURNS * 2):]
+MAX_HISTORY_TURNS = 5
+histories = criar_armazem(MAX_HISTORY_TURNS)
+respostas_cache = criar_cache_respostas()
+# Chamadas ao modelo rodam em threads nativas, com limite de concorrência e circuito (ver chatbot_core/executor_modelo.py)
+executor_modelo = criar_executor()
+registrar_executor_modelo(executor_modelo, 'chatbot')
 
-    try:
-        response = chat_session.send_message(message)
-        return response.text
-    except Exception as e:
-        current_app.logger.exception(f"[{user_id}] ❌ Erro na API Gemini: {e}")
-        histories.pop(user_id, None)
-        return "Desculpe, tive um problema técnico. Tente novamente."
+# Histórico, cache e chamada ao modelo são os mesmos do ia_server (ver chatbot_core/fluxo.py)
+fluxo = FluxoChatbot(provedor, histories, respostas_cache, executor_modelo,
+                     LocalProxy(lambda: current_app.logger), mensagens={
+                         'indisponivel': "Desculpe, o serviço de chatbot está temporariamente indisponível.",
+                         'erro': "Desculpe, tive um problema técnico. Tente novamente.",
+                     })
+generate_with_gemini = fluxo.gerar
+stream_with_gemini = fluxo.gerar_stream
 
 def init_chatbot_routes(app):
     @app.route('/api/chatbot', methods=['POST'])
@@ -56,4 +43,30 @@ def init_chatbot_routes(app):
         user_message = data.get('message')
         user_id = session.get('usuario_id', request.remote_addr) 
         ai_response = generate_with_gemini(user_id, user_message)
-        return jsonify({"reply": ai_response})
\ No newline at end of file
+        return jsonify({"reply": ai_response})
+
+    @app.route('/api/chatbot/stream', methods=['POST'])
+    def chatbot_stream():
+        """Mesma entrada de /api/chatbot, mas responde em Server-Sent Events: um 'data' por pedaço e um 'fim'."""
+        data = request.json
+        if not data or 'message' not in data:
+            return jsonify({"error": "Mensagem não fornecida."}), 400
+
+        user_message = data.get('message')
+        user_id = session.get('usuario_id', request.remote_addr)
+
+        def eventos():
+            for parte in stream_with_gemini(user_id, user_message):
+                yield formatar_sse({'texto': parte})
+            yield formatar_sse({}, evento='fim')
+
+        return Response(stream_with_context(eventos()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/api/chatbot/estatisticas')
+    def chatbot_estatisticas():
+        if session.get('email') != 'adm@adm':
+            return jsonify({'erro': 'Acesso não autorizado'}), 403
+        return jsonify({'sessoes': histories.estatisticas(), 'cache_respostas': respostas_cache.estatisticas(),
+                        'modelo': executor_modelo.estatisticas(),
+                        'modelo_carregado': provedor.carregado})
\ No newline at end of file
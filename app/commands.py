@@ -0,0 +1,111 @@
+# app/commands.py
+import sys
+import click
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from . import db
+from .models import ChamadoAlteracao
+from .contadores import reconstruir_contadores
+from .consultas import consultas_monitoradas, ORDENACAO_SEM_INDICE
+from .etapas import reconstruir_etapas
+from .busca import criar_indice_busca, reconstruir_indice_busca
+from .arquivo import arquivar, IDADE_DIAS, TAMANHO_LOTE
+from . import importacao
+
+
+def planos_com_varredura_completa():
+    """
+    Roda EXPLAIN QUERY PLAN das consultas monitoradas num SQLite em memória com o schema
+    atual dos modelos. Retorna {consulta: (plano, problemas)}; problemas vazio = ok.
+
+    Conta como problema uma varredura de tabela sem índice ('SCAN chamados') ou uma
+    ordenação em tabela temporária ('USE TEMP B-TREE FOR ORDER BY'), salvo nas consultas
+    de ORDENACAO_SEM_INDICE (ordenadas por relevância). Varrer um índice
+    inteiro ('SCAN ... USING INDEX') é aceito: é o caso das agregações sobre a tabela toda.
+    """
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    tabelas = set(db.metadata.tables)
+
+    resultado = {}
+    with engine.connect() as conn:
+        for nome, query in consultas_monitoradas().items():
+            # Query do ORM, select() ou text() com os parâmetros ligados
+            consulta = getattr(query, 'statement', query)
+            sql = str(consulta.compile(engine, compile_kwargs={'literal_binds': True}))
+            plano = [linha[-1] for linha in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+            problemas = []
+            for passo in plano:
+                partes = passo.split()
+                if partes[0] == 'SCAN' and len(partes) > 1 and partes[1] in tabelas and 'USING' not in partes:
+                    problemas.append(passo)
+                elif 'TEMP B-TREE FOR ORDER BY' in passo and nome not in ORDENACAO_SEM_INDICE:
+                    problemas.append(passo)
+            resultado[nome] = (plano, problemas)
+    engine.dispose()
+    return resultado
+
+
+def init_commands(app):
+    @app.cli.command('limpar-alteracoes')
+    @click.option('--dias', default=7, show_default=True, help='Mantém as alterações mais novas que este número de dias.')
+    def limpar_alteracoes(dias):
+        """Remove entradas antigas do log de alterações dos chamados."""
+        limite = datetime.utcnow() - timedelta(days=dias)
+        removidas = ChamadoAlteracao.query.filter(ChamadoAlteracao.criado_em < limite).delete(synchronize_session=False)
+        db.session.commit()
+        logging.info(f"🧹 {removidas} alterações anteriores a {limite:%Y-%m-%d %H:%M} removidas.")
+
+    @app.cli.command('reconstruir-contadores')
+    def reconstruir_contadores_cmd():
+        """Recalcula os contadores do dashboard a partir da tabela de chamados."""
+        combinacoes, dias = reconstruir_contadores()
+        logging.info(f"✅ Contadores reconstruídos: {combinacoes} combinações status/setor, {dias} dias com fechamentos.")
+
+    @app.cli.command('reconstruir-etapas')
+    def reconstruir_etapas_cmd():
+        """Preenche o livro de durações por etapa a partir do histórico existente."""
+        total = reconstruir_etapas()
+        logging.info(f"✅ {total} etapas reconstruídas a partir do histórico.")
+
+    @app.cli.command('reconstruir-busca')
+    def reconstruir_busca_cmd():
+        """Cria (se faltar) e reindexa o índice de busca textual dos chamados."""
+        with db.engine.begin() as conn:
+            criar_indice_busca(conn)
+            reconstruir_indice_busca(conn)
+        logging.info("✅ Índice de busca dos chamados reconstruído.")
+
+    @app.cli.command('arquivar-chamados')
+    @click.option('--dias', default=IDADE_DIAS, show_default=True, help='Arquiva os finalizados há mais que este número de dias.')
+    @click.option('--lote', default=TAMANHO_LOTE, show_default=True, help='Chamados por transação.')
+    @click.option('--max-lotes', type=int, default=None, help='Para depois deste número de lotes (continua na próxima execução).')
+    def arquivar_chamados(dias, lote, max_lotes):
+        """Move chamados finalizados antigos, com o histórico, para as tabelas de arquivo."""
+        arquivar(dias, lote, max_lotes)
+
+    @app.cli.command('importar-chamados')
+    @click.argument('arquivo', type=click.File('rb'))
+    @click.option('--origem', default=importacao.ORIGEM_PADRAO, show_default=True, help='sistema_origem das linhas que não trouxerem um.')
+    @click.option('--lote', default=importacao.TAMANHO_LOTE, show_default=True, help='Linhas por transação.')
+    def importar_chamados(arquivo, origem, lote):
+        """Importa chamados com histórico de um NDJSON ('-' para a entrada padrão)."""
+        relatorio = importacao.importar(arquivo, origem, lote)
+        for item in relatorio['erros']:
+            click.echo(f"linha {item['linha']}: {item['erro']}", err=True)
+        if relatorio['total_erros'] > len(relatorio['erros']):
+            click.echo(f"... e mais {relatorio['total_erros'] - len(relatorio['erros'])} erro(s).", err=True)
+        if relatorio['total_erros']:
+            sys.exit(1)
+
+    @app.cli.command('verificar-indices')
+    def verificar_indices():
+        """Falha se alguma consulta quente cair em varredura completa de tabela (EXPLAIN no SQLite)."""
+        falhas = 0
+        for nome, (plano, problemas) in planos_com_varredura_completa().items():
+            click.echo(f"{'FALHA' if problemas else 'ok':5}  {nome}: {' | '.join(plano)}")
+            falhas += bool(problemas)
+        if falhas:
+            click.echo(f"{falhas} consulta(s) sem índice adequado.")
+            sys.exit(1)
@@ -0,0 +1,70 @@
+# app/compressao.py
+"""
+Compressão gzip/brotli das respostas acima de um tamanho mínimo.
+
+Variáveis (todas opcionais):
+    COMPRESSAO_MINIMO_BYTES   só comprime corpos a partir deste tamanho (padrão 1024)
+    COMPRESSAO_NIVEL_GZIP     nível do gzip, 1-9 (padrão 6)
+    COMPRESSAO_NIVEL_BROTLI   qualidade do brotli, 0-11 (padrão 4: rápido, ainda menor que gzip)
+
+Brotli é usado quando o pacote 'brotli' está instalado e o cliente o aceita; senão, gzip.
+Respostas em streaming (SSE do chatbot, exportações) não são tocadas.
+"""
+import os
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+MINIMO_BYTES = int(os.environ.get('COMPRESSAO_MINIMO_BYTES', 1024))
+NIVEL_GZIP = int(os.environ.get('COMPRESSAO_NIVEL_GZIP', 6))
+NIVEL_BROTLI = int(os.environ.get('COMPRESSAO_NIVEL_BROTLI', 4))
+TIPOS_COMPRESSIVEIS = {
+    'application/json', 'text/html', 'text/plain', 'text/css', 'text/csv',
+    'application/javascript', 'text/javascript', 'application/x-ndjson',
+}
+
+
+def _escolher_codificacao():
+    aceitas = request.accept_encodings
+    if brotli is not None and aceitas['br']:
+        return 'br'
+    if aceitas['gzip']:
+        return 'gzip'
+    return None
+
+
+def comprimir_resposta(resposta):
+    if (resposta.status_code != 200 or resposta.direct_passthrough or resposta.is_streamed
+            or 'Content-Encoding' in resposta.headers
+            or resposta.mimetype not in TIPOS_COMPRESSIVEIS):
+        return resposta
+
+    resposta.vary.add('Accept-Encoding')
+    codificacao = _escolher_codificacao()
+    if codificacao is None:
+        return resposta
+
+    corpo = resposta.get_data()
+    if len(corpo) < MINIMO_BYTES:
+        return resposta
+
+    if codificacao == 'br':
+        comprimido = brotli.compress(corpo, quality=NIVEL_BROTLI)
+    else:
+        comprimido = gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0)
+
+    resposta.set_data(comprimido)
+    resposta.headers['Content-Encoding'] = codificacao
+    # Cada codificação é uma representação diferente: a ETag forte precisa mudar junto (ver cache_http.py)
+    etag, fraca = resposta.get_etag()
+    if etag and not fraca:
+        resposta.set_etag(f"{etag}-{codificacao}")
+    return resposta
+
+
+def init_compressao(app):
+    app.after_request(comprimir_resposta)
@@ -0,0 +1,123 @@
+# app/consultas.py
+"""
+Consultas quentes do sistema, num só lugar.
+
+As rotas usam estas funções e o comando 'flask verificar-indices' roda EXPLAIN sobre
+elas, então o formato verificado é exatamente o que vai para produção. Ao mudar uma
+consulta aqui, confira se os índices de models.py ainda a atendem.
+"""
+from datetime import datetime
+from sqlalchemy import func, or_, and_
+from . import db
+from .models import Chamado, HistoricoChamado, ChamadoArquivado, HistoricoChamadoArquivado
+from .serializacao import COLUNAS_LISTAGEM, COLUNAS_NOTIFICACAO
+
+STATUS_VISIVEIS = ["Aberto", "Em andamento", "Pendente", "Finalizado", "Resolvido", "Concluído"]
+# Status que geram notificação para o usuário que abriu o chamado
+STATUS_NOTIFICAVEIS = ["Finalizado", "Resolvido", "Concluído", "Pendente"]
+
+
+def consulta_listagem_chamados():
+    """Base da listagem do dashboard; os filtros e o cursor são aplicados pela rota."""
+    return Chamado.query.filter(Chamado.sistema_origem == 'novo')
+
+
+def filtrar_listagem(query, setor=None, status=None, de=None, ate=None, busca=None):
+    """Filtros da listagem do dashboard; 'ate' é exclusivo (a rota já soma o dia)."""
+    if setor:
+        query = query.filter(Chamado.setor == setor)
+    if status:
+        query = query.filter(Chamado.status == status)
+    if de:
+        query = query.filter(Chamado.criado_em >= de)
+    if ate:
+        query = query.filter(Chamado.criado_em < ate)
+    if busca:
+        termo = f"%{busca}%"
+        query = query.filter(or_(
+            Chamado.nome.ilike(termo),
+            Chamado.descricao.ilike(termo),
+            Chamado.setor.ilike(termo)
+        ))
+    return query
+
+
+def apos_cursor(query, cursor):
+    """Só os chamados depois de (criado_em, id) do cursor, na ordem de ordenar_listagem."""
+    cursor_criado_em, cursor_id = cursor
+    # O criado_em de referência é relido do próprio registro do cursor, para que a
+    # comparação use o mesmo formato armazenado no banco (no SQLite as datas são texto
+    # e podem ou não ter microssegundos). Se o registro tiver sido excluído, usa o valor do cursor.
+    ancora = func.coalesce(
+        db.session.query(Chamado.criado_em).filter(Chamado.id == cursor_id).scalar_subquery(),
+        cursor_criado_em
+    )
+    return query.filter(or_(
+        Chamado.criado_em < ancora,
+        and_(Chamado.criado_em == ancora, Chamado.id < cursor_id)
+    ))
+
+
+def ordenar_listagem(query):
+    return query.order_by(Chamado.criado_em.desc(), Chamado.id.desc())
+
+
+def consulta_notificacoes_pendentes(usuario_id):
+    return Chamado.query.filter(
+        Chamado.user_id == usuario_id,
+        Chamado.status.in_(STATUS_NOTIFICAVEIS),
+        Chamado.notificado == False
+    )
+
+
+def consulta_meus_chamados(usuario_id):
+    return Chamado.query.filter(
+        Chamado.user_id == usuario_id,
+        Chamado.status.in_(STATUS_VISIVEIS)
+    ).order_by(Chamado.criado_em.desc())
+
+
+def consulta_meus_chamados_arquivados(usuario_id):
+    """Chamados do usuário que já foram para o arquivo (ver arquivo.py); todos finalizados."""
+    return ChamadoArquivado.query.filter(ChamadoArquivado.user_id == usuario_id).order_by(ChamadoArquivado.criado_em.desc())
+
+
+def consulta_historico(chamado_id, modelo=HistoricoChamado):
+    """'modelo' é HistoricoChamadoArquivado para chamados arquivados."""
+    return modelo.query.filter_by(chamado_id=chamado_id).order_by(modelo.timestamp.asc())
+
+
+def consulta_ultima_transicao(chamado_id):
+    """Momento da última mudança registrada no histórico do chamado."""
+    return db.session.query(func.max(HistoricoChamado.timestamp)).filter(
+        HistoricoChamado.chamado_id == chamado_id
+    )
+
+
+def consultas_monitoradas():
+    """Consultas verificadas pelo 'flask verificar-indices', com parâmetros de exemplo."""
+    from .metricas import consulta_metricas
+    from .busca import consulta_busca_sqlite
+
+    listagem = ordenar_listagem(consulta_listagem_chamados())
+    filtrada = ordenar_listagem(apos_cursor(filtrar_listagem(
+        consulta_listagem_chamados(), setor='TI', status='Pendente',
+        de=datetime(2024, 1, 1), ate=datetime(2024, 2, 1), busca='impressora'
+    ), (datetime(2024, 1, 15), 50)))
+    return {
+        'api_listar_chamados': listagem.with_entities(*COLUNAS_LISTAGEM).limit(51),
+        'api_listar_chamados_filtros': filtrada.with_entities(*COLUNAS_LISTAGEM).limit(51),
+        'busca_chamados': consulta_busca_sqlite(['impressora'], limite=21),
+        'notificacoes': consulta_notificacoes_pendentes(1).with_entities(*COLUNAS_NOTIFICACAO),
+        'meus_chamados': consulta_meus_chamados(1),
+        'historico_chamado': consulta_historico(1),
+        'meus_chamados_arquivados': consulta_meus_chamados_arquivados(1),
+        'historico_chamado_arquivado': consulta_historico(1, HistoricoChamadoArquivado),
+        'ultima_transicao': consulta_ultima_transicao(1),
+        'metricas_em_lote': consulta_metricas([1, 2, 3]),
+        'metricas_em_lote_arquivo': consulta_metricas([1, 2, 3], ChamadoArquivado, HistoricoChamadoArquivado),
+    }
+
+
+# Ordenadas por relevância, calculada por linha: a ordenação em memória é esperada
+ORDENACAO_SEM_INDICE = {'busca_chamados'}
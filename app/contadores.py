@@ -0,0 +1,133 @@
+# app/contadores.py
+"""
+Contadores pré-calculados para os gráficos e KPIs do dashboard.
+
+Os listeners em events.py chamam atualizar_contadores() durante o flush, na mesma
+conexão/transação da alteração do chamado: se a transação for desfeita, os contadores
+também são. reconstruir_contadores() recalcula tudo a partir das tabelas base.
+
+Só contam os chamados com sistema_origem = 'novo', os mesmos da listagem do dashboard:
+os importados do sistema antigo (ver importacao.py) não entram nos KPIs nem nos gráficos.
+"""
+from sqlalchemy import func, inspect
+from . import db
+from .models import Chamado, ChamadoArquivado, ContadorChamados, FechamentoDiario
+
+STATUS_FINALIZADOS = ("Finalizado", "Resolvido", "Concluído")
+ORIGEM_CONTADA = 'novo'
+
+
+def insert_com_upsert(connection):
+    """Retorna o construtor de INSERT com suporte a ON CONFLICT do dialeto em uso."""
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _incrementar(connection, tabela, chaves, delta):
+    insert = insert_com_upsert(connection)
+    stmt = insert(tabela).values(**chaves, total=delta)
+    stmt = stmt.on_conflict_do_update(index_elements=list(chaves), set_={'total': tabela.c.total + delta})
+    connection.execute(stmt)
+
+
+def _valor_anterior(chamado, atributo):
+    """Valor do atributo antes do flush atual (ou o valor atual, se não foi alterado)."""
+    historico = inspect(chamado).attrs[atributo].history
+    if historico.deleted:
+        return historico.deleted[0]
+    return getattr(chamado, atributo)
+
+
+def _dia_fechamento(status, concluido_em):
+    if status in STATUS_FINALIZADOS and concluido_em:
+        return concluido_em.date()
+    return None
+
+
+def atualizar_contadores(connection, chamado, operacao):
+    """Aplica nos contadores a diferença entre o estado anterior e o novo do chamado."""
+    if operacao == 'insert' or _valor_anterior(chamado, 'sistema_origem') != ORIGEM_CONTADA:
+        antes = None
+    else:
+        antes = (_valor_anterior(chamado, 'status'), _valor_anterior(chamado, 'setor'),
+                 _valor_anterior(chamado, 'concluido_em'))
+    if operacao == 'delete' or chamado.sistema_origem != ORIGEM_CONTADA:
+        depois = None
+    else:
+        depois = (chamado.status, chamado.setor, chamado.concluido_em)
+
+    chave_antes = antes[:2] if antes else None
+    chave_depois = depois[:2] if depois else None
+    if chave_antes != chave_depois:
+        if chave_antes:
+            _incrementar(connection, ContadorChamados.__table__, {'status': chave_antes[0], 'setor': chave_antes[1]}, -1)
+        if chave_depois:
+            _incrementar(connection, ContadorChamados.__table__, {'status': chave_depois[0], 'setor': chave_depois[1]}, 1)
+
+    dia_antes = _dia_fechamento(antes[0], antes[2]) if antes else None
+    dia_depois = _dia_fechamento(depois[0], depois[2]) if depois else None
+    if dia_antes != dia_depois:
+        if dia_antes:
+            _incrementar(connection, FechamentoDiario.__table__, {'dia': dia_antes}, -1)
+        if dia_depois:
+            _incrementar(connection, FechamentoDiario.__table__, {'dia': dia_depois}, 1)
+
+
+def somar_chamados_nos_contadores(connection, chamados):
+    """
+    Soma nos contadores chamados inseridos sem passar pelo ORM (ver importacao.py): um
+    upsert por combinação status/setor e por dia, em vez de um por chamado.
+    """
+    por_status_setor, por_dia = {}, {}
+    for chamado in chamados:
+        if chamado['sistema_origem'] != ORIGEM_CONTADA:
+            continue
+        chave = (chamado['status'], chamado['setor'])
+        por_status_setor[chave] = por_status_setor.get(chave, 0) + 1
+        dia = _dia_fechamento(chamado['status'], chamado['concluido_em'])
+        if dia:
+            por_dia[dia] = por_dia.get(dia, 0) + 1
+    for (status, setor), total in por_status_setor.items():
+        _incrementar(connection, ContadorChamados.__table__, {'status': status, 'setor': setor}, total)
+    for dia, total in por_dia.items():
+        _incrementar(connection, FechamentoDiario.__table__, {'dia': dia}, total)
+
+
+def reconstruir_contadores():
+    """
+    Recalcula os contadores a partir de 'chamados' e 'chamados_arquivo', numa única
+    transação (chamados arquivados continuam contando, ver arquivo.py).
+    """
+    db.session.query(ContadorChamados).delete(synchronize_session=False)
+    db.session.query(FechamentoDiario).delete(synchronize_session=False)
+
+    por_status_setor = {}
+    fechamentos = {}
+    for modelo in (Chamado, ChamadoArquivado):
+        for status, setor, total in db.session.query(
+            modelo.status, modelo.setor, func.count(modelo.id)
+        ).filter(modelo.sistema_origem == ORIGEM_CONTADA).group_by(modelo.status, modelo.setor):
+            por_status_setor[(status, setor)] = por_status_setor.get((status, setor), 0) + total
+
+        # Agrupa em Python pela data: func.date() devolve tipos diferentes no SQLite e no Postgres
+        for (concluido_em,) in db.session.query(modelo.concluido_em).filter(
+            modelo.sistema_origem == ORIGEM_CONTADA,
+            modelo.status.in_(STATUS_FINALIZADOS),
+            modelo.concluido_em.isnot(None)
+        ).yield_per(1000):
+            fechamentos[concluido_em.date()] = fechamentos.get(concluido_em.date(), 0) + 1
+
+    if por_status_setor:
+        db.session.execute(ContadorChamados.__table__.insert(), [
+            {'status': status, 'setor': setor, 'total': total} for (status, setor), total in por_status_setor.items()
+        ])
+    if fechamentos:
+        db.session.execute(FechamentoDiario.__table__.insert(), [
+            {'dia': dia, 'total': total} for dia, total in fechamentos.items()
+        ])
+
+    db.session.commit()
+    return len(por_status_setor), len(fechamentos)
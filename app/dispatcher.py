@@ -0,0 +1,144 @@
+# app/dispatcher.py
+"""
+Despacho dos eventos de chamados para o Socket.IO.
+
+Os listeners de events.py só enfileiram o evento na sessão (session.info). Quando a
+transação é confirmada, os eventos pendentes passam para o despachante; num rollback
+eles são descartados, então nenhum dashboard recebe mudanças que não aconteceram.
+
+O despachante junta tudo o que chega numa janela curta (SOCKETIO_JANELA_EVENTOS_MS):
+várias atualizações do mesmo chamado viram uma só, e uma rajada de mudanças em
+chamados diferentes sai como um único evento 'chamados_lote'.
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import socketio
+from .telemetria import registrar_emissao
+
+CHAVE_PENDENTES = 'eventos_chamados_pendentes'
+CHAVE_NOTIFICACOES = 'notificacoes_usuarios_pendentes'
+JANELA_EVENTOS_MS = int(os.environ.get('SOCKETIO_JANELA_EVENTOS_MS', 250))
+
+# Nome do evento Socket.IO enviado quando só um chamado mudou na janela
+EVENTOS_INDIVIDUAIS = {
+    'insert': 'novo_chamado',
+    'update': 'chamado_atualizado',
+    'delete': 'chamado_excluido',
+}
+
+
+class DespachanteEventos:
+    def __init__(self, janela_ms):
+        self.janela = janela_ms / 1000
+        self._buffer = OrderedDict()
+        self._lock = threading.Lock()
+        self._agendado = False
+
+    def enfileirar(self, eventos):
+        """Recebe uma lista de (operacao, payload) já confirmados no banco."""
+        with self._lock:
+            for operacao, payload in eventos:
+                self._mesclar(operacao, payload)
+            agendar = bool(self._buffer) and not self._agendado
+            self._agendado = self._agendado or agendar
+        if not agendar:
+            return
+        if self.janela > 0:
+            socketio.start_background_task(self._descarregar_apos_janela)
+        else:
+            self.descarregar()
+
+    def _mesclar(self, operacao, payload):
+        chamado_id = payload['id']
+        anterior = self._buffer.pop(chamado_id, None)
+        if anterior:
+            operacao_anterior = anterior[0]
+            if operacao_anterior == 'insert' and operacao == 'delete':
+                # Criado e excluído dentro da janela: ninguém precisa saber
+                return
+            if operacao_anterior == 'insert' and operacao == 'update':
+                operacao = 'insert'
+        self._buffer[chamado_id] = (operacao, payload)
+
+    def _descarregar_apos_janela(self):
+        socketio.sleep(self.janela)
+        self.descarregar()
+
+    def descarregar(self):
+        with self._lock:
+            pendentes = list(self._buffer.values())
+            self._buffer.clear()
+            self._agendado = False
+        if not pendentes:
+            return
+
+        try:
+            if len(pendentes) == 1:
+                operacao, payload = pendentes[0]
+                evento = EVENTOS_INDIVIDUAIS[operacao]
+                socketio.emit(evento, payload)
+            else:
+                evento = 'chamados_lote'
+                socketio.emit(evento, {
+                    'novos': [p for op, p in pendentes if op == 'insert'],
+                    'atualizados': [p for op, p in pendentes if op == 'update'],
+                    'excluidos': [p['id'] for op, p in pendentes if op == 'delete'],
+                })
+            registrar_emissao(evento)
+        except Exception as e:
+            logging.error(f"Erro ao emitir eventos de chamados: {e}")
+
+
+despachante = DespachanteEventos(JANELA_EVENTOS_MS)
+
+
+def sala_usuario(usuario_id):
+    """Sala Socket.IO em que ficam as conexões de um usuário (ver sockets.py)."""
+    return f"usuario_{usuario_id}"
+
+
+def adiar_evento(session, operacao, payload):
+    """Guarda o evento na sessão até o commit."""
+    session.info.setdefault(CHAVE_PENDENTES, []).append((operacao, payload))
+
+
+def adiar_notificacao(session, usuario_id, payload):
+    """Guarda uma notificação para a sala do usuário até o commit."""
+    session.info.setdefault(CHAVE_NOTIFICACOES, []).append((usuario_id, payload))
+
+
+def avisar_importacao(total, origem):
+    """
+    Um evento só para uma importação em lote (ver importacao.py), no lugar de um por
+    chamado: os dashboards buscam o que mudou pela sincronização incremental.
+    """
+    try:
+        socketio.emit('chamados_importados', {'total': total, 'origem': origem})
+        registrar_emissao('chamados_importados')
+    except Exception as e:
+        logging.error(f"Erro ao avisar a importação de chamados: {e}")
+
+
+@event.listens_for(Session, 'after_commit')
+def _despachar_apos_commit(session):
+    pendentes = session.info.pop(CHAVE_PENDENTES, None)
+    if pendentes:
+        despachante.enfileirar(pendentes)
+
+    # Notificações vão direto para a sala do dono do chamado, sem janela de agrupamento
+    for usuario_id, payload in session.info.pop(CHAVE_NOTIFICACOES, None) or []:
+        try:
+            socketio.emit('notificacao', payload, to=sala_usuario(usuario_id))
+            registrar_emissao('notificacao', sala_usuario(usuario_id))
+        except Exception as e:
+            logging.error(f"Erro ao notificar o usuário {usuario_id}: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_apos_rollback(session):
+    session.info.pop(CHAVE_PENDENTES, None)
+    session.info.pop(CHAVE_NOTIFICACOES, None)
@@ -0,0 +1,135 @@
+# app/etapas.py
+"""
+Livro de durações por etapa (status) dos chamados.
+
+Cada mudança de status em chamado_detalhe fecha a etapa anterior numa linha de
+EtapaChamado e soma a duração em ResumoEtapa, na mesma transação. A média por status
+é então total_segundos / quantidade, sem varrer o histórico. As durações são calculadas
+em Python, então o resultado é o mesmo no SQLite e no Postgres.
+"""
+from itertools import chain
+from sqlalchemy import func
+from . import db
+from .models import Chamado, HistoricoChamado, ChamadoArquivado, HistoricoChamadoArquivado, EtapaChamado, ResumoEtapa
+from .contadores import insert_com_upsert
+from .consultas import consulta_ultima_transicao
+
+TAMANHO_LOTE = 1000
+
+
+def _somar_no_resumo(status, segundos, quantidade):
+    conexao = db.session.connection()
+    tabela = ResumoEtapa.__table__
+    stmt = insert_com_upsert(conexao)(tabela).values(status=status, total_segundos=segundos, quantidade=quantidade)
+    stmt = stmt.on_conflict_do_update(index_elements=['status'], set_={
+        'total_segundos': tabela.c.total_segundos + segundos,
+        'quantidade': tabela.c.quantidade + quantidade,
+    })
+    conexao.execute(stmt)
+
+
+def fechar_etapa(chamado, status_anterior, saiu_em):
+    """
+    Fecha a etapa em que o chamado estava. Deve ser chamada antes de adicionar o novo
+    registro de histórico: o início da etapa é a última transição já gravada (ou a criação).
+    """
+    entrou_em = consulta_ultima_transicao(chamado.id).scalar() or chamado.criado_em
+    if not entrou_em or not status_anterior:
+        return
+
+    segundos = max((saiu_em - entrou_em).total_seconds(), 0.0)
+    db.session.add(EtapaChamado(
+        chamado_id=chamado.id, status=status_anterior,
+        entrou_em=entrou_em, saiu_em=saiu_em, segundos=segundos
+    ))
+    _somar_no_resumo(status_anterior, segundos, 1)
+
+
+def remover_etapas(chamado_id):
+    """Tira do resumo e do livro as etapas de um chamado que está sendo excluído."""
+    por_status = db.session.query(
+        EtapaChamado.status, func.sum(EtapaChamado.segundos), func.count(EtapaChamado.id)
+    ).filter(EtapaChamado.chamado_id == chamado_id).group_by(EtapaChamado.status).all()
+    for status, segundos, quantidade in por_status:
+        _somar_no_resumo(status, -segundos, -quantidade)
+    EtapaChamado.query.filter_by(chamado_id=chamado_id).delete(synchronize_session=False)
+
+
+def media_por_etapa():
+    """Retorna {status: média em segundos} a partir do resumo."""
+    return {
+        resumo.status: resumo.total_segundos / resumo.quantidade
+        for resumo in ResumoEtapa.query.filter(ResumoEtapa.quantidade > 0)
+    }
+
+
+def _transicoes_de_status(modelo_historico, modelo_chamado):
+    return db.session.query(
+        modelo_historico.chamado_id, modelo_historico.valor_anterior, modelo_historico.valor_novo,
+        modelo_historico.timestamp, modelo_chamado.criado_em
+    ).join(modelo_chamado, modelo_chamado.id == modelo_historico.chamado_id).filter(
+        modelo_historico.campo_alterado == 'status'
+    ).order_by(modelo_historico.chamado_id, modelo_historico.timestamp, modelo_historico.id).yield_per(TAMANHO_LOTE)
+
+
+def _etapas_das_transicoes(linhas):
+    """
+    Etapas fechadas pelas transições (chamado_id, valor_anterior, valor_novo, timestamp,
+    criado_em), que devem vir ordenadas por chamado e por momento.
+    """
+    chamado_atual, entrou_em = None, None
+    for chamado_id, valor_anterior, valor_novo, timestamp, criado_em in linhas:
+        if chamado_id != chamado_atual:
+            chamado_atual, entrou_em = chamado_id, criado_em
+        if entrou_em and valor_anterior:
+            yield {'chamado_id': chamado_id, 'status': valor_anterior, 'entrou_em': entrou_em,
+                   'saiu_em': timestamp, 'segundos': max((timestamp - entrou_em).total_seconds(), 0.0)}
+        entrou_em = timestamp
+
+
+def registrar_etapas_em_lote(transicoes):
+    """
+    Grava no livro e soma no resumo as etapas de chamados inseridos sem passar pelo
+    chamado_detalhe (ver importacao.py). Retorna o número de etapas.
+    """
+    etapas = list(_etapas_das_transicoes(transicoes))
+    if not etapas:
+        return 0
+    db.session.execute(EtapaChamado.__table__.insert(), etapas)
+    resumo = {}
+    for etapa in etapas:
+        soma, quantidade = resumo.get(etapa['status'], (0.0, 0))
+        resumo[etapa['status']] = (soma + etapa['segundos'], quantidade + 1)
+    for status, (soma, quantidade) in resumo.items():
+        _somar_no_resumo(status, soma, quantidade)
+    return len(etapas)
+
+
+def reconstruir_etapas():
+    """Refaz o livro e o resumo a partir do histórico existente. Retorna o número de etapas."""
+    db.session.query(EtapaChamado).delete(synchronize_session=False)
+    db.session.query(ResumoEtapa).delete(synchronize_session=False)
+
+    lote, resumo, total = [], {}, 0
+    # Chamados arquivados também entram: os ids não se repetem entre as duas tabelas
+    linhas = chain(_transicoes_de_status(HistoricoChamado, Chamado),
+                   _transicoes_de_status(HistoricoChamadoArquivado, ChamadoArquivado))
+    for etapa in _etapas_das_transicoes(linhas):
+        lote.append(etapa)
+        soma, quantidade = resumo.get(etapa['status'], (0.0, 0))
+        resumo[etapa['status']] = (soma + etapa['segundos'], quantidade + 1)
+        if len(lote) >= TAMANHO_LOTE:
+            db.session.execute(EtapaChamado.__table__.insert(), lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        db.session.execute(EtapaChamado.__table__.insert(), lote)
+        total += len(lote)
+
+    if resumo:
+        db.session.execute(ResumoEtapa.__table__.insert(), [
+            {'status': status, 'total_segundos': soma, 'quantidade': quantidade}
+            for status, (soma, quantidade) in resumo.items()
+        ])
+    db.session.commit()
+    return total
@@ -1,34 +1,42 @@
 # Em um novo arquivo chamado events.py
 from sqlalchemy import event
-from .models import Chamado
-from . import socketio # Importa a instância do __init__.py
+from sqlalchemy import inspect
+from sqlalchemy.orm import object_session
+from .models import Chamado, ChamadoAlteracao
+from .contadores import atualizar_contadores
+from .dispatcher import adiar_evento, adiar_notificacao
+from .consultas import STATUS_NOTIFICAVEIS
+from .serializacao import serializar_chamado, serializar_notificacao
+
+def registrar_alteracao(connection, chamado_id, operacao):
+    """Grava a alteração no log de versões, na mesma transação da mudança do chamado."""
+    connection.execute(ChamadoAlteracao.__table__.insert().values(chamado_id=chamado_id, operacao=operacao))
 
-def formatar_chamado(chamado):
-    """Função auxiliar para formatar os dados do chamado."""
-    return {
-        'id': chamado.id,
-        'nome': chamado.nome,
-        'setor': chamado.setor,
-        'descricao': chamado.descricao,
-        'status': chamado.status,
-        'criado_em': chamado.criado_em.isoformat() + 'Z' if chamado.criado_em else None,
-        'concluido_em': chamado.concluido_em.isoformat() + 'Z' if chamado.concluido_em else None
-    }
 @event.listens_for(Chamado, 'after_insert')
 def on_chamado_criado(mapper, connection, target):
     """Dispara quando um novo chamado é criado."""
     print(f"EVENTO: Novo chamado criado - ID: {target.id}")
-    socketio.emit('novo_chamado', formatar_chamado(target))
+    registrar_alteracao(connection, target.id, 'insert')
+    atualizar_contadores(connection, target, 'insert')
+    adiar_evento(object_session(target), 'insert', serializar_chamado(target))
 
 @event.listens_for(Chamado, 'after_update')
 def on_chamado_atualizado(mapper, connection, target):
     """Dispara quando um chamado existente é atualizado."""
     print(f"EVENTO: Chamado atualizado - ID: {target.id}")
-    socketio.emit('chamado_atualizado', formatar_chamado(target))
-    
+    registrar_alteracao(connection, target.id, 'update')
+    atualizar_contadores(connection, target, 'update')
+    adiar_evento(object_session(target), 'update', serializar_chamado(target))
+    if (inspect(target).attrs.status.history.has_changes()
+            and target.status in STATUS_NOTIFICAVEIS and not target.notificado):
+        adiar_notificacao(object_session(target), target.user_id, serializar_notificacao(target))
+
 @event.listens_for(Chamado, 'after_delete')
 def on_chamado_excluido(mapper, connection, target):
     """Dispara após um chamado ser deletado do banco."""
     print(f"EVENTO: Chamado excluído - ID: {target.id}")
-    # Envia um evento para o frontend com o ID do chamado removido
-    socketio.emit('chamado_excluido', {'id': target.id})
\ No newline at end of file
+    # Tombstone: o log guarda a exclusão para os clientes que sincronizarem depois
+    registrar_alteracao(connection, target.id, 'delete')
+    atualizar_contadores(connection, target, 'delete')
+    # O evento com o ID do chamado removido só é enviado ao frontend após o commit (ver dispatcher.py)
+    adiar_evento(object_session(target), 'delete', {'id': target.id})
\ No newline at end of file
@@ -0,0 +1,129 @@
+# app/exportacao.py
+"""
+Exportação de chamados, opcionalmente com o histórico de cada um, em CSV ou NDJSON,
+gerada enquanto é enviada.
+
+Os chamados são lidos com yield_per (cursor no servidor no Postgres) em ordem de id, e
+o histórico vem numa consulta por lote de chamados; a memória fica no tamanho de um
+lote, qualquer que seja o total. A conexão com o banco fica presa enquanto o download
+durar. Com arquivados=1 os chamados do arquivo (ver arquivo.py) vêm depois dos quentes.
+
+Formatos:
+    csv     uma linha por chamado; com historico=1, uma linha por transição com as colunas
+            do chamado repetidas (chamado sem histórico sai numa linha só). UTF-8 com BOM,
+            para o Excel reconhecer a acentuação.
+    ndjson  um objeto JSON por linha; com historico=1, cada chamado traz a lista 'historico'.
+"""
+import io
+import csv
+from datetime import datetime
+from flask import current_app, Response, stream_with_context
+from . import db
+from .arquivo import QUENTE, ARQUIVO, colunas
+from .serializacao import CAMPOS_EXPORTACAO, serializar_chamado, serializar_historico
+
+TAMANHO_LOTE = 500
+# Quanto texto junta antes de mandar um pedaço para o cliente
+TAMANHO_PEDACO = 64 * 1024
+FORMATOS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+CAMPOS_HISTORICO_CSV = ('historico_de', 'historico_para', 'historico_timestamp', 'historico_observacao')
+# Células que o Excel interpretaria como fórmula (o texto dos chamados vem dos usuários)
+_INICIO_DE_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _consulta_chamados(modelo, filtros):
+    consulta = db.session.query(*colunas(modelo, CAMPOS_EXPORTACAO))
+    if filtros.get('setor'):
+        consulta = consulta.filter(modelo.setor == filtros['setor'])
+    if filtros.get('status'):
+        consulta = consulta.filter(modelo.status == filtros['status'])
+    if filtros.get('de'):
+        consulta = consulta.filter(modelo.criado_em >= filtros['de'])
+    if filtros.get('ate'):
+        consulta = consulta.filter(modelo.criado_em < filtros['ate'])
+    return consulta.order_by(modelo.id).yield_per(TAMANHO_LOTE)
+
+
+def _em_lotes(linhas, tamanho):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _historicos_do_lote(modelo, ids):
+    por_chamado = {}
+    for h in db.session.query(
+        modelo.chamado_id, modelo.id, modelo.valor_anterior, modelo.valor_novo, modelo.timestamp, modelo.observacao
+    ).filter(modelo.chamado_id.in_(ids)).order_by(modelo.chamado_id, modelo.timestamp, modelo.id):
+        por_chamado.setdefault(h.chamado_id, []).append(serializar_historico(h))
+    return por_chamado
+
+
+def chamados_exportados(filtros, com_historico=False, arquivados=False):
+    """Gera (dict do chamado, lista do histórico ou None) para os chamados dos filtros."""
+    for modelo_chamado, modelo_historico in ((QUENTE, ARQUIVO) if arquivados else (QUENTE,)):
+        for lote in _em_lotes(_consulta_chamados(modelo_chamado, filtros), TAMANHO_LOTE):
+            historicos = _historicos_do_lote(modelo_historico, [linha.id for linha in lote]) if com_historico else {}
+            for linha in lote:
+                yield (serializar_chamado(linha, CAMPOS_EXPORTACAO),
+                       historicos.get(linha.id, []) if com_historico else None)
+
+
+def _celula(valor):
+    if isinstance(valor, str) and valor.startswith(_INICIO_DE_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def gerar_csv(itens, com_historico):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write('\ufeff')
+    escritor.writerow(CAMPOS_EXPORTACAO + (CAMPOS_HISTORICO_CSV if com_historico else ()))
+    for chamado, historico in itens:
+        base = [_celula(chamado[campo]) for campo in CAMPOS_EXPORTACAO]
+        if not com_historico:
+            escritor.writerow(base)
+        else:
+            for h in historico or [None]:
+                escritor.writerow(base + ([h['de'], h['para'], h['timestamp'], _celula(h['observacao'])]
+                                          if h else [None] * len(CAMPOS_HISTORICO_CSV)))
+        if buffer.tell() >= TAMANHO_PEDACO:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def gerar_ndjson(itens, com_historico):
+    dumps = current_app.json.dumps
+    buffer = []
+    tamanho = 0
+    for chamado, historico in itens:
+        if com_historico:
+            chamado['historico'] = historico
+        linha = dumps(chamado)
+        buffer.append(linha)
+        tamanho += len(linha)
+        if tamanho >= TAMANHO_PEDACO:
+            yield '\n'.join(buffer) + '\n'
+            buffer, tamanho = [], 0
+    if buffer:
+        yield '\n'.join(buffer) + '\n'
+
+
+def resposta_exportacao(formato, filtros, com_historico=False, arquivados=False):
+    """Response em streaming com o arquivo para download."""
+    gerar = gerar_csv if formato == 'csv' else gerar_ndjson
+    corpo = gerar(chamados_exportados(filtros, com_historico, arquivados), com_historico)
+    nome = f"chamados-{datetime.utcnow():%Y%m%d-%H%M}.{formato}"
+    return Response(stream_with_context(corpo), mimetype=FORMATOS[formato], headers={
+        'Content-Disposition': f'attachment; filename="{nome}"',
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no',
+    })
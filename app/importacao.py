@@ -0,0 +1,260 @@
+# app/importacao.py
+"""
+Importação em lote de chamados, com o histórico, a partir de NDJSON (um chamado por
+linha), para trazer os chamados do sistema antigo.
+
+Formato de cada linha:
+    {"nome": "Fulano", "setor": "TI", "descricao": "Impressora não imprime",
+     "user_id": 12,                      (ou "email": "fulano@empresa")
+     "status": "Finalizado", "criado_em": "2021-03-04T10:00:00", "concluido_em": "2021-03-05T16:20:00",
+     "historico": [{"valor_anterior": "Aberto", "valor_novo": "Em andamento",
+                    "timestamp": "2021-03-04T11:00:00", "observacao": "..."}]}
+Obrigatórios: nome, setor, descricao e user_id ou email de um usuário existente.
+Opcionais: status (padrão: o valor_novo da última transição, ou 'Aberto'), observacao,
+anydesk, imagem_url, funcionario_id, sistema_origem (padrão: o da importação, 'legado'),
+notificado (padrão true: chamados antigos não viram notificação para o usuário), as
+datas em ISO 8601 (criado_em padrão: agora; com fuso, convertidas para UTC) e o histórico.
+
+Cada lote de IMPORTACAO_TAMANHO_LOTE linhas válidas entra numa transação: chamados,
+histórico e log de alterações por insert em lote (executemany, com RETURNING dos ids);
+contadores do dashboard e livro de etapas por somas agregadas do lote, um upsert por
+chave em vez de um por chamado. Os contadores só somam chamados com sistema_origem
+'novo' (ver contadores.py): os do sistema antigo não mexem nos KPIs. Linhas inválidas são puladas e relatadas pelo número da
+linha; se o banco recusar um lote, só ele é desfeito e os seguintes continuam.
+
+Os chamados não passam pelos eventos do ORM: em vez de um evento Socket.IO por chamado,
+sai um único 'chamados_importados' no fim, e os dashboards buscam o que mudou pela
+sincronização incremental. Não há deduplicação: importar o mesmo arquivo duas vezes
+duplica os chamados.
+
+Variáveis (todas opcionais):
+    IMPORTACAO_TAMANHO_LOTE   linhas por transação (padrão 1000)
+"""
+import os
+import json
+import time
+import logging
+from datetime import datetime, timezone
+from sqlalchemy.exc import SQLAlchemyError
+from . import db
+from .models import Usuario, Chamado, HistoricoChamado, ChamadoAlteracao
+from .contadores import somar_chamados_nos_contadores
+from .etapas import registrar_etapas_em_lote
+from .dispatcher import avisar_importacao
+
+TAMANHO_LOTE = int(os.environ.get('IMPORTACAO_TAMANHO_LOTE', 1000))
+ORIGEM_PADRAO = 'legado'
+# Erros listados no relatório; os demais só entram na contagem
+MAX_ERROS = 1000
+
+CAMPOS_TEXTO = ('nome', 'setor', 'descricao', 'status', 'anydesk', 'imagem_url', 'observacao', 'sistema_origem')
+CAMPOS_DATA = ('criado_em', 'iniciado_em', 'andamento_em', 'concluido_em')
+OBRIGATORIOS = ('nome', 'setor', 'descricao')
+
+
+# --- validação ------------------------------------------------------------------
+
+def _texto(dados, campo, coluna, obrigatorio=False):
+    valor = dados.get(campo)
+    if valor is None or valor == '':
+        if obrigatorio:
+            raise ValueError(f"'{campo}' é obrigatório.")
+        return None
+    if not isinstance(valor, str):
+        raise ValueError(f"'{campo}' deve ser texto.")
+    if coluna.type.length and len(valor) > coluna.type.length:
+        raise ValueError(f"'{campo}' passa de {coluna.type.length} caracteres.")
+    return valor
+
+
+def _data(dados, campo, obrigatorio=False):
+    valor = dados.get(campo)
+    if valor is None or valor == '':
+        if obrigatorio:
+            raise ValueError(f"'{campo}' é obrigatório.")
+        return None
+    try:
+        data = datetime.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{campo}' não é uma data ISO 8601: {valor!r}.") from None
+    # O banco guarda UTC sem fuso
+    return data.astimezone(timezone.utc).replace(tzinfo=None) if data.tzinfo else data
+
+
+def _inteiro(dados, campo):
+    valor = dados.get(campo)
+    if valor is not None and (isinstance(valor, bool) or not isinstance(valor, int)):
+        raise ValueError(f"'{campo}' deve ser um número inteiro.")
+    return valor
+
+
+def _historico(dados):
+    brutos = dados.get('historico') or []
+    if not isinstance(brutos, list):
+        raise ValueError("'historico' deve ser uma lista.")
+    colunas = HistoricoChamado.__table__.c
+    historicos = []
+    for i, bruto in enumerate(brutos):
+        try:
+            if not isinstance(bruto, dict):
+                raise ValueError("não é um objeto.")
+            historicos.append({
+                'campo_alterado': _texto(bruto, 'campo_alterado', colunas.campo_alterado) or 'status',
+                'valor_anterior': _texto(bruto, 'valor_anterior', colunas.valor_anterior),
+                'valor_novo': _texto(bruto, 'valor_novo', colunas.valor_novo, obrigatorio=True),
+                'observacao': _texto(bruto, 'observacao', colunas.observacao),
+                'timestamp': _data(bruto, 'timestamp', obrigatorio=True),
+            })
+        except ValueError as e:
+            raise ValueError(f"historico[{i}]: {e}") from None
+    # Na ordem em que aconteceu, como o chamado_detalhe teria gravado
+    return sorted(historicos, key=lambda h: h['timestamp'])
+
+
+def validar_linha(dados, origem=ORIGEM_PADRAO):
+    """
+    Converte um objeto do NDJSON em (chamado, email do dono ou None, históricos), prontos
+    para o insert. Lança ValueError com o motivo se a linha for inválida.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError("a linha não é um objeto JSON.")
+    colunas = Chamado.__table__.c
+    historicos = _historico(dados)
+
+    chamado = {campo: _texto(dados, campo, colunas[campo], campo in OBRIGATORIOS) for campo in CAMPOS_TEXTO}
+    chamado.update({campo: _data(dados, campo) for campo in CAMPOS_DATA})
+    if not chamado['status']:
+        transicoes = [h for h in historicos if h['campo_alterado'] == 'status']
+        chamado['status'] = transicoes[-1]['valor_novo'] if transicoes else 'Aberto'
+        if len(chamado['status']) > colunas.status.type.length:
+            raise ValueError(f"'status' passa de {colunas.status.type.length} caracteres.")
+    chamado['sistema_origem'] = chamado['sistema_origem'] or origem
+    chamado['criado_em'] = chamado['criado_em'] or datetime.utcnow()
+    chamado['funcionario_id'] = _inteiro(dados, 'funcionario_id')
+    chamado['notificado'] = dados.get('notificado', True)
+    if not isinstance(chamado['notificado'], bool):
+        raise ValueError("'notificado' deve ser true ou false.")
+
+    chamado['user_id'] = _inteiro(dados, 'user_id')
+    email = None
+    if chamado['user_id'] is None:
+        email = _texto(dados, 'email', Usuario.__table__.c.email)
+        if not email:
+            raise ValueError("informe 'user_id' ou 'email' do dono do chamado.")
+    return chamado, email, historicos
+
+
+def _com_usuarios(pendentes, erro):
+    """Resolve os donos dos chamados do lote com duas consultas; linhas sem usuário viram erro."""
+    ids = {chamado['user_id'] for _, chamado, email, _ in pendentes if email is None}
+    emails = {email for _, _, email, _ in pendentes if email is not None}
+    existentes = {i for (i,) in db.session.query(Usuario.id).filter(Usuario.id.in_(ids))} if ids else set()
+    por_email = dict(db.session.query(Usuario.email, Usuario.id).filter(Usuario.email.in_(emails))) if emails else {}
+
+    validas = []
+    for numero, chamado, email, historicos in pendentes:
+        if email is not None:
+            if email not in por_email:
+                erro(numero, f"usuário '{email}' não existe.")
+                continue
+            chamado['user_id'] = por_email[email]
+        elif chamado['user_id'] not in existentes:
+            erro(numero, f"usuário {chamado['user_id']} não existe.")
+            continue
+        validas.append((numero, chamado, historicos))
+    return validas
+
+
+# --- carga ------------------------------------------------------------------------
+
+def _inserir_lote(validas):
+    """Insere (numero, chamado, históricos) numa transação. Retorna (ids, históricos inseridos)."""
+    conexao = db.session.connection()
+    tabela = Chamado.__table__
+    ids = conexao.execute(
+        tabela.insert().returning(tabela.c.id, sort_by_parameter_order=True),
+        [chamado for _, chamado, _ in validas]
+    ).scalars().all()
+
+    historicos = [{**h, 'chamado_id': chamado_id} for chamado_id, (_, _, hs) in zip(ids, validas) for h in hs]
+    if historicos:
+        conexao.execute(HistoricoChamado.__table__.insert(), historicos)
+    # Uma entrada por chamado no log de versões, como se cada um tivesse sido criado pela API
+    conexao.execute(ChamadoAlteracao.__table__.insert(), [{'chamado_id': i, 'operacao': 'insert'} for i in ids])
+    somar_chamados_nos_contadores(conexao, [chamado for _, chamado, _ in validas])
+    registrar_etapas_em_lote(
+        (chamado_id, h['valor_anterior'], h['valor_novo'], h['timestamp'], chamado['criado_em'])
+        for chamado_id, (_, chamado, hs) in zip(ids, validas)
+        for h in hs if h['campo_alterado'] == 'status'
+    )
+    db.session.commit()
+    return ids, len(historicos)
+
+
+def _processar_lote(pendentes, relatorio, erro, log):
+    validas = _com_usuarios(pendentes, erro)
+    if not validas:
+        return
+    try:
+        ids, historicos = _inserir_lote(validas)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        motivo = str(getattr(e, 'orig', None) or e).splitlines()[0]
+        logging.error(f"Lote das linhas {validas[0][0]}-{validas[-1][0]} recusado pelo banco: {motivo}")
+        for numero, _, _ in validas:
+            erro(numero, f"lote recusado pelo banco: {motivo}")
+        return
+    relatorio['importados'] += len(ids)
+    relatorio['historicos'] += historicos
+    log(f"📥 {len(ids)} chamados importados (linhas {validas[0][0]}-{validas[-1][0]}; "
+        f"{relatorio['importados']} no total).")
+
+
+def importar(linhas, origem=ORIGEM_PADRAO, tamanho_lote=TAMANHO_LOTE, log=logging.info):
+    """
+    Importa as linhas de um NDJSON (iterável de str ou bytes, ex.: um arquivo aberto ou
+    request.stream). Retorna o relatório: linhas lidas, chamados e históricos importados,
+    total_erros e os primeiros MAX_ERROS erros como {'linha', 'erro'}.
+    """
+    relatorio = {'linhas': 0, 'importados': 0, 'historicos': 0, 'total_erros': 0, 'erros': []}
+    # Erros desde o último lote: os de usuário inexistente e de banco só aparecem no fechamento
+    # do lote, depois dos de validação de linhas seguintes, então a ordem é acertada por lote
+    erros_do_lote = []
+
+    def erro(numero, mensagem):
+        relatorio['total_erros'] += 1
+        erros_do_lote.append({'linha': numero, 'erro': mensagem})
+        if len(erros_do_lote) > 2 * MAX_ERROS:
+            # Só os MAX_ERROS de menor linha podem entrar no relatório
+            erros_do_lote.sort(key=lambda item: item['linha'])
+            del erros_do_lote[MAX_ERROS:]
+
+    def fechar_lote(pendentes):
+        if pendentes:
+            _processar_lote(pendentes, relatorio, erro, log)
+        # Lotes seguintes só têm linhas maiores: basta ordenar os erros deste
+        erros_do_lote.sort(key=lambda item: item['linha'])
+        relatorio['erros'].extend(erros_do_lote[:MAX_ERROS - len(relatorio['erros'])])
+        erros_do_lote.clear()
+
+    inicio = time.perf_counter()
+    pendentes = []
+    for numero, linha in enumerate(linhas, 1):
+        if not linha.strip():
+            continue
+        relatorio['linhas'] += 1
+        try:
+            pendentes.append((numero, *validar_linha(json.loads(linha), origem)))
+        except ValueError as e:
+            # Inclui JSON malformado e bytes que não são UTF-8
+            erro(numero, str(e))
+        if len(pendentes) >= tamanho_lote:
+            fechar_lote(pendentes)
+            pendentes = []
+    fechar_lote(pendentes)
+
+    if relatorio['importados']:
+        avisar_importacao(relatorio['importados'], origem)
+    log(f"✅ {relatorio['importados']} chamados e {relatorio['historicos']} históricos importados de "
+        f"{relatorio['linhas']} linhas em {time.perf_counter() - inicio:.1f}s; {relatorio['total_erros']} com erro.")
+    return relatorio
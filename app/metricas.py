@@ -0,0 +1,78 @@
+# app/metricas.py
+"""
+Métricas de SLA (tempo de resolução e tempo em "Pendente") calculadas no banco,
+para um ou centenas de chamados numa única consulta com função de janela.
+"""
+from sqlalchemy import func, select, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Float
+from . import db
+from .models import Chamado, HistoricoChamado
+
+
+class segundos_entre(FunctionElement):
+    """Diferença em segundos entre dois DateTime, compilada para cada banco."""
+    type = Float()
+    inherit_cache = True
+    name = 'segundos_entre'
+
+
+@compiles(segundos_entre)
+def _segundos_entre_sqlite(element, compiler, **kw):
+    inicio, fim = list(element.clauses)
+    return f"((julianday({compiler.process(fim, **kw)}) - julianday({compiler.process(inicio, **kw)})) * 86400.0)"
+
+
+@compiles(segundos_entre, 'postgresql')
+def _segundos_entre_postgresql(element, compiler, **kw):
+    inicio, fim = list(element.clauses)
+    return f"EXTRACT(EPOCH FROM ({compiler.process(fim, **kw)} - {compiler.process(inicio, **kw)}))"
+
+
+def consulta_metricas(ids, modelo_chamado=Chamado, modelo_historico=HistoricoChamado):
+    """
+    SELECT (id, segundos até a resolução, segundos em "Pendente") dos chamados 'ids'.
+
+    'ids' pode ser uma lista ou um SELECT de ids. O tempo pendente soma, para cada entrada
+    em "Pendente" no histórico, o intervalo até a transição seguinte (lead() por chamado).
+    Para chamados arquivados, passe ChamadoArquivado e HistoricoChamadoArquivado.
+    """
+    proximo = func.lead(modelo_historico.timestamp).over(
+        partition_by=modelo_historico.chamado_id,
+        order_by=(modelo_historico.timestamp, modelo_historico.id)
+    )
+    transicoes = select(
+        modelo_historico.chamado_id,
+        modelo_historico.valor_novo,
+        modelo_historico.timestamp.label('inicio'),
+        proximo.label('fim')
+    ).where(modelo_historico.chamado_id.in_(ids)).subquery()
+
+    pendente = select(
+        transicoes.c.chamado_id,
+        func.sum(segundos_entre(transicoes.c.inicio, transicoes.c.fim)).label('segundos')
+    ).where(
+        transicoes.c.valor_novo == 'Pendente',
+        transicoes.c.fim.isnot(None)
+    ).group_by(transicoes.c.chamado_id).subquery()
+
+    return select(
+        modelo_chamado.id,
+        segundos_entre(modelo_chamado.criado_em, modelo_chamado.concluido_em).label('resolucao'),
+        func.coalesce(pendente.c.segundos, literal(0.0)).label('pendente')
+    ).outerjoin(pendente, pendente.c.chamado_id == modelo_chamado.id).where(modelo_chamado.id.in_(ids))
+
+
+def metricas_em_lote(ids, modelo_chamado=Chamado, modelo_historico=HistoricoChamado):
+    """
+    Retorna {chamado_id: {'tempo_total_resolucao_minutos', 'tempo_total_pendente_minutos'}}
+    para os chamados 'ids' (lista ou SELECT de ids; ver consulta_metricas).
+    """
+    return {
+        chamado_id: {
+            'tempo_total_resolucao_minutos': round((resolucao or 0) / 60),
+            'tempo_total_pendente_minutos': round((pendente_seg or 0) / 60),
+        }
+        for chamado_id, resolucao, pendente_seg in db.session.execute(consulta_metricas(ids, modelo_chamado, modelo_historico))
+    }
@@ -40,6 +40,15 @@ class Chamado(db.Model):
     autor = db.relationship('Usuario', back_populates='chamados')
     historico = db.relationship('HistoricoChamado', back_populates='chamado', lazy='dynamic', cascade="all, delete-orphan")
 
+    # Índices compostos no formato das consultas de consultas.py (verificados por 'flask verificar-indices')
+    __table_args__ = (
+        db.Index('ix_chamados_user_status_notificado', 'user_id', 'status', 'notificado'),
+        db.Index('ix_chamados_user_criado_em', 'user_id', 'criado_em'),
+        db.Index('ix_chamados_origem_criado_em', 'sistema_origem', 'criado_em', 'id'),
+        # No SQLite, ids de chamados apagados ou arquivados nunca são reaproveitados (ver arquivo.py)
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f"<Chamado {self.id} ({self.status})>"
 
@@ -55,5 +64,122 @@ class HistoricoChamado(db.Model):
 
     chamado = db.relationship('Chamado', back_populates='historico')
 
+    __table_args__ = (
+        db.Index('ix_historico_chamado_chamado_timestamp', 'chamado_id', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f"<Historico para Chamado {self.chamado_id}>"
+
+class ChamadoArquivado(db.Model):
+    """
+    Chamado finalizado movido de 'chamados' pelo arquivamento (ver arquivo.py).
+    Mesmas colunas, mesmo id; não há eventos nem busca textual nesta tabela.
+    """
+    __tablename__ = 'chamados_arquivo'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    nome = db.Column(db.String(100), nullable=False)
+    setor = db.Column(db.String(50), nullable=False)
+    descricao = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    anydesk = db.Column(db.String(50), nullable=True)
+    sistema_origem = db.Column(db.String(20), nullable=False)
+    imagem_url = db.Column(db.String(200))
+    observacao = db.Column(db.Text)
+    user_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    funcionario_id = db.Column(db.Integer)
+    notificado = db.Column(db.Boolean, default=False)
+    criado_em = db.Column(db.DateTime)
+    iniciado_em = db.Column(db.DateTime)
+    andamento_em = db.Column(db.DateTime)
+    concluido_em = db.Column(db.DateTime)
+    arquivado_em = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_chamados_arquivo_user_criado_em', 'user_id', 'criado_em'),
+        db.Index('ix_chamados_arquivo_criado_em', 'criado_em'),
+    )
+
+    def __repr__(self):
+        return f"<ChamadoArquivado {self.id} ({self.status})>"
+
+class HistoricoChamadoArquivado(db.Model):
+    """Histórico de um chamado arquivado, movido junto com ele."""
+    __tablename__ = 'historico_chamado_arquivo'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    chamado_id = db.Column(db.Integer, db.ForeignKey('chamados_arquivo.id'), nullable=False)
+    campo_alterado = db.Column(db.String(50))
+    valor_anterior = db.Column(db.String(100))
+    valor_novo = db.Column(db.String(100), nullable=False)
+    observacao = db.Column(db.Text)
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_historico_chamado_arquivo_chamado_timestamp', 'chamado_id', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f"<Historico arquivado para Chamado {self.chamado_id}>"
+
+class ChamadoAlteracao(db.Model):
+    """
+    Log de alterações dos chamados usado na sincronização incremental do dashboard.
+    O id é a versão monotônica: cada insert/update/delete de um Chamado gera uma linha nova.
+    Não há FK para 'chamados' porque as exclusões precisam sobreviver como tombstones.
+    """
+    __tablename__ = 'chamado_alteracao'
+    # Sem AUTOINCREMENT o SQLite reaproveita ids após a limpeza do log, e a versão voltaria para trás
+    __table_args__ = {'sqlite_autoincrement': True}
+    id = db.Column(db.Integer, primary_key=True)
+    chamado_id = db.Column(db.Integer, nullable=False)
+    operacao = db.Column(db.String(10), nullable=False)  # 'insert', 'update', 'delete' ou 'arquivo'
+    criado_em = db.Column(db.DateTime, server_default=db.func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<Alteracao {self.id} ({self.operacao} chamado {self.chamado_id})>"
+
+
+class ContadorChamados(db.Model):
+    """Total de chamados por (status, setor), mantido na mesma transação das mudanças de status."""
+    __tablename__ = 'contador_chamados'
+    status = db.Column(db.String(20), primary_key=True)
+    setor = db.Column(db.String(50), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Contador {self.status}/{self.setor}: {self.total}>"
+
+
+class FechamentoDiario(db.Model):
+    """Quantidade de chamados finalizados por dia (data UTC de concluido_em)."""
+    __tablename__ = 'fechamento_diario'
+    dia = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Fechamentos {self.dia}: {self.total}>"
+
+
+class EtapaChamado(db.Model):
+    """Período fechado que um chamado passou em um status (de entrou_em até saiu_em)."""
+    __tablename__ = 'etapa_chamado'
+    id = db.Column(db.Integer, primary_key=True)
+    chamado_id = db.Column(db.Integer, nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False)
+    entrou_em = db.Column(db.DateTime, nullable=False)
+    saiu_em = db.Column(db.DateTime, nullable=False)
+    segundos = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"<Etapa {self.status} do chamado {self.chamado_id}: {self.segundos:.0f}s>"
+
+
+class ResumoEtapa(db.Model):
+    """Soma e quantidade de etapas fechadas por status, para médias em tempo constante."""
+    __tablename__ = 'resumo_etapa'
+    status = db.Column(db.String(20), primary_key=True)
+    total_segundos = db.Column(db.Float, nullable=False, default=0)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+
     def __repr__(self):
-        return f"<Historico para Chamado {self.chamado_id}>"
\ No newline at end of file
+        return f"<Resumo {self.status}: {self.quantidade} etapas>"
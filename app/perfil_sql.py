@@ -0,0 +1,238 @@
+# app/perfil_sql.py
+"""
+Perfilador de SQL por requisição, opcional e por amostragem.
+
+Numa requisição amostrada, cada statement executado é guardado com parâmetros e
+duração (eventos before/after_cursor_execute do SQLAlchemy). No fim da requisição:
+    - statements acima de SQL_PERFIL_LENTA_MS são logados com os parâmetros (só tipo
+      e tamanho deles quando o statement toca a tabela usuario: senhas, respostas de
+      segurança e emails não vão para o log);
+    - a mesma forma de statement (texto com os parâmetros como placeholders) repetida
+      SQL_PERFIL_REPETICOES vezes ou mais é logada como possível N+1;
+    - com SQL_PERFIL_EXPLAIN=1, o statement lento mais demorado ganha um EXPLAIN no log.
+As formas mais lentas ficam num resumo em memória, consultado em GET /api/perfil-sql
+(admin), que também pode rodar EXPLAIN nelas (?explain=1), exceto nas formas sensíveis.
+
+Variáveis (todas opcionais):
+    SQL_PERFIL_AMOSTRAGEM   fração das requisições perfiladas, 0-1 (padrão 0: desligado)
+    SQL_PERFIL_LENTA_MS     limite para logar um statement como lento (padrão 100)
+    SQL_PERFIL_REPETICOES   repetições da mesma forma numa requisição para acusar N+1 (padrão 5)
+    SQL_PERFIL_EXPLAIN      loga o EXPLAIN do statement mais lento da requisição (padrão 0)
+
+Com o perfilador ligado, um admin força o perfil de uma requisição com o cabeçalho
+'X-Perfil-SQL: 1'. Requisições não amostradas pagam só a checagem de um atributo em 'g'
+por statement; a análise e o EXPLAIN ficam só nas amostradas.
+"""
+import os
+import re
+import time
+import random
+import logging
+import threading
+from flask import request, session, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from . import db
+from .telemetria import sql_lentas, sql_n_mais_um
+
+AMOSTRAGEM = float(os.environ.get('SQL_PERFIL_AMOSTRAGEM', 0))
+LENTA_MS = float(os.environ.get('SQL_PERFIL_LENTA_MS', 100))
+REPETICOES_N_MAIS_UM = int(os.environ.get('SQL_PERFIL_REPETICOES', 5))
+EXPLAIN_NO_LOG = os.environ.get('SQL_PERFIL_EXPLAIN', '0').lower() in ('1', 'true', 'yes')
+
+MAX_FORMAS = 200
+MAX_TEXTO_LOG = 2000
+
+_ESPACOS = re.compile(r'\s+')
+# "IN (?, ?, ?)" com qualquer número de itens vira uma forma só
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s)\s*,)+\s*(?:\?|%s|%\(\w+\)s)\s*\)')
+
+# Parâmetros de statements nessas tabelas nunca são guardados nem logados
+TABELAS_SENSIVEIS = ('usuario',)
+_TABELA_SENSIVEL = re.compile(r'\b(?:' + '|'.join(TABELAS_SENSIVEIS) + r')\b', re.IGNORECASE)
+
+_lock = threading.Lock()
+_formas = {}
+
+
+def forma_do_statement(statement):
+    """Texto normalizado usado para agrupar execuções do mesmo statement."""
+    return _LISTA_PARAMETROS.sub('(?, ...)', _ESPACOS.sub(' ', statement).strip())
+
+
+def sensivel(statement):
+    return _TABELA_SENSIVEL.search(statement) is not None
+
+
+def _descrever(valor):
+    if isinstance(valor, dict):
+        return {chave: _descrever(v) for chave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_descrever(v) for v in valor]
+    if isinstance(valor, (str, bytes)):
+        return f"{type(valor).__name__}({len(valor)})"
+    return type(valor).__name__
+
+
+def parametros_seguros(statement, parameters):
+    """Os parâmetros como vieram ou, em statements sensíveis, só o tipo e o tamanho de cada um."""
+    return _descrever(parameters) if sensivel(statement) else parameters
+
+
+def _resumir(texto, limite=MAX_TEXTO_LOG):
+    texto = str(texto)
+    return texto if len(texto) <= limite else texto[:limite] + '…'
+
+
+# --- coleta ---------------------------------------------------------------------
+
+def _perfilando():
+    return has_request_context() and 'perfil_sql' in g
+
+
+# Como em telemetria.py, o início fica no contexto do statement (some junto se ele lançar)
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _perfilando():
+        context._perfil_sql_inicio = time.perf_counter()
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, '_perfil_sql_inicio', None)
+    if inicio is None or not _perfilando():
+        return
+    g.perfil_sql.append((statement, parameters, time.perf_counter() - inicio, executemany))
+
+
+def _inicio_requisicao():
+    forcado = request.headers.get('X-Perfil-SQL') == '1' and session.get('email') == 'adm@adm'
+    if forcado or random.random() < AMOSTRAGEM:
+        g.perfil_sql = []
+
+
+# --- análise ------------------------------------------------------------------
+
+def explicavel(statement):
+    return statement.lstrip().upper().startswith(('SELECT', 'WITH'))
+
+
+def explicar(statement, parameters):
+    """Plano de execução do statement (sem executá-lo), como lista de linhas. Recusa statements sensíveis."""
+    if sensivel(statement):
+        raise ValueError("EXPLAIN não é feito em statements com dados sensíveis.")
+    # O próprio EXPLAIN não entra no perfil da requisição
+    execucoes = g.pop('perfil_sql', None) if has_request_context() else None
+    try:
+        with db.engine.connect() as conn:
+            if conn.dialect.name == 'sqlite':
+                linhas = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+                return [linha[-1] for linha in linhas]
+            return [linha[0] for linha in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters or {})]
+    finally:
+        if execucoes is not None:
+            g.perfil_sql = execucoes
+
+
+def _acumular(rota, forma, statement, parameters, duracao, repeticoes):
+    with _lock:
+        dados = _formas.get(forma)
+        if dados is None:
+            if len(_formas) >= MAX_FORMAS:
+                # Abre espaço tirando a forma que menos pesou até agora
+                del _formas[min(_formas, key=lambda f: _formas[f]['tempo_total_ms'])]
+            dados = _formas[forma] = {
+                'forma': forma, 'execucoes': 0, 'tempo_total_ms': 0.0, 'tempo_max_ms': 0.0,
+                'max_repeticoes_por_requisicao': 0, 'rotas': set(),
+                'statement': statement, 'parametros': parameters,
+            }
+        dados['execucoes'] += 1
+        dados['tempo_total_ms'] += duracao * 1000
+        if duracao * 1000 > dados['tempo_max_ms']:
+            # Guarda os parâmetros da pior execução: são os que valem um EXPLAIN
+            dados['tempo_max_ms'] = duracao * 1000
+            dados['statement'], dados['parametros'] = statement, parameters
+        dados['max_repeticoes_por_requisicao'] = max(dados['max_repeticoes_por_requisicao'], repeticoes)
+        dados['rotas'].add(rota)
+
+
+def _fim_requisicao(resposta):
+    execucoes = g.pop('perfil_sql', None)
+    if not execucoes:
+        return resposta
+
+    rota = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+    por_forma = {}
+    for statement, parameters, duracao, executemany in execucoes:
+        por_forma.setdefault(forma_do_statement(statement), []).append((statement, parameters, duracao, executemany))
+
+    mais_lenta = None
+    for forma, lista in por_forma.items():
+        for statement, parameters, duracao, executemany in lista:
+            _acumular(rota, forma, statement, parametros_seguros(statement, parameters), duracao, len(lista))
+            if duracao * 1000 >= LENTA_MS:
+                sql_lentas.incrementar((rota,))
+                logging.warning(f"🐢 SQL lento ({duracao * 1000:.0f} ms) em {rota}: {_resumir(forma)} "
+                                f"| parâmetros: {_resumir(parametros_seguros(statement, parameters), 500)}")
+                if (not executemany and explicavel(statement) and not sensivel(statement)
+                        and (mais_lenta is None or duracao > mais_lenta[2])):
+                    mais_lenta = (statement, parameters, duracao)
+        if len(lista) >= REPETICOES_N_MAIS_UM:
+            sql_n_mais_um.incrementar((rota,))
+            total_ms = sum(item[2] for item in lista) * 1000
+            logging.warning(f"🔁 Possível N+1 em {rota}: {len(lista)}x a mesma consulta "
+                            f"({total_ms:.0f} ms no total): {_resumir(forma, 500)}")
+
+    if EXPLAIN_NO_LOG and mais_lenta:
+        try:
+            plano = explicar(mais_lenta[0], mais_lenta[1])
+            logging.warning(f"📋 EXPLAIN da consulta mais lenta de {rota}:\n    " + "\n    ".join(plano))
+        except Exception as e:
+            logging.error(f"Erro ao rodar EXPLAIN: {e}")
+
+    logging.info(f"🔎 Perfil SQL de {rota}: {len(execucoes)} statements, {len(por_forma)} formas, "
+                 f"{sum(e[2] for e in execucoes) * 1000:.1f} ms.")
+    return resposta
+
+
+def relatorio(limite=20, com_explain=False):
+    """As formas mais lentas vistas nas requisições amostradas, da pior para a melhor."""
+    with _lock:
+        formas = sorted(_formas.values(), key=lambda d: d['tempo_max_ms'], reverse=True)[:limite]
+        formas = [{**d, 'rotas': sorted(d['rotas'])} for d in formas]
+
+    resultado = []
+    for dados in formas:
+        item = {
+            'forma': dados['forma'],
+            'execucoes': dados['execucoes'],
+            'tempo_total_ms': round(dados['tempo_total_ms'], 2),
+            'tempo_medio_ms': round(dados['tempo_total_ms'] / dados['execucoes'], 2),
+            'tempo_max_ms': round(dados['tempo_max_ms'], 2),
+            'max_repeticoes_por_requisicao': dados['max_repeticoes_por_requisicao'],
+            'suspeita_n_mais_um': dados['max_repeticoes_por_requisicao'] >= REPETICOES_N_MAIS_UM,
+            'rotas': dados['rotas'],
+            'parametros_do_pior_caso': _resumir(dados['parametros'], 500),
+        }
+        if com_explain and explicavel(dados['statement']) and not sensivel(dados['statement']):
+            try:
+                item['explain'] = explicar(dados['statement'], dados['parametros'])
+            except Exception as e:
+                item['explain'] = [f"erro: {e}"]
+        resultado.append(item)
+    return {
+        'amostragem': AMOSTRAGEM,
+        'lenta_ms': LENTA_MS,
+        'repeticoes_n_mais_um': REPETICOES_N_MAIS_UM,
+        'formas': resultado,
+    }
+
+
+def init_perfil_sql(app):
+    """Liga o perfilador quando SQL_PERFIL_AMOSTRAGEM > 0."""
+    if AMOSTRAGEM <= 0:
+        return
+    app.before_request(_inicio_requisicao)
+    app.after_request(_fim_requisicao)
+    if not event.contains(Engine, 'before_cursor_execute', _antes_da_consulta):
+        event.listen(Engine, 'before_cursor_execute', _antes_da_consulta)
+        event.listen(Engine, 'after_cursor_execute', _depois_da_consulta)
+    logging.info(f"🔎 Perfilador de SQL ligado (amostragem {AMOSTRAGEM:.2%}, lentas a partir de {LENTA_MS:.0f} ms).")
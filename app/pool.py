@@ -0,0 +1,105 @@
+# app/pool.py
+"""
+Pool de conexões do banco configurado por variáveis de ambiente, com métricas.
+
+Variáveis (todas opcionais):
+    DB_POOL_SIZE          conexões mantidas abertas (padrão 5)
+    DB_MAX_OVERFLOW       conexões extras permitidas em picos (padrão 10)
+    DB_POOL_TIMEOUT       segundos esperando uma conexão livre antes de falhar (padrão 10)
+    DB_POOL_RECYCLE       recicla conexões mais velhas que isso, em segundos (padrão 1800)
+    DB_POOL_PRE_PING      testa a conexão antes de usar (padrão 1)
+    DB_POOL_LOG_WAIT_MS   loga um aviso quando a espera por conexão passa disso (padrão 200)
+
+Com eventlet.monkey_patch() as filas e locks do QueuePool viram primitivas de greenlet,
+então a espera por conexão suspende só o greenlet da requisição. O driver psycopg2 é
+bloqueante; o run.py aplica o psycogreen para que as consultas também cedam o hub.
+"""
+import os
+import time
+import logging
+import threading
+from sqlalchemy.pool import QueuePool
+
+metricas_pool = {
+    'checkouts': 0,
+    'timeouts': 0,
+    'espera_total_ms': 0.0,
+    'espera_max_ms': 0.0,
+}
+_lock_metricas = threading.Lock()
+_pool_ativo = None
+LIMITE_LOG_ESPERA_MS = float(os.environ.get('DB_POOL_LOG_WAIT_MS', 200))
+
+
+class QueuePoolComMetricas(QueuePool):
+    """QueuePool que mede quanto tempo cada checkout espera por uma conexão."""
+
+    def __init__(self, *args, **kwargs):
+        global _pool_ativo
+        super().__init__(*args, **kwargs)
+        _pool_ativo = self
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with _lock_metricas:
+                metricas_pool['timeouts'] += 1
+            raise
+        finally:
+            espera_ms = (time.perf_counter() - inicio) * 1000
+            with _lock_metricas:
+                metricas_pool['checkouts'] += 1
+                metricas_pool['espera_total_ms'] += espera_ms
+                metricas_pool['espera_max_ms'] = max(metricas_pool['espera_max_ms'], espera_ms)
+            if espera_ms > LIMITE_LOG_ESPERA_MS:
+                logging.warning(f"⏳ Checkout de conexão esperou {espera_ms:.0f} ms "
+                                f"(em uso: {self.checkedout()}, overflow: {max(self.overflow(), 0)}).")
+
+
+def _env_int(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+
+def _env_float(nome, padrao):
+    return float(os.environ.get(nome, padrao))
+
+
+def opcoes_engine(database_uri):
+    """Monta o SQLALCHEMY_ENGINE_OPTIONS para a URI informada."""
+    if database_uri.startswith('sqlite'):
+        # SQLite é um arquivo local: não há handshake a economizar, o padrão do SQLAlchemy basta.
+        return {}
+
+    return {
+        'poolclass': QueuePoolComMetricas,
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_float('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1').lower() in ('1', 'true', 'yes'),
+    }
+
+
+def status_pool():
+    """Retorna um retrato do pool e das métricas acumuladas de checkout."""
+    with _lock_metricas:
+        dados = dict(metricas_pool)
+    checkouts = dados['checkouts']
+    dados['espera_media_ms'] = round(dados['espera_total_ms'] / checkouts, 3) if checkouts else 0.0
+    dados['espera_total_ms'] = round(dados['espera_total_ms'], 3)
+    dados['espera_max_ms'] = round(dados['espera_max_ms'], 3)
+
+    if _pool_ativo is None:
+        dados['pool'] = None
+    else:
+        dados['pool'] = {
+            'tamanho': _pool_ativo.size(),
+            'em_uso': _pool_ativo.checkedout(),
+            'livres': _pool_ativo.checkedin(),
+            # O QueuePool conta o overflow a partir de -pool_size; negativo = conexões base ainda não abertas
+            'overflow': max(_pool_ativo.overflow(), 0),
+            'timeout': _pool_ativo.timeout(),
+        }
+    return dados
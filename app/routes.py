@@ -1,19 +1,71 @@
 from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify
-import google.generativeai as genai
-from datetime import datetime
-import os, logging
-from sqlalchemy import func, case
-from . import db, bcrypt
-from .models import Usuario, Chamado, HistoricoChamado
-from sqlalchemy.sql import func
-from sqlalchemy import text
+from datetime import datetime, timedelta
+import logging, json, base64
+from sqlalchemy import func, update
+from . import db
+from .models import (
+    Usuario, Chamado, HistoricoChamado, ChamadoArquivado, ChamadoAlteracao, ContadorChamados, FechamentoDiario
+)
+from .serializacao import (
+    COLUNAS_LISTAGEM, COLUNAS_DETALHE, COLUNAS_NOTIFICACAO, CAMPOS_DETALHE,
+    serializar_chamado, serializar_chamados, serializar_notificacao, serializar_historico
+)
+from .consultas import (
+    STATUS_NOTIFICAVEIS, consulta_listagem_chamados, filtrar_listagem, apos_cursor, ordenar_listagem, consulta_notificacoes_pendentes,
+    consulta_meus_chamados, consulta_meus_chamados_arquivados, consulta_historico
+)
+from .etapas import fechar_etapa, remover_etapas, media_por_etapa
+from .metricas import metricas_em_lote
+from .arquivo import QUENTE, ARQUIVO, modelos_do_chamado, colunas
+from .pool import status_pool
+from . import perfil_sql, exportacao, importacao
+from .senhas import gerar_hash, verificar_senha, precisa_rehash
+from .busca import buscar_chamados, termos_da_busca
+from .cache_http import calcular_etag, nao_modificado, resposta_304, com_etag
 # A rota do spotify é um componente separado, mantemos a importação caso esteja em uso.
 # from app.spotify_routes import spotify_bp 
 
 bp = Blueprint('routes_bp', __name__)
 api_bp = Blueprint('api_bp', __name__)
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-pro")
+
+# Paginação por cursor (keyset) da listagem de chamados
+LIMITE_PADRAO_PAGINA = 50
+LIMITE_MAXIMO_PAGINA = 200
+# Máximo de chamados por chamada em /api/chamados/metricas
+LIMITE_METRICAS_LOTE = 500
+# Máximo de ids aceitos por chamada em /api/notificacoes/marcar
+LIMITE_IDS_NOTIFICACAO = 1000
+# Acima disso é mais barato o cliente recarregar a lista do que aplicar o delta
+LIMITE_ALTERACOES = 500
+
+
+def is_admin():
+    return session.get('email') == 'adm@adm'
+
+
+def codificar_cursor(chamado):
+    """Gera um cursor opaco a partir da posição (criado_em, id) do último item da página."""
+    bruto = json.dumps([chamado.criado_em.isoformat() if chamado.criado_em else None, chamado.id])
+    return base64.urlsafe_b64encode(bruto.encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """Retorna (criado_em, id) a partir do cursor. Lança ValueError se for inválido."""
+    try:
+        criado_em, chamado_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(criado_em) if criado_em else None), int(chamado_id)
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+
+def ultima_versao():
+    """Versão mais recente do log de alterações dos chamados (0 se vazio)."""
+    return db.session.query(func.max(ChamadoAlteracao.id)).scalar() or 0
+
+
+def parse_data(valor):
+    """Converte 'YYYY-MM-DD' em datetime. Lança ValueError se for inválido."""
+    return datetime.strptime(valor, '%Y-%m-%d')
 
 
 @bp.route('/')
@@ -82,7 +134,12 @@ def login():
         senha = request.form['senha']
         usuario = Usuario.query.filter_by(email=email).first()
 
-        if usuario and bcrypt.check_password_hash(usuario.senha_hash, senha):
+        if usuario and verificar_senha(usuario.senha_hash, senha):
+            if precisa_rehash(usuario.senha_hash):
+                # Hash com custo antigo: aproveita a senha em claro para regravá-lo com o custo atual
+                usuario.senha_hash = gerar_hash(senha)
+                db.session.commit()
+
             session['usuario_id'] = usuario.id
             session['email'] = usuario.email
             session['funcionario_id'] = usuario.funcionario_id
@@ -104,7 +161,7 @@ def register():
         try:
             novo_usuario = Usuario(
                 email=request.form['email'],
-                senha_hash=bcrypt.generate_password_hash(request.form['senha']).decode('utf-8'),
+                senha_hash=gerar_hash(request.form['senha']),
                 funcionario_id=request.form['funcionario_id'],
                 security_question=request.form['security_question'],
                 security_answer=request.form['security_answer']
@@ -130,21 +187,137 @@ def logout():
 
 @bp.route('/api/chamados', methods=['GET'])
 def api_listar_chamados():
+    """
+    Lista os chamados em páginas ordenadas por (criado_em, id) decrescente.
+
+    Parâmetros opcionais: setor, status, de/ate (YYYY-MM-DD, inclusivos), busca,
+    limite (máx. LIMITE_MAXIMO_PAGINA) e cursor (o 'next_cursor' da página anterior).
+    O custo de cada chamada depende do tamanho da página, não do tamanho da tabela.
+    """
     if not is_admin():
         return jsonify({'error': 'Acesso não autorizado'}), 403
 
-    chamados = Chamado.query.filter_by(sistema_origem='novo').order_by(Chamado.criado_em.desc()).all()
-    
-    # ✅ CORREÇÃO: Garante que a data seja enviada no formato ISO 8601 completo
-    return jsonify([{
-        'id': c.id, 
-        'nome': c.nome, 
-        'setor': c.setor, 
-        'descricao': c.descricao,
-        'status': c.status,
-        'criado_em': c.criado_em.isoformat() if c.criado_em else None,
-        'concluido_em': c.concluido_em.isoformat() if c.concluido_em else None
-    } for c in chamados])
+    # Lida antes da consulta: uma alteração concorrente será reenviada no próximo delta, nunca perdida.
+    versao = ultima_versao()
+    # Qualquer mudança em chamados gera uma nova versão no log: se ela não mudou, a página também não
+    etag = calcular_etag(versao)
+    if nao_modificado(etag):
+        return resposta_304(etag)
+
+    try:
+        limite = min(max(int(request.args.get('limite', LIMITE_PADRAO_PAGINA)), 1), LIMITE_MAXIMO_PAGINA)
+        de = parse_data(request.args['de']) if request.args.get('de') else None
+        ate = parse_data(request.args['ate']) if request.args.get('ate') else None
+        cursor = decodificar_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = filtrar_listagem(
+        consulta_listagem_chamados(),
+        setor=request.args.get('setor'),
+        status=request.args.get('status'),
+        de=de,
+        ate=ate + timedelta(days=1) if ate else None,
+        busca=request.args.get('busca'),
+    )
+    if cursor:
+        query = apos_cursor(query, cursor)
+
+    # Só as colunas da listagem, como linhas Core: sem montar objetos Chamado (ver serializacao.py)
+    chamados = ordenar_listagem(query).with_entities(*COLUNAS_LISTAGEM).limit(limite + 1).all()
+    tem_mais = len(chamados) > limite
+    chamados = chamados[:limite]
+
+    return com_etag(jsonify({
+        'chamados': serializar_chamados(chamados),
+        'next_cursor': codificar_cursor(chamados[-1]) if tem_mais else None,
+        'versao': versao
+    }), etag)
+
+@bp.route('/api/chamados/search', methods=['GET'])
+def api_buscar_chamados():
+    """
+    Busca textual em nome, descrição e observação, ordenada por relevância (ver busca.py).
+
+    Parâmetros: q (obrigatório), setor e status (opcionais, como na listagem), limite
+    (máx. LIMITE_MAXIMO_PAGINA) e cursor (o 'next_cursor' da página anterior). Cada
+    resultado traz um 'trecho' com os termos encontrados entre <mark>; o restante do
+    texto já vem escapado. É o que a caixa de busca do dashboard usa.
+    """
+    if not is_admin():
+        return jsonify({'error': 'Acesso não autorizado'}), 403
+
+    busca = request.args.get('q', '')
+    if not termos_da_busca(busca):
+        return jsonify({'error': 'Informe ao menos uma palavra em "q".'}), 400
+
+    try:
+        limite = min(max(int(request.args.get('limite', LIMITE_PADRAO_PAGINA)), 1), LIMITE_MAXIMO_PAGINA)
+        # Resultados por relevância não têm uma chave estável para keyset; o cursor guarda o deslocamento
+        deslocamento = int(request.args['cursor']) if request.args.get('cursor') else 0
+        if deslocamento < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'Parâmetros "limite" ou "cursor" inválidos'}), 400
+
+    resultados, tem_mais = buscar_chamados(db.session, busca, limite, deslocamento,
+                                           request.args.get('setor'), request.args.get('status'))
+    return jsonify({
+        'resultados': resultados,
+        'next_cursor': str(deslocamento + limite) if tem_mais else None
+    })
+
+@bp.route('/api/chamados/alteracoes', methods=['GET'])
+def api_alteracoes_chamados():
+    """
+    Sincronização incremental: retorna só o que mudou desde a versão 'desde'.
+
+    Para cada chamado alterado vale apenas a última operação; exclusões e arquivamentos
+    (o chamado saiu da tabela quente, ver arquivo.py) voltam como tombstones em 'excluidos'.
+    Se houver alterações demais (ou o log já tiver sido limpo além de 'desde'), responde
+    com 'recarregar': true para o cliente refazer a lista.
+    """
+    if not is_admin():
+        return jsonify({'error': 'Acesso não autorizado'}), 403
+
+    try:
+        desde = int(request.args.get('desde', 0))
+    except ValueError:
+        return jsonify({'error': 'Parâmetro "desde" inválido'}), 400
+
+    versao = ultima_versao()
+    menor_versao = db.session.query(func.min(ChamadoAlteracao.id)).scalar()
+    if desde > versao or (menor_versao is not None and desde < menor_versao - 1):
+        return jsonify({'versao': versao, 'recarregar': True, 'alterados': [], 'excluidos': []})
+
+    ultimas = db.session.query(
+        ChamadoAlteracao.chamado_id,
+        func.max(ChamadoAlteracao.id).label('versao')
+    ).filter(
+        ChamadoAlteracao.id > desde,
+        ChamadoAlteracao.id <= versao
+    ).group_by(ChamadoAlteracao.chamado_id).subquery()
+
+    alteracoes = db.session.query(ChamadoAlteracao.chamado_id, ChamadoAlteracao.operacao).join(
+        ultimas, ChamadoAlteracao.id == ultimas.c.versao
+    ).limit(LIMITE_ALTERACOES + 1).all()
+
+    if len(alteracoes) > LIMITE_ALTERACOES:
+        return jsonify({'versao': versao, 'recarregar': True, 'alterados': [], 'excluidos': []})
+
+    excluidos = [chamado_id for chamado_id, operacao in alteracoes if operacao in ('delete', 'arquivo')]
+    ids_alterados = [chamado_id for chamado_id, operacao in alteracoes if operacao not in ('delete', 'arquivo')]
+    alterados = db.session.query(*COLUNAS_LISTAGEM).filter(
+        Chamado.id.in_(ids_alterados),
+        Chamado.sistema_origem == 'novo'
+    ).all() if ids_alterados else []
+
+    return jsonify({
+        'versao': versao,
+        'recarregar': False,
+        'alterados': serializar_chamados(alterados),
+        'excluidos': excluidos
+    })
 
 @bp.route('/api/chamados/<int:id>', methods=['GET', 'PUT', 'DELETE'])
 def chamado_detalhe(id):
@@ -154,18 +327,17 @@ def chamado_detalhe(id):
     if 'email' not in session or session.get('email') != 'adm@adm':
         return jsonify({'erro': 'Acesso não autorizado'}), 403
 
-    chamado = Chamado.query.get_or_404(id)
-
     if request.method == 'GET':
-        return jsonify({
-            'id': chamado.id, 'nome': chamado.nome, 'setor': chamado.setor,
-            'descricao': chamado.descricao, 'status': chamado.status, 'observacao': chamado.observacao,
-            'criado_em': chamado.criado_em.isoformat() if chamado.criado_em else None
-        })
+        linha = db.session.query(*COLUNAS_DETALHE).filter(Chamado.id == id).first()
+        if linha is None:
+            # Chamados arquivados continuam visíveis pelo id, só para leitura
+            linha = db.session.query(*colunas(ChamadoArquivado, CAMPOS_DETALHE)).filter(ChamadoArquivado.id == id).first_or_404()
+        return jsonify(serializar_chamado(linha, CAMPOS_DETALHE))
+
+    chamado = Chamado.query.get_or_404(id)
 
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         
-        chamado = Chamado.query.get_or_404(id)
         data = request.get_json()
         
         
@@ -174,16 +346,23 @@ def chamado_detalhe(id):
         
         if 'status' in data and data['status'] != status_anterior:
             novo_status = data['status']
+            agora = datetime.utcnow()
 
+            # Fecha a etapa anterior no livro de durações (ver etapas.py) antes de gravar a transição
+            fechar_etapa(chamado, status_anterior, agora)
             novo_historico = HistoricoChamado(
                 chamado_id=chamado.id,
                 valor_anterior=status_anterior,
                 valor_novo=novo_status,
-                observacao=data.get('observacao', 'Status alterado pelo painel.')
+                observacao=data.get('observacao', 'Status alterado pelo painel.'),
+                timestamp=agora
             )
             db.session.add(novo_historico)
 
             chamado.status = novo_status
+            # Um novo status notificável precisa chegar ao usuário, mesmo que ele já tenha visto o anterior
+            if novo_status in STATUS_NOTIFICAVEIS:
+                chamado.notificado = False
             if novo_status == "Em andamento" and not chamado.andamento_em:
                 chamado.andamento_em = datetime.utcnow()
             elif novo_status in ["Concluído", "Finalizado", "Resolvido"] and not chamado.concluido_em:
@@ -197,6 +376,7 @@ def chamado_detalhe(id):
         return jsonify({'mensagem': 'Chamado atualizado com sucesso'})
 
     elif request.method == 'DELETE':
+        remover_etapas(chamado.id)
         db.session.delete(chamado)
         db.session.commit()
         return jsonify({'mensagem': 'Chamado excluído'}), 204
@@ -211,17 +391,125 @@ def chamado_detalhe(id):
 def graficos():
     """
     API que retorna dados agregados para os gráficos do dashboard.
+    Lê da tabela de contadores (ver contadores.py), sem varrer 'chamados'.
     """
     if 'email' not in session or session.get('email') != 'adm@adm':
         return jsonify({'erro': 'Acesso não autorizado'}), 403
 
-    total_por_status = dict(db.session.query(Chamado.status, func.count(Chamado.id)).group_by(Chamado.status).all())
-    total_por_setor = dict(db.session.query(Chamado.setor, func.count(Chamado.id)).group_by(Chamado.setor).all())
+    # Os contadores só mudam junto com os chamados, então a versão do log serve de marcador
+    etag = calcular_etag(ultima_versao())
+    if nao_modificado(etag):
+        return resposta_304(etag)
 
-    return jsonify({
+    total_por_status = {}
+    total_por_setor = {}
+    for contador in ContadorChamados.query.filter(ContadorChamados.total > 0):
+        total_por_status[contador.status] = total_por_status.get(contador.status, 0) + contador.total
+        total_por_setor[contador.setor] = total_por_setor.get(contador.setor, 0) + contador.total
+
+    return com_etag(jsonify({
         'status_distribuicao': total_por_status,
         'setor_distribuicao': total_por_setor
-    })
+    }), etag)
+
+@bp.route("/api/kpis")
+def kpis():
+    """
+    KPIs do dashboard lidos dos contadores pré-calculados.
+    """
+    if 'email' not in session or session.get('email') != 'adm@adm':
+        return jsonify({'erro': 'Acesso não autorizado'}), 403
+
+    hoje = datetime.utcnow().date()
+    # 'finalizados_hoje' vira com o dia, mesmo sem alterações
+    etag = calcular_etag(ultima_versao(), hoje.isoformat())
+    if nao_modificado(etag):
+        return resposta_304(etag)
+
+    # Como em graficos(): uma linha negativa seria contador fora de sincronia, nunca um total
+    por_status = dict(db.session.query(ContadorChamados.status, func.sum(ContadorChamados.total)).filter(
+        ContadorChamados.status.in_(["Aberto", "Em andamento", "Pendente"]),
+        ContadorChamados.total > 0
+    ).group_by(ContadorChamados.status).all())
+    fechamento_hoje = db.session.get(FechamentoDiario, hoje)
+
+    return com_etag(jsonify({
+        'abertos': int(por_status.get('Aberto') or 0),
+        'em_andamento': int(por_status.get('Em andamento') or 0),
+        'pendentes': int(por_status.get('Pendente') or 0),
+        'finalizados_hoje': max(fechamento_hoje.total, 0) if fechamento_hoje else 0
+    }), etag)
+
+@bp.route("/api/pool")
+def pool_conexoes():
+    """
+    Métricas do pool de conexões: em uso, overflow e tempo de espera nos checkouts.
+    """
+    if not is_admin():
+        return jsonify({'erro': 'Acesso não autorizado'}), 403
+
+    return jsonify(status_pool())
+
+@bp.route("/api/perfil-sql")
+def perfil_sql_resumo():
+    """
+    Formas de SQL mais lentas das requisições perfiladas, com suspeitas de N+1.
+    ?explain=1 acrescenta o plano de execução de cada uma (ver perfil_sql.py).
+    """
+    if not is_admin():
+        return jsonify({'erro': 'Acesso não autorizado'}), 403
+
+    limite = min(request.args.get('limite', 20, type=int), 100)
+    com_explain = request.args.get('explain') == '1'
+    return jsonify(perfil_sql.relatorio(limite, com_explain))
+
+@bp.route("/api/chamados/exportar")
+def exportar_chamados():
+    """
+    Exporta chamados em CSV (padrão) ou NDJSON (?formato=ndjson), enviados enquanto são lidos.
+
+    Filtros opcionais: setor, status e de/ate (YYYY-MM-DD, inclusivos); historico=1 inclui
+    as transições de cada chamado e arquivados=1 inclui o arquivo (ver exportacao.py).
+    """
+    if not is_admin():
+        return jsonify({'erro': 'Acesso não autorizado'}), 403
+
+    formato = request.args.get('formato', 'csv')
+    if formato not in exportacao.FORMATOS:
+        return jsonify({'erro': f"Formato inválido: {formato} (use {', '.join(exportacao.FORMATOS)})."}), 400
+    try:
+        filtros = {
+            'setor': request.args.get('setor'),
+            'status': request.args.get('status'),
+            'de': parse_data(request.args['de']) if request.args.get('de') else None,
+            'ate': parse_data(request.args['ate']) + timedelta(days=1) if request.args.get('ate') else None,
+        }
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    return exportacao.resposta_exportacao(
+        formato, filtros,
+        com_historico=request.args.get('historico') == '1',
+        arquivados=request.args.get('arquivados') == '1',
+    )
+
+@bp.route("/api/chamados/importar", methods=['POST'])
+def importar_chamados():
+    """
+    Importa chamados do sistema antigo, com histórico, enviados como NDJSON no corpo (um
+    por linha; formato em importacao.py). ?origem= define o sistema_origem de quem não
+    trouxer um (padrão 'legado'). Responde com o relatório, erros por número de linha.
+    Para arquivos grandes, prefira 'flask importar-chamados'.
+    """
+    if not is_admin():
+        return jsonify({'erro': 'Acesso não autorizado'}), 403
+
+    origem = request.args.get('origem', importacao.ORIGEM_PADRAO)
+    limite_origem = Chamado.__table__.c.sistema_origem.type.length
+    if not origem or len(origem) > limite_origem:
+        return jsonify({'erro': f"Origem inválida (até {limite_origem} caracteres)."}), 400
+
+    return jsonify(importacao.importar(request.stream, origem))
 
 @bp.route("/api/notificacoes")
 def notificacoes():
@@ -233,25 +521,40 @@ def notificacoes():
 
     usuario_id = session["usuario_id"]
 
-    # ✅ CORREÇÃO: Agora busca por múltiplos status relevantes.
-    status_para_notificar = ["Finalizado", "Resolvido", "Concluído", "Pendente"]
+    # Marcar como vista é um UPDATE direto, fora do log de versões; contagem e maior id
+    # pendentes (lidos só do índice) cobrem esse caso
+    pendentes, maior_id = consulta_notificacoes_pendentes(usuario_id).with_entities(
+        func.count(Chamado.id), func.max(Chamado.id)
+    ).one()
+    etag = calcular_etag(ultima_versao(), usuario_id, pendentes, maior_id)
+    if nao_modificado(etag):
+        return resposta_304(etag)
 
-    chamados_nao_notificados = Chamado.query.filter(
-        Chamado.user_id == usuario_id,
-        Chamado.status.in_(status_para_notificar), # Usa .in_() para verificar a lista de status
-        Chamado.notificado == False
-    ).all()
+    chamados_nao_notificados = consulta_notificacoes_pendentes(usuario_id).with_entities(*COLUNAS_NOTIFICACAO).all()
 
     # Retorna uma lista mais completa para a notificação
-    return jsonify([
-        {
-            "id": ch.id, 
-            "nome": ch.nome, 
-            "setor": ch.setor,
-            "status": ch.status # Inclui o status para a mensagem ser mais clara
-        }
-        for ch in chamados_nao_notificados
-    ])
+    return com_etag(jsonify([serializar_notificacao(ch) for ch in chamados_nao_notificados]), etag)
+
+def marcar_notificacoes_vistas(usuario_id, ids=None, ate_id=None):
+    """
+    Marca as notificações do usuário como vistas num único UPDATE, com a posse verificada
+    no WHERE. Por ser um UPDATE direto (sem flush do ORM), não dispara os eventos de
+    'chamado_atualizado': o campo notificado não aparece no dashboard.
+    Retorna o número de linhas atualizadas.
+    """
+    stmt = update(Chamado).where(
+        Chamado.user_id == usuario_id,
+        Chamado.status.in_(STATUS_NOTIFICAVEIS),
+        Chamado.notificado.isnot(True)
+    ).values(notificado=True).execution_options(synchronize_session=False)
+    if ids is not None:
+        stmt = stmt.where(Chamado.id.in_(ids))
+    if ate_id is not None:
+        stmt = stmt.where(Chamado.id <= ate_id)
+
+    resultado = db.session.execute(stmt)
+    db.session.commit()
+    return resultado.rowcount
 
 @bp.route("/api/notificacoes/<int:id>/marcar", methods=["POST"])
 def marcar_notificacao(id):
@@ -259,14 +562,39 @@ def marcar_notificacao(id):
         return jsonify({"erro": "Não logado"}), 403
 
     usuario_id = session["usuario_id"]
-    chamado = Chamado.query.get(id)
-    if not chamado or chamado.user_id != usuario_id:
+    if not db.session.query(Chamado.query.filter_by(id=id, user_id=usuario_id).exists()).scalar():
         return jsonify({"erro": "Chamado não encontrado"}), 404
 
-    chamado.notificado = True
-    db.session.commit()
+    marcar_notificacoes_vistas(usuario_id, ids=[id])
     return jsonify({"mensagem": "Notificação marcada"}), 200
 
+@bp.route("/api/notificacoes/marcar", methods=["POST"])
+def marcar_notificacoes():
+    """
+    Marca várias notificações de uma vez.
+    Corpo JSON: {"ids": [1, 2, 3]} ou {"ate_id": 42} (todas as notificações do usuário até o id 42).
+    """
+    if "usuario_id" not in session:
+        return jsonify({"erro": "Não logado"}), 403
+
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    ate_id = data.get('ate_id')
+    if ids is None and ate_id is None:
+        return jsonify({"erro": "Informe 'ids' ou 'ate_id'."}), 400
+    try:
+        if ids is not None:
+            if not isinstance(ids, list) or len(ids) > LIMITE_IDS_NOTIFICACAO:
+                raise ValueError
+            ids = [int(i) for i in ids]
+        if ate_id is not None:
+            ate_id = int(ate_id)
+    except (TypeError, ValueError):
+        return jsonify({"erro": f"'ids' deve ser uma lista de até {LIMITE_IDS_NOTIFICACAO} inteiros e 'ate_id' um inteiro."}), 400
+
+    atualizadas = marcar_notificacoes_vistas(session["usuario_id"], ids=ids, ate_id=ate_id)
+    return jsonify({"mensagem": "Notificações marcadas", "atualizadas": atualizadas}), 200
+
 @bp.route('/meus-chamados')
 def meus_chamados():
     if 'usuario_id' not in session:
@@ -274,15 +602,13 @@ def meus_chamados():
         return redirect(url_for('routes_bp.login'))
 
     usuario_id = session['usuario_id']
-    status_visiveis = ["Aberto", "Em andamento", "Pendente", "Finalizado", "Resolvido", "Concluído"]
-    
-    chamados = Chamado.query.filter(
-        Chamado.user_id == usuario_id,
-        Chamado.status.in_(status_visiveis)
-    ).order_by(Chamado.criado_em.desc()).all()
+    chamados = consulta_meus_chamados(usuario_id).all()
+    arquivados = request.args.get('arquivados') == '1'
+    if arquivados:
+        # O arquivo só tem chamados finalizados há tempo: vêm depois, também do mais novo ao mais antigo
+        chamados += consulta_meus_chamados_arquivados(usuario_id).all()
 
-    
-    return render_template('meus_chamados.html', chamados=chamados)
+    return render_template('meus_chamados.html', chamados=chamados, arquivados=arquivados)
 
 @bp.route('/reset-password', methods=['GET', 'POST'])
 def reset_password():
@@ -303,7 +629,7 @@ def reset_password():
             return redirect(url_for('routes_bp.reset_password'))
 
         # Redefine a senha
-        usuario.senha_hash = bcrypt.generate_password_hash(nova_senha).decode('utf-8')
+        usuario.senha_hash = gerar_hash(nova_senha)
         db.session.commit()
         
         flash('Senha atualizada com sucesso!', 'success')
@@ -316,45 +642,31 @@ def historico_chamado(id):
     if 'email' not in session or session.get('email') != 'adm@adm':
         return jsonify({'erro': 'Acesso não autorizado'}), 403
 
-    historico = HistoricoChamado.query.filter_by(chamado_id=id).order_by(HistoricoChamado.timestamp.asc()).all()
-
-    return jsonify([
-        {
-            'id': h.id,
-            'de': h.valor_anterior,
-            'para': h.valor_novo,
-            'timestamp': h.timestamp.isoformat() + 'Z',
-            'observacao': h.observacao
-        } for h in historico
-    ])
-    
+    # Chamado arquivado: o histórico foi junto para o arquivo (ver arquivo.py)
+    modelo_historico = (modelos_do_chamado(id) or (None, HistoricoChamado))[1]
+
+    # O histórico só cresce (e some junto com o chamado): contagem + maior id identificam a versão
+    quantidade, maior_id = db.session.query(func.count(modelo_historico.id), func.max(modelo_historico.id)).filter(
+        modelo_historico.chamado_id == id
+    ).one()
+    etag = calcular_etag(quantidade, maior_id)
+    if nao_modificado(etag):
+        return resposta_304(etag)
+
+    historico = consulta_historico(id, modelo_historico).all()
+
+    return com_etag(jsonify([serializar_historico(h) for h in historico]), etag)
+
 @bp.route('/api/estatisticas/tempo-por-etapa')
 def tempo_por_etapa():
     if 'email' not in session or session.get('email') != 'adm@adm':
         return jsonify({'erro': 'Acesso não autorizado'}), 403
 
-    # Query para calcular a duração em cada etapa (SQLite & PostgreSQL compatível)
-    # Pega o timestamp de um registro e o subtrai do timestamp do registro SEGUINTE para o mesmo chamado.
-    subquery = db.session.query(
-        HistoricoChamado.id,
-        HistoricoChamado.valor_anterior.label('status'),
-        (func.lead(HistoricoChamado.timestamp).over(
-            partition_by=HistoricoChamado.chamado_id, 
-            order_by=HistoricoChamado.timestamp
-        ) - HistoricoChamado.timestamp).label('duracao')
-    ).subquery()
-
-    # Agrupa as durações por status e calcula a média em segundos
-    resultados = db.session.query(
-        subquery.c.status,
-        func.avg(func.strftime('%s', subquery.c.duracao)).label('media_segundos')
-    ).filter(subquery.c.duracao.isnot(None)).group_by(subquery.c.status).all()
-
+    # Médias mantidas a cada mudança de status (ver etapas.py): leitura em tempo constante
     # Formata para horas para ficar mais legível
     tempo_medio_por_etapa = {
-        status: round((media_segundos or 0) / 3600, 2) 
-        for status, media_segundos in resultados
-        if status # Ignora status nulos
+        status: round(media_segundos / 3600, 2)
+        for status, media_segundos in media_por_etapa().items()
     }
 
     return jsonify(tempo_medio_por_etapa)
@@ -365,30 +677,89 @@ def metricas_chamado(id):
     if 'email' not in session or session.get('email') != 'adm@adm':
         return jsonify({'erro': 'Acesso não autorizado'}), 403
 
-    chamado = Chamado.query.get_or_404(id)
-    
-    # 1. Cálculo do Tempo Total de Resolução (em minutos)
-    tempo_resolucao_minutos = 0
-    if chamado.criado_em and chamado.concluido_em:
-        delta = chamado.concluido_em - chamado.criado_em
-        tempo_resolucao_minutos = round(delta.total_seconds() / 60)
-
-    # 2. Cálculo do Tempo Total em Status "Pendente" (em minutos)
-    historico = HistoricoChamado.query.filter_by(chamado_id=id).order_by(HistoricoChamado.timestamp.asc()).all()
-    tempo_pendente_segundos = 0
-    for i, item in enumerate(historico):
-        if item.valor_novo == 'Pendente':
-            # Se não for o último item do histórico, calcula a duração até o próximo evento
-            if i + 1 < len(historico):
-                proximo_item = historico[i+1]
-                delta_pendente = proximo_item.timestamp - item.timestamp
-                tempo_pendente_segundos += delta_pendente.total_seconds()
-
-    tempo_pendente_minutos = round(tempo_pendente_segundos / 60)
+    modelos = modelos_do_chamado(id)
+    if modelos is None:
+        return jsonify({'erro': 'Chamado não encontrado'}), 404
+
+    return jsonify(metricas_em_lote([id], *modelos).get(id))
+
+def _filtro_metricas(modelo, *colunas_selecionadas):
+    """Filtros setor/status/de/ate de /api/chamados/metricas sobre 'chamados' ou o arquivo."""
+    filtro = db.session.query(*colunas_selecionadas)
+    if request.args.get('setor'):
+        filtro = filtro.filter(modelo.setor == request.args['setor'])
+    if request.args.get('status'):
+        filtro = filtro.filter(modelo.status == request.args['status'])
+    if request.args.get('de'):
+        filtro = filtro.filter(modelo.criado_em >= parse_data(request.args['de']))
+    if request.args.get('ate'):
+        filtro = filtro.filter(modelo.criado_em < parse_data(request.args['ate']) + timedelta(days=1))
+    return filtro.order_by(modelo.criado_em.desc())
+
+@bp.route('/api/chamados/metricas')
+def metricas_chamados_lote():
+    """
+    Métricas de SLA de vários chamados numa só consulta.
+
+    Aceita 'ids' (separados por vírgula) ou os filtros setor, status e de/ate (YYYY-MM-DD);
+    no máximo LIMITE_METRICAS_LOTE chamados, os mais recentes primeiro. Ids arquivados
+    são buscados no arquivo; com filtros, o arquivo só entra com arquivados=1.
+    """
+    if not is_admin():
+        return jsonify({'erro': 'Acesso não autorizado'}), 403
+
+    try:
+        if request.args.get('ids'):
+            ids = [int(i) for i in request.args['ids'].split(',') if i.strip()]
+            if len(ids) > LIMITE_METRICAS_LOTE:
+                raise ValueError(f"No máximo {LIMITE_METRICAS_LOTE} ids por chamada.")
+            metricas = metricas_em_lote(ids)
+            faltando = [i for i in ids if i not in metricas]
+            if faltando:
+                metricas.update(metricas_em_lote(faltando, *ARQUIVO))
+        elif request.args.get('arquivados') != '1':
+            ids = _filtro_metricas(Chamado, Chamado.id).limit(LIMITE_METRICAS_LOTE).scalar_subquery()
+            metricas = metricas_em_lote(ids)
+        else:
+            # Os mais recentes das duas tabelas juntas; as métricas saem de cada uma separadamente
+            selecionados = sorted(
+                [(criado_em or datetime.min, chamado_id, modelos)
+                 for modelos in (QUENTE, ARQUIVO)
+                 for criado_em, chamado_id in _filtro_metricas(modelos[0], modelos[0].criado_em, modelos[0].id)
+                 .limit(LIMITE_METRICAS_LOTE)],
+                key=lambda s: s[:2], reverse=True
+            )[:LIMITE_METRICAS_LOTE]
+            metricas = {}
+            for modelos in (QUENTE, ARQUIVO):
+                ids = [chamado_id for _, chamado_id, origem in selecionados if origem is modelos]
+                if ids:
+                    metricas.update(metricas_em_lote(ids, *modelos))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    return jsonify([{'id': chamado_id, **valores} for chamado_id, valores in metricas.items()])
+
+@bp.route('/api/chamados/<int:id>/completo')
+def chamado_completo(id):
+    """
+    Detalhe, histórico e métricas de um chamado numa só resposta (usado pelo modal do dashboard).
+    """
+    if not is_admin():
+        return jsonify({'erro': 'Acesso não autorizado'}), 403
+
+    modelos = modelos_do_chamado(id)
+    if modelos is None:
+        return jsonify({'erro': 'Chamado não encontrado'}), 404
+    modelo_chamado, modelo_historico = modelos
+
+    chamado = db.session.query(*colunas(modelo_chamado, CAMPOS_DETALHE)).filter(modelo_chamado.id == id).one()
+    historico = consulta_historico(id, modelo_historico).all()
 
     return jsonify({
-        'tempo_total_resolucao_minutos': tempo_resolucao_minutos,
-        'tempo_total_pendente_minutos': tempo_pendente_minutos
+        'chamado': serializar_chamado(chamado, CAMPOS_DETALHE),
+        'historico': [serializar_historico(h) for h in historico],
+        'metricas': metricas_em_lote([id], *modelos).get(id),
+        'arquivado': modelo_chamado is ChamadoArquivado,
     })
   
 @api_bp.route('/chatbot', methods=['POST'])
@@ -0,0 +1,56 @@
+# app/senhas.py
+"""
+Hash e verificação de senhas fora do hub do eventlet.
+
+bcrypt é CPU pura (dezenas de milissegundos por operação no custo 12). Rodando no
+greenlet da requisição, uma rajada de logins enfileiraria todo o resto do processo,
+inclusive o Socket.IO. Aqui o trabalho vai para as threads nativas do eventlet.tpool
+(a biblioteca bcrypt libera o GIL enquanto calcula), limitado por SENHAS_MAX_THREADS.
+Sem monkey_patch (CLI, scripts) a chamada é feita direto.
+
+O custo vem de BCRYPT_LOG_ROUNDS (padrão 12). Hashes gravados com custo menor são
+refeitos de forma transparente no próximo login bem-sucedido (ver precisa_rehash); os
+de custo maior ficam como estão.
+"""
+import os
+import re
+import sys
+import threading
+from flask import current_app
+from . import bcrypt
+
+MAX_THREADS = int(os.environ.get('SENHAS_MAX_THREADS', 4))
+# Sob monkey_patch vira um semáforo de greenlet: no máximo MAX_THREADS hashes simultâneos
+_vagas = threading.BoundedSemaphore(MAX_THREADS)
+_RE_CUSTO = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+def _em_thread_nativa(funcao, *args):
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher, tpool
+        if patcher.is_monkey_patched('thread'):
+            with _vagas:
+                return tpool.execute(funcao, *args)
+    return funcao(*args)
+
+
+def gerar_hash(senha):
+    """Retorna o hash bcrypt da senha (str), com o custo configurado."""
+    return _em_thread_nativa(bcrypt.generate_password_hash, senha).decode('utf-8')
+
+
+def verificar_senha(senha_hash, senha):
+    if not senha_hash or not senha:
+        return False
+    return _em_thread_nativa(bcrypt.check_password_hash, senha_hash, senha)
+
+
+def custo_do_hash(senha_hash):
+    correspondencia = _RE_CUSTO.match(senha_hash or '')
+    return int(correspondencia.group(1)) if correspondencia else None
+
+
+def precisa_rehash(senha_hash):
+    """O hash foi gerado com um custo menor que o configurado hoje? Nunca rebaixa o custo."""
+    custo = custo_do_hash(senha_hash)
+    return custo is not None and custo < current_app.config['BCRYPT_LOG_ROUNDS']
@@ -0,0 +1,122 @@
+# app/serializacao.py
+"""
+Serialização dos chamados para JSON, num só lugar: API REST e eventos do Socket.IO.
+
+- As listagens selecionam só as colunas de COLUNAS_LISTAGEM (linhas Core, sem montar
+  objetos Chamado nem passar pelo identity map); serializar_chamado aceita tanto essas
+  linhas quanto objetos do ORM (caso dos eventos de events.py).
+- Datas são gravadas em UTC sem fuso; saem sempre em ISO 8601 com sufixo 'Z', para o
+  navegador não interpretá-las como horário local.
+- O JSON é gerado com orjson quando instalado (JSONProviderRapido, registrado no
+  create_app para o jsonify, e modulo_json para o Socket.IO); sem ele, usa o json padrão.
+"""
+import json
+from flask.json.provider import DefaultJSONProvider
+from .models import Chamado
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+# Colunas da listagem do dashboard e dos eventos em tempo real
+COLUNAS_LISTAGEM = (
+    Chamado.id, Chamado.nome, Chamado.setor, Chamado.descricao, Chamado.status,
+    Chamado.criado_em, Chamado.concluido_em,
+)
+# Detalhe do chamado (modal do dashboard): listagem + observação
+COLUNAS_DETALHE = COLUNAS_LISTAGEM + (Chamado.observacao,)
+
+# Exportação (ver exportacao.py): todas as colunas úteis num relatório, sem imagem
+COLUNAS_EXPORTACAO = (
+    Chamado.id, Chamado.nome, Chamado.setor, Chamado.descricao, Chamado.status, Chamado.observacao,
+    Chamado.sistema_origem, Chamado.user_id, Chamado.funcionario_id, Chamado.anydesk,
+    Chamado.criado_em, Chamado.andamento_em, Chamado.concluido_em,
+)
+
+# Notificações ao usuário que abriu o chamado
+COLUNAS_NOTIFICACAO = (Chamado.id, Chamado.nome, Chamado.setor, Chamado.status)
+
+CAMPOS_LISTAGEM = tuple(c.key for c in COLUNAS_LISTAGEM)
+CAMPOS_DETALHE = tuple(c.key for c in COLUNAS_DETALHE)
+CAMPOS_EXPORTACAO = tuple(c.key for c in COLUNAS_EXPORTACAO)
+CAMPOS_DATA = {'criado_em', 'concluido_em', 'iniciado_em', 'andamento_em', 'timestamp'}
+
+
+def data_iso(valor):
+    """datetime em UTC (sem fuso) -> '2025-01-01T12:00:00Z'."""
+    return valor.isoformat() + 'Z' if valor else None
+
+
+def serializar_chamado(chamado, campos=CAMPOS_LISTAGEM):
+    """Monta o dict do chamado a partir de uma linha Core ou de um objeto Chamado."""
+    return {
+        campo: data_iso(getattr(chamado, campo)) if campo in CAMPOS_DATA else getattr(chamado, campo)
+        for campo in campos
+    }
+
+
+def serializar_chamados(linhas, campos=CAMPOS_LISTAGEM):
+    return [serializar_chamado(linha, campos) for linha in linhas]
+
+
+def serializar_notificacao(chamado):
+    return {
+        'id': chamado.id,
+        'nome': chamado.nome,
+        'setor': chamado.setor,
+        'status': chamado.status,
+    }
+
+
+def serializar_historico(h):
+    return {
+        'id': h.id,
+        'de': h.valor_anterior,
+        'para': h.valor_novo,
+        'timestamp': data_iso(h.timestamp),
+        'observacao': h.observacao,
+    }
+
+
+def _opcoes_orjson(sort_keys):
+    # datetime/date passam pelo default do Flask (formato HTTP), como no jsonify padrão
+    opcoes = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    return opcoes | orjson.OPT_SORT_KEYS if sort_keys else opcoes
+
+
+class JSONProviderRapido(DefaultJSONProvider):
+    """Provider do Flask que usa orjson no jsonify (mesma saída, menos CPU)."""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default,
+                                option=_opcoes_orjson(kwargs.get('sort_keys', self.sort_keys))).decode()
+        except TypeError:
+            # Tipos que o orjson recusa (ex.: int acima de 64 bits): cai no encoder padrão
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson is not None else super().loads(s, **kwargs)
+
+
+class _ModuloJSON:
+    """Interface de módulo json (dumps/loads) aceita pelo python-socketio."""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+            except TypeError:
+                pass
+        return json.dumps(obj, *args, **kwargs)
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s) if orjson is not None else json.loads(s, *args, **kwargs)
+
+
+modulo_json = _ModuloJSON()
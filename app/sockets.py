@@ -0,0 +1,27 @@
+# app/sockets.py
+from flask import session
+from flask_socketio import join_room, emit
+from . import socketio
+from .serializacao import COLUNAS_NOTIFICACAO, serializar_notificacao
+from .consultas import consulta_notificacoes_pendentes
+from .dispatcher import sala_usuario
+from .telemetria import registrar_emissao
+
+
+@socketio.on('connect')
+def on_connect():
+    """
+    Cada conexão autenticada entra na sala do seu usuário, por onde recebe as notificações
+    dos seus chamados. Na conexão é enviado, numa única consulta, o que ficou pendente
+    enquanto o usuário estava desconectado.
+    """
+    usuario_id = session.get('usuario_id')
+    if not usuario_id:
+        return
+
+    join_room(sala_usuario(usuario_id))
+
+    pendentes = consulta_notificacoes_pendentes(usuario_id).with_entities(*COLUNAS_NOTIFICACAO).all()
+    if pendentes:
+        emit('notificacoes', [serializar_notificacao(ch) for ch in pendentes])
+        registrar_emissao('notificacoes', alcance=1)
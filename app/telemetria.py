@@ -0,0 +1,111 @@
+# app/telemetria.py
+"""
+Métricas do sistema de chamados no formato texto do Prometheus, expostas em GET /metrics.
+
+A base (tipos, medição HTTP, /metrics, METRICAS_HABILITADAS e METRICAS_TOKEN) fica em
+chatbot_core/telemetria.py, compartilhada com o ia_server. Aqui entram:
+
+Por requisição HTTP, contadas pelos eventos de cursor do SQLAlchemy:
+    chamados_http_sql_consultas                histograma de consultas SQL por requisição
+    chamados_http_sql_duracao_segundos         histograma do tempo gasto em SQL por requisição
+    chamados_sql_lentas_total                  statements lentos nas requisições perfiladas (perfil_sql.py)
+    chamados_sql_n_mais_um_total               suspeitas de N+1 nas requisições perfiladas (perfil_sql.py)
+Socket.IO:
+    chamados_socketio_emissoes_total           emissões por evento
+    chamados_socketio_destinatarios            histograma do fan-out (conexões alcançadas) por evento
+    chamados_socketio_conexoes                 conexões abertas neste processo
+Além disso, coletores do pool de conexões e do executor do modelo de IA.
+"""
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from chatbot_core import telemetria as base
+from chatbot_core.telemetria import HABILITADAS, Contador, Histograma, METRICAS, registrar_coletor
+
+LIMITES_FANOUT = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+sql_lentas = Contador('chamados_sql_lentas_total', 'Statements acima de SQL_PERFIL_LENTA_MS (só requisições perfiladas).',
+                     ('rota',))
+sql_n_mais_um = Contador('chamados_sql_n_mais_um_total', 'Suspeitas de N+1 (só requisições perfiladas).', ('rota',))
+emissoes = Contador('chamados_socketio_emissoes_total', 'Eventos emitidos pelo Socket.IO.', ('evento',))
+destinatarios = Histograma('chamados_socketio_destinatarios', 'Conexões alcançadas por emissão do Socket.IO.',
+                           LIMITES_FANOUT, ('evento',))
+
+METRICAS.extend([sql_lentas, sql_n_mais_um, emissoes, destinatarios])
+
+
+# --- coletores lidos na hora da coleta ------------------------------------------
+
+def _coletor_pool():
+    from .pool import status_pool
+    dados = status_pool()
+    metricas = [
+        ('chamados_db_checkouts_total', 'counter', 'Conexões retiradas do pool.', [({}, dados['checkouts'])]),
+        ('chamados_db_checkout_timeouts_total', 'counter', 'Checkouts que estouraram o DB_POOL_TIMEOUT.',
+         [({}, dados['timeouts'])]),
+        ('chamados_db_checkout_espera_segundos_total', 'counter', 'Tempo total esperando conexão livre.',
+         [({}, dados['espera_total_ms'] / 1000)]),
+    ]
+    if dados['pool']:
+        metricas += [
+            ('chamados_db_conexoes_em_uso', 'gauge', 'Conexões do pool em uso.', [({}, dados['pool']['em_uso'])]),
+            ('chamados_db_conexoes_livres', 'gauge', 'Conexões abertas e livres no pool.',
+             [({}, dados['pool']['livres'])]),
+            ('chamados_db_conexoes_overflow', 'gauge', 'Conexões acima de DB_POOL_SIZE.',
+             [({}, dados['pool']['overflow'])]),
+        ]
+    return metricas
+
+
+def _coletor_socketio():
+    return [('chamados_socketio_conexoes', 'gauge', 'Conexões Socket.IO abertas neste processo.',
+             [({}, _conexoes_na_sala(None))])]
+
+
+# --- Socket.IO ------------------------------------------------------------------
+
+def _conexoes_na_sala(sala, namespace='/'):
+    from . import socketio
+    try:
+        return len(socketio.server.manager.rooms.get(namespace, {}).get(sala, ()))
+    except AttributeError:  # Socket.IO ainda não inicializado (CLI)
+        return 0
+
+
+def registrar_emissao(evento, sala=None, alcance=None):
+    """
+    Conta uma emissão e o fan-out: as conexões da sala (todas, se sala=None) ou
+    'alcance', quando quem emite já sabe (ex.: resposta à própria conexão).
+    """
+    if not HABILITADAS:
+        return
+    emissoes.incrementar((evento,))
+    destinatarios.observar((evento,), _conexoes_na_sala(sala) if alcance is None else alcance)
+
+
+# --- SQL ------------------------------------------------------------------------
+
+# O início fica no contexto de execução do statement, não numa pilha em conn.info: se o
+# statement lançar, after_cursor_execute não roda e o contexto some junto com ele
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._telemetria_inicio = time.perf_counter()
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, '_telemetria_inicio', None)
+    if inicio is None:
+        return
+    base.contar_consulta(time.perf_counter() - inicio)
+
+
+def init_telemetria(app):
+    """Medição HTTP e /metrics da base, mais SQL por requisição, pool e Socket.IO."""
+    if not HABILITADAS:
+        return
+    base.init_telemetria(app)
+    if not event.contains(Engine, 'before_cursor_execute', _antes_da_consulta):
+        event.listen(Engine, 'before_cursor_execute', _antes_da_consulta)
+        event.listen(Engine, 'after_cursor_execute', _depois_da_consulta)
+    registrar_coletor(_coletor_pool)
+    registrar_coletor(_coletor_socketio)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Gerador de dados sintéticos para benchmarks: usuários, chamados e histórico com
+transições de status realistas, num SQLite novo.
+
+Cada chamado percorre Aberto -> Em andamento -> (Pendente -> Em andamento)* -> Finalizado
+(ou Resolvido/Concluído), podendo parar no meio do caminho (chamados ainda abertos).
+O número de transições por chamado tem média --historicos / --chamados.
+Os intervalos entre transições seguem uma distribuição exponencial, então há chamados
+resolvidos em minutos e outros que ficam dias pendentes. A mesma --semente gera sempre
+os mesmos dados.
+
+A carga é feita por insert em lote (Core), sem os eventos do ORM; no final o log de
+alterações, os contadores do dashboard e o livro de etapas são reconstruídos, e o
+índice de busca é preenchido pelos próprios triggers.
+
+Uso:
+    python benchmarks/dados_sinteticos.py --banco /tmp/bench.db \\
+        [--usuarios 200] [--chamados 100000] [--historicos 1000000] [--dias 180] [--semente 42]
+
+Usuários criados: adm@adm (admin) e usuario<N>@bench, todos com a senha 'senha-bench'.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SENHA = 'senha-bench'
+SETORES = ['TI', 'RH', 'Financeiro', 'Produção', 'Comercial', 'Logística', 'Qualidade', 'Compras']
+STATUS_FINAIS = ['Finalizado', 'Resolvido', 'Concluído']
+PROBLEMAS = [
+    'Impressora não imprime', 'Sem acesso à internet', 'Computador lento', 'Erro ao abrir o ERP',
+    'Troca de toner', 'Senha expirada no e-mail', 'Monitor sem imagem', 'VPN não conecta',
+    'Teclado com teclas falhando', 'Instalação de software', 'Pasta de rede inacessível',
+]
+DETALHES = [
+    'desde ontem à tarde', 'após atualização do Windows', 'somente na sala de reuniões',
+    'intermitente durante o dia', 'mensagem de erro na tela', 'afeta o setor inteiro',
+]
+TAMANHO_LOTE = 5000
+
+
+def caminho_de_status(rng, transicoes):
+    """Sequência de status depois de 'Aberto', com 'transicoes' passos."""
+    caminho = []
+    atual = 'Aberto'
+    for i in range(transicoes):
+        ultimo = i == transicoes - 1
+        if atual == 'Aberto':
+            proximo = 'Em andamento'
+        elif atual == 'Pendente':
+            proximo = 'Em andamento'
+        elif ultimo and rng.random() < 0.85:
+            proximo = rng.choice(STATUS_FINAIS)
+        else:
+            proximo = 'Pendente'
+        caminho.append(proximo)
+        atual = proximo
+    return caminho
+
+
+def _inserir(conexao, tabela, linhas):
+    if linhas:
+        conexao.execute(tabela.insert(), linhas)
+        linhas.clear()
+
+
+def gerar(usuarios=200, chamados=100000, historicos=1000000, dias=180, semente=42, log=print):
+    """Preenche o banco da aplicação ativa. Deve rodar dentro de app.app_context() com o banco vazio."""
+    from app import db
+    from app.models import Usuario, Chamado, HistoricoChamado, ChamadoAlteracao
+    from app.senhas import gerar_hash
+    from app.contadores import reconstruir_contadores
+    from app.etapas import reconstruir_etapas
+
+    rng = random.Random(semente)
+    inicio = time.perf_counter()
+    db.create_all()
+
+    conexao = db.session.connection()
+    if conexao.dialect.name == 'sqlite':
+        # Só para a carga: o arquivo é descartável
+        conexao.exec_driver_sql('PRAGMA synchronous = OFF')
+
+    senha_hash = gerar_hash(SENHA)
+    conexao.execute(Usuario.__table__.insert(), [
+        {'id': 1, 'email': 'adm@adm', 'senha_hash': senha_hash, 'role': 'admin', 'funcionario_id': 1}
+    ] + [
+        {'id': i, 'email': f'usuario{i}@bench', 'senha_hash': senha_hash, 'role': 'user', 'funcionario_id': i,
+         'security_question': 'cor', 'security_answer': 'azul'}
+        for i in range(2, usuarios + 2)
+    ])
+
+    fim_periodo = datetime.utcnow().replace(microsecond=0)
+    inicio_periodo = fim_periodo - timedelta(days=dias)
+    media_transicoes = max(historicos / max(chamados, 1), 1)
+    # Minutos médios entre transições, para o chamado típico caber no período
+    intervalo_medio = max(dias * 24 * 60 / (media_transicoes * 20), 5)
+
+    lote_chamados, lote_historico = [], []
+    total_historico = 0
+    for chamado_id in range(1, chamados + 1):
+        criado_em = inicio_periodo + timedelta(seconds=rng.randrange(dias * 86400))
+        transicoes = rng.randint(0, int(2 * media_transicoes))
+        caminho = caminho_de_status(rng, transicoes)
+
+        momento = criado_em
+        status = 'Aberto'
+        andamento_em = concluido_em = None
+        for novo_status in caminho:
+            momento += timedelta(minutes=rng.expovariate(1 / intervalo_medio))
+            if momento > fim_periodo:
+                break
+            lote_historico.append({
+                'chamado_id': chamado_id, 'campo_alterado': 'status',
+                'valor_anterior': status, 'valor_novo': novo_status,
+                'observacao': 'Status alterado pelo painel.', 'timestamp': momento,
+            })
+            if novo_status == 'Em andamento' and not andamento_em:
+                andamento_em = momento
+            if novo_status in STATUS_FINAIS:
+                concluido_em = momento
+            status = novo_status
+
+        problema = rng.choice(PROBLEMAS)
+        lote_chamados.append({
+            'id': chamado_id,
+            'nome': f'Colaborador {rng.randrange(1, 5000)}',
+            'setor': rng.choice(SETORES),
+            'descricao': f'{problema} {rng.choice(DETALHES)}.',
+            'observacao': 'Verificado pelo suporte.' if status != 'Aberto' else None,
+            'status': status,
+            'sistema_origem': 'novo',
+            'user_id': rng.randint(2, usuarios + 1) if usuarios else 1,
+            'notificado': status not in STATUS_FINAIS + ['Pendente'] or rng.random() < 0.8,
+            'criado_em': criado_em,
+            'andamento_em': andamento_em,
+            'concluido_em': concluido_em,
+        })
+
+        if len(lote_chamados) >= TAMANHO_LOTE:
+            _inserir(conexao, Chamado.__table__, lote_chamados)
+        if len(lote_historico) >= TAMANHO_LOTE * 4:
+            total_historico += len(lote_historico)
+            _inserir(conexao, HistoricoChamado.__table__, lote_historico)
+
+    _inserir(conexao, Chamado.__table__, lote_chamados)
+    total_historico += len(lote_historico)
+    _inserir(conexao, HistoricoChamado.__table__, lote_historico)
+
+    # Uma entrada por chamado no log de versões, como se cada um tivesse sido criado pela API
+    conexao.execute(ChamadoAlteracao.__table__.insert().from_select(
+        ['chamado_id', 'operacao'],
+        db.select(Chamado.id, db.literal('insert')).order_by(Chamado.id)
+    ))
+    db.session.commit()
+    log(f"{chamados} chamados e {total_historico} históricos inseridos em {time.perf_counter() - inicio:.1f}s.")
+
+    reconstruir_contadores()
+    etapas = reconstruir_etapas()
+    log(f"Contadores e {etapas} etapas reconstruídos; total {time.perf_counter() - inicio:.1f}s.")
+    return {'usuarios': usuarios + 1, 'chamados': chamados, 'historicos': total_historico, 'etapas': etapas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banco', required=True, help='arquivo SQLite a criar')
+    parser.add_argument('--usuarios', type=int, default=200)
+    parser.add_argument('--chamados', type=int, default=100000)
+    parser.add_argument('--historicos', type=int, default=1000000)
+    parser.add_argument('--dias', type=int, default=180)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--sobrescrever', action='store_true')
+    args = parser.parse_args()
+
+    banco = os.path.abspath(args.banco)
+    if os.path.exists(banco):
+        if not args.sobrescrever:
+            sys.exit(f"{banco} já existe (use --sobrescrever).")
+        os.remove(banco)
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{banco}"
+    os.environ.setdefault('CHATBOT_HABILITADO', '0')
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        gerar(args.usuarios, args.chamados, args.historicos, args.dias, args.semente)
+
+
+if __name__ == '__main__':
+    main()
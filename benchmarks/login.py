@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Benchmark de login sob concorrência, no mesmo modelo de execução do run.py (eventlet).
+
+Dispara --logins POSTs em /login, --concorrencia por vez, e mede a vazão e o atraso do
+hub: um greenlet "sentinela" acorda a cada 10 ms e registra quanto passou do horário.
+Esse atraso é o que o Socket.IO e as outras requisições sentem durante a rajada.
+
+Modos:
+    tpool   hash/verificação em threads nativas (app/senhas.py, comportamento atual)
+    direto  bcrypt chamado no próprio greenlet (comportamento anterior, para comparação)
+
+Uso:
+    python benchmarks/login.py [--logins 40] [--concorrencia 10] [--custo 12] [--json resultado.json]
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def medir(app, modo, logins, concorrencia):
+    from app import senhas
+    original = senhas._em_thread_nativa
+    if modo == 'direto':
+        senhas._em_thread_nativa = lambda funcao, *args: funcao(*args)
+
+    atrasos = []
+    rodando = True
+
+    def sentinela():
+        while rodando:
+            esperado = time.perf_counter() + 0.01
+            eventlet.sleep(0.01)
+            atrasos.append(max(time.perf_counter() - esperado, 0) * 1000)
+
+    def logar(_):
+        cliente = app.test_client()
+        resposta = cliente.post('/login', data={'email': 'bench@bench', 'senha': 'senha-bench'})
+        return resposta.status_code == 302
+
+    try:
+        vigia = eventlet.spawn(sentinela)
+        pool = eventlet.GreenPool(concorrencia)
+        inicio = time.perf_counter()
+        sucessos = sum(pool.imap(logar, range(logins)))
+        duracao = time.perf_counter() - inicio
+        rodando = False
+        vigia.wait()
+    finally:
+        senhas._em_thread_nativa = original
+
+    atrasos.sort()
+    return {
+        'logins': logins,
+        'sucessos': sucessos,
+        'duracao_s': round(duracao, 3),
+        'logins_por_s': round(logins / duracao, 1),
+        'atraso_hub_p50_ms': round(statistics.median(atrasos), 1) if atrasos else None,
+        'atraso_hub_max_ms': round(atrasos[-1], 1) if atrasos else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--concorrencia', type=int, default=10)
+    parser.add_argument('--custo', type=int, default=12, help='BCRYPT_LOG_ROUNDS')
+    parser.add_argument('--json', help='grava os resultados neste arquivo')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(pasta, 'bench.db')}"
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.custo)
+    os.environ.setdefault('CHATBOT_HABILITADO', '0')
+
+    from app import create_app, db
+    from app.models import Usuario
+    from app.senhas import gerar_hash
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Usuario(email='bench@bench', senha_hash=gerar_hash('senha-bench'),
+                               funcionario_id=1, security_question='-', security_answer='-'))
+        db.session.commit()
+
+    resultados = {modo: medir(app, modo, args.logins, args.concorrencia) for modo in ('direto', 'tpool')}
+    resultados['parametros'] = {'custo': args.custo, 'concorrencia': args.concorrencia}
+
+    print(f"{'modo':<8} {'logins/s':>9} {'duração (s)':>12} {'atraso hub p50 (ms)':>20} {'máx (ms)':>9}")
+    for modo in ('direto', 'tpool'):
+        r = resultados[modo]
+        print(f"{modo:<8} {r['logins_por_s']:>9.1f} {r['duracao_s']:>12.3f} "
+              f"{r['atraso_hub_p50_ms']:>20.1f} {r['atraso_hub_max_ms']:>9.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
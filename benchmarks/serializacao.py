@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark da serialização de chamados: caminho antigo x camada de serializacao.py.
+
+    antigo  Chamado.query.all() (objetos ORM completos, com os campos Text) + dict montado
+            à mão + json padrão
+    novo    só COLUNAS_LISTAGEM como linhas Core + serializar_chamados + provider orjson
+
+Cada caminho roda --repeticoes vezes sobre as mesmas --linhas linhas (SQLite temporário),
+e o tempo de consulta e o de codificação JSON são medidos separadamente.
+
+Uso:
+    python benchmarks/serializacao.py [--linhas 50000] [--repeticoes 5] [--json resultado.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def caminho_antigo(app):
+    from app import db
+    from app.models import Chamado
+    inicio = time.perf_counter()
+    chamados = Chamado.query.filter(Chamado.sistema_origem == 'novo').all()
+    dados = [{
+        'id': c.id, 'nome': c.nome, 'setor': c.setor, 'descricao': c.descricao, 'status': c.status,
+        'criado_em': c.criado_em.isoformat() if c.criado_em else None,
+        'concluido_em': c.concluido_em.isoformat() if c.concluido_em else None,
+    } for c in chamados]
+    meio = time.perf_counter()
+    corpo = json.dumps({'chamados': dados}, sort_keys=True)
+    fim = time.perf_counter()
+    db.session.remove()
+    return meio - inicio, fim - meio, len(corpo)
+
+
+def caminho_novo(app):
+    from app import db
+    from app.models import Chamado
+    from app.serializacao import COLUNAS_LISTAGEM, serializar_chamados
+    inicio = time.perf_counter()
+    linhas = db.session.query(*COLUNAS_LISTAGEM).filter(Chamado.sistema_origem == 'novo').all()
+    dados = serializar_chamados(linhas)
+    meio = time.perf_counter()
+    corpo = app.json.dumps({'chamados': dados})
+    fim = time.perf_counter()
+    db.session.remove()
+    return meio - inicio, fim - meio, len(corpo)
+
+
+def popular(linhas):
+    from app import db
+    from app.models import Usuario, Chamado
+    usuario = Usuario(email='bench@bench', senha_hash='-')
+    db.session.add(usuario)
+    db.session.commit()
+    base = datetime(2024, 1, 1)
+    setores = ['TI', 'RH', 'Financeiro', 'Produção', 'Comercial']
+    status = ['Aberto', 'Em andamento', 'Pendente', 'Finalizado']
+    # Insert em lote pelo Core: o benchmark mede a leitura, não os eventos de escrita
+    db.session.execute(Chamado.__table__.insert(), [{
+        'nome': f'Usuário {i}', 'setor': setores[i % 5], 'status': status[i % 4],
+        'descricao': 'Descrição do problema relatado pelo usuário ' * 4,
+        'observacao': 'Observação interna do atendimento ' * 8,
+        'imagem_url': f'/static/uploads/{i}.png', 'anydesk': '123 456 789',
+        'sistema_origem': 'novo', 'user_id': usuario.id,
+        'criado_em': base + timedelta(minutes=i),
+        'concluido_em': base + timedelta(minutes=i + 90) if i % 4 == 3 else None,
+    } for i in range(linhas)])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=50000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--json', help='grava os resultados neste arquivo')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(pasta, 'bench.db')}"
+    os.environ.setdefault('CHATBOT_HABILITADO', '0')
+
+    from app import create_app, db
+    app = create_app()
+    resultados = {'parametros': {'linhas': args.linhas, 'repeticoes': args.repeticoes}}
+    with app.app_context():
+        db.create_all()
+        popular(args.linhas)
+        for nome, caminho in (('antigo', caminho_antigo), ('novo', caminho_novo)):
+            caminho(app)  # aquecimento
+            amostras = [caminho(app) for _ in range(args.repeticoes)]
+            consulta = statistics.median(a[0] for a in amostras)
+            codificacao = statistics.median(a[1] for a in amostras)
+            resultados[nome] = {
+                'consulta_ms': round(consulta * 1000, 1),
+                'json_ms': round(codificacao * 1000, 1),
+                'total_ms': round((consulta + codificacao) * 1000, 1),
+                'bytes': amostras[0][2],
+            }
+
+    print(f"{'caminho':<8} {'consulta (ms)':>14} {'JSON (ms)':>10} {'total (ms)':>11} {'bytes':>10}")
+    for nome in ('antigo', 'novo'):
+        r = resultados[nome]
+        print(f"{nome:<8} {r['consulta_ms']:>14.1f} {r['json_ms']:>10.1f} {r['total_ms']:>11.1f} {r['bytes']:>10}")
+    print(f"ganho: {resultados['antigo']['total_ms'] / resultados['novo']['total_ms']:.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Benchmark de inicialização: tempo de import + create_app() e memória (RSS máximo)
+de um processo novo, com e sem o chatbot, e do serviço separado de IA (ia_server.py).
+
+Cenários (cada um roda em um subprocesso limpo, --repeticoes vezes):
+    sem_chatbot          CHATBOT_HABILITADO=0
+    chatbot_preguicoso   chatbot habilitado; o SDK só é carregado no primeiro uso
+    chatbot_carregado    chatbot habilitado e modelo criado logo após o create_app()
+                         (custo que antes era pago por todo processo, inclusive CLI)
+    ia_server            import do ia_server.py; termina com status 1 se ele carregar o
+                         pacote 'app', SQLAlchemy ou Socket.IO (ver chatbot_core/__init__.py)
+
+Uso:
+    python benchmarks/startup.py [--repeticoes 5] [--json resultado.json]
+
+O banco é um SQLite temporário; nenhuma chamada de rede é feita (criar o modelo não
+contata a API, só configura o cliente).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado dentro do subprocesso; imprime uma linha JSON com as medidas
+SCRIPT_FILHO = r"""
+import json, resource, sys, time
+inicio = time.perf_counter()
+if sys.argv[1] == 'ia_server':
+    import ia_server
+else:
+    from app import create_app
+    app = create_app()
+criar_app_s = time.perf_counter() - inicio
+carregar_modelo_s = None
+if sys.argv[1] == 'carregar':
+    from app.chatbot import provedor
+    t = time.perf_counter()
+    provedor.obter()
+    carregar_modelo_s = time.perf_counter() - t
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    'create_app_s': criar_app_s,
+    'carregar_modelo_s': carregar_modelo_s,
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    'rss_max_mb': rss / 1024 / (1024 if sys.platform == 'darwin' else 1),
+    'sdk_importado': 'google.generativeai' in sys.modules,
+    'modulos_proibidos': sorted(m for m in ('app', 'sqlalchemy', 'flask_sqlalchemy', 'flask_socketio', 'bcrypt')
+                                if m in sys.modules),
+}))
+"""
+
+CENARIOS = {
+    'sem_chatbot': ({'CHATBOT_HABILITADO': '0'}, 'nao'),
+    'chatbot_preguicoso': ({'CHATBOT_HABILITADO': '1'}, 'nao'),
+    'chatbot_carregado': ({'CHATBOT_HABILITADO': '1'}, 'carregar'),
+    'ia_server': ({}, 'ia_server'),
+}
+
+
+def medir(extra_env, modo, banco):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{banco}", PYTHONDONTWRITEBYTECODE='1', **extra_env)
+    # Sem chave a criação do modelo é pulada; uma chave fictícia basta para medir o custo
+    env.setdefault('key', 'chave-de-benchmark')
+    saida = subprocess.run([sys.executable, '-c', SCRIPT_FILHO, modo], cwd=RAIZ, env=env,
+                           capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--json', help='grava os resultados neste arquivo')
+    args = parser.parse_args()
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        banco = os.path.join(pasta, 'bench.db')
+        for nome, (extra_env, modo) in CENARIOS.items():
+            amostras = [medir(extra_env, modo, banco) for _ in range(args.repeticoes)]
+            carga = [a['carregar_modelo_s'] for a in amostras if a['carregar_modelo_s'] is not None]
+            resultados[nome] = {
+                'create_app_ms_mediana': round(statistics.median(a['create_app_s'] for a in amostras) * 1000, 1),
+                'carregar_modelo_ms_mediana': round(statistics.median(carga) * 1000, 1) if carga else None,
+                'rss_max_mb_mediana': round(statistics.median(a['rss_max_mb'] for a in amostras), 1),
+                'sdk_importado': amostras[0]['sdk_importado'],
+                'modulos_proibidos': amostras[0]['modulos_proibidos'],
+                'repeticoes': args.repeticoes,
+            }
+
+    print(f"{'cenário':<20} {'create_app (ms)':>16} {'modelo (ms)':>12} {'RSS (MB)':>10} {'SDK':>5}")
+    for nome, r in resultados.items():
+        modelo = '-' if r['carregar_modelo_ms_mediana'] is None else f"{r['carregar_modelo_ms_mediana']:.1f}"
+        print(f"{nome:<20} {r['create_app_ms_mediana']:>16.1f} {modelo:>12} "
+              f"{r['rss_max_mb_mediana']:>10.1f} {'sim' if r['sdk_importado'] else 'não':>5}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+    # O ia_server não usa o banco nem o Socket.IO do sistema de chamados
+    proibidos = resultados['ia_server']['modulos_proibidos']
+    if proibidos:
+        print(f"ERRO: importar ia_server carregou {', '.join(proibidos)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
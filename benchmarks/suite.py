@@ -0,0 +1,442 @@
+#!/usr/bin/env python
+"""
+Suíte de benchmarks da aplicação, sobre dados sintéticos (ver dados_sinteticos.py).
+
+Mede, no mesmo modelo de execução do run.py (eventlet):
+    - latência (p50/p95/p99) e vazão de cada endpoint do routes_bp, com --concorrencia
+      requisições simultâneas; as leituras rodam antes das escritas;
+    - fan-out do Socket.IO: tempo entre o commit de uma alteração e a chegada do evento
+      em --dashboards clientes conectados;
+    - rotas do chatbot (resposta completa e streaming) contra um modelo falso local,
+      que bloqueia --latencia-modelo-ms como o SDK real.
+
+O resultado sai em JSON (--saida), com metadados do commit e dos parâmetros; com
+--comparar, imprime a variação de cada medida em relação a uma execução anterior.
+
+Uso:
+    python benchmarks/dados_sinteticos.py --banco /tmp/bench.db
+    python benchmarks/suite.py --banco /tmp/bench.db --saida resultados.json [--comparar anterior.json]
+
+Sem --banco, gera um banco temporário menor (--chamados / --historicos).
+O banco é alterado pelos cenários de escrita; gere um novo para comparar execuções.
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from eventlet import patcher
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ADMIN = (1, 'adm@adm')
+_sleep_bloqueante = patcher.original('time').sleep
+
+
+# --- medição -----------------------------------------------------------------
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(int(round(p / 100 * (len(ordenados) - 1))), len(ordenados) - 1)
+    return ordenados[indice]
+
+
+def resumir(latencias, duracao, statuses):
+    return {
+        'requisicoes': len(latencias),
+        'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+        'media_ms': round(statistics.mean(latencias) * 1000, 2),
+        'req_por_s': round(len(latencias) / duracao, 1) if duracao else None,
+        'status': {str(s): statuses.count(s) for s in sorted(set(statuses))},
+    }
+
+
+def cliente(app, usuario=None):
+    c = app.test_client()
+    if usuario:
+        with c.session_transaction() as s:
+            s['usuario_id'], s['email'] = usuario
+    return c
+
+
+def rodar_cenario(app, cenario, requisicoes, concorrencia):
+    """Executa o cenário 'requisicoes' vezes; só a requisição em si entra no tempo."""
+    n = min(requisicoes, cenario.get('max', requisicoes))
+
+    def uma(i):
+        metodo, url, opcoes = cenario['requisicao'](i)
+        c = cliente(app, cenario.get('usuario'))
+        inicio = time.perf_counter()
+        resposta = c.open(url, method=metodo, **opcoes)
+        # Respostas em streaming só terminam de ser geradas quando o corpo é lido
+        resposta.get_data()
+        resposta.close()
+        return time.perf_counter() - inicio, resposta.status_code
+
+    for i in range(2):  # aquecimento
+        uma(n + i)
+    pool = eventlet.GreenPool(concorrencia)
+    inicio = time.perf_counter()
+    resultados = list(pool.imap(uma, range(n)))
+    duracao = time.perf_counter() - inicio
+    return resumir([r[0] for r in resultados], duracao, [r[1] for r in resultados])
+
+
+# --- cenários ----------------------------------------------------------------
+
+def ndjson_importacao(i, user_id, chamados=100):
+    """Corpo de /api/chamados/importar: chamados finalizados com três transições cada."""
+    linhas = []
+    for k in range(chamados):
+        linhas.append(json.dumps({
+            'nome': f'Legado {i}-{k}', 'setor': 'TI', 'descricao': 'Chamado do sistema antigo',
+            'user_id': user_id, 'criado_em': '2023-05-02T08:00:00', 'concluido_em': '2023-05-03T17:30:00',
+            'historico': [
+                {'valor_anterior': 'Aberto', 'valor_novo': 'Em andamento', 'timestamp': '2023-05-02T09:15:00'},
+                {'valor_anterior': 'Em andamento', 'valor_novo': 'Pendente', 'timestamp': '2023-05-02T14:00:00'},
+                {'valor_anterior': 'Pendente', 'valor_novo': 'Finalizado', 'timestamp': '2023-05-03T17:30:00'},
+            ],
+        }))
+    return '\n'.join(linhas) + '\n'
+
+
+def montar_cenarios(app, info):
+    """Um cenário por endpoint/método do routes_bp (leituras primeiro, depois escritas)."""
+    total = info['chamados']
+    usuario = info['usuario_exemplo']
+    versao = info['versao']
+
+    def id_de(i):
+        return 1 + (i * 7919) % total
+
+    def do_usuario(i):
+        return info['ids_do_usuario'][i % len(info['ids_do_usuario'])]
+
+    leituras = {
+        'GET /': dict(usuario=ADMIN, requisicao=lambda i: ('GET', '/', {})),
+        'GET /dashboard': dict(usuario=ADMIN, requisicao=lambda i: ('GET', '/dashboard', {})),
+        'GET /novo-chamado': dict(usuario=usuario, requisicao=lambda i: ('GET', '/novo-chamado', {})),
+        'GET /login': dict(requisicao=lambda i: ('GET', '/login', {})),
+        'GET /register': dict(requisicao=lambda i: ('GET', '/register', {})),
+        'GET /reset-password': dict(requisicao=lambda i: ('GET', '/reset-password', {})),
+        'GET /logout': dict(usuario=usuario, requisicao=lambda i: ('GET', '/logout', {})),
+        'GET /api/chamados': dict(usuario=ADMIN, requisicao=lambda i: ('GET', '/api/chamados', {})),
+        'GET /api/chamados (filtros)': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', '/api/chamados?setor=TI&status=Pendente&busca=impress', {})),
+        'GET /api/chamados (304)': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', '/api/chamados', {'headers': {'If-None-Match': info['etag_listagem']}})),
+        'GET /api/chamados/search': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', '/api/chamados/search?q=impressora', {})),
+        'GET /api/chamados/alteracoes': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', f'/api/chamados/alteracoes?desde={max(versao - 100, 0)}', {})),
+        'GET /api/chamados/<id>': dict(usuario=ADMIN, requisicao=lambda i: ('GET', f'/api/chamados/{id_de(i)}', {})),
+        'GET /api/graficos': dict(usuario=ADMIN, requisicao=lambda i: ('GET', '/api/graficos', {})),
+        'GET /api/kpis': dict(usuario=ADMIN, requisicao=lambda i: ('GET', '/api/kpis', {})),
+        'GET /api/pool': dict(usuario=ADMIN, requisicao=lambda i: ('GET', '/api/pool', {})),
+        'GET /api/notificacoes': dict(usuario=usuario, requisicao=lambda i: ('GET', '/api/notificacoes', {})),
+        'GET /meus-chamados': dict(usuario=usuario, requisicao=lambda i: ('GET', '/meus-chamados', {})),
+        'GET /api/chamados/<id>/historico': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', f'/api/chamados/{id_de(i)}/historico', {})),
+        'GET /api/estatisticas/tempo-por-etapa': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', '/api/estatisticas/tempo-por-etapa', {})),
+        'GET /api/chamados/<id>/metricas': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', f'/api/chamados/{id_de(i)}/metricas', {})),
+        'GET /api/chamados/metricas': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', '/api/chamados/metricas?setor=TI', {})),
+        'GET /api/chamados/<id>/completo': dict(usuario=ADMIN, requisicao=lambda i: (
+            'GET', f'/api/chamados/{id_de(i)}/completo', {})),
+        # Lê a tabela toda: poucas requisições bastam
+        'GET /api/chamados/exportar': dict(usuario=ADMIN, max=5, requisicao=lambda i: (
+            'GET', '/api/chamados/exportar?formato=csv', {})),
+        'GET /api/chamados/exportar (ndjson+historico)': dict(usuario=ADMIN, max=5, requisicao=lambda i: (
+            'GET', '/api/chamados/exportar?formato=ndjson&historico=1', {})),
+    }
+
+    # O hash de senha domina login/cadastro/redefinição: poucas requisições bastam
+    escritas = {
+        'POST /login': dict(max=20, requisicao=lambda i: ('POST', '/login', {
+            'data': {'email': usuario[1], 'senha': info['senha']}})),
+        'POST /register': dict(max=20, requisicao=lambda i: ('POST', '/register', {'data': {
+            'email': f'novo{i}-{time.time_ns()}@bench', 'senha': 'x', 'funcionario_id': 10 ** 6 + i + time.time_ns() % 10 ** 6,
+            'security_question': 'cor', 'security_answer': 'azul'}})),
+        'POST /reset-password': dict(max=20, requisicao=lambda i: ('POST', '/reset-password', {'data': {
+            'email': usuario[1], 'security_question': 'cor', 'security_answer': 'azul', 'nova_senha': info['senha']}})),
+        'POST /novo-chamado': dict(usuario=usuario, requisicao=lambda i: ('POST', '/novo-chamado', {'data': {
+            'nome': f'Bench {i}', 'setor': 'TI', 'descricao': 'Chamado criado pelo benchmark'}})),
+        'PUT /api/chamados/<id>': dict(usuario=ADMIN, requisicao=lambda i: ('PUT', f'/api/chamados/{id_de(i)}', {
+            'json': {'status': ['Em andamento', 'Pendente', 'Finalizado'][i % 3], 'observacao': 'bench'}})),
+        'POST /api/notificacoes/<id>/marcar': dict(usuario=usuario, requisicao=lambda i: (
+            'POST', f'/api/notificacoes/{do_usuario(i)}/marcar', {})),
+        'POST /api/notificacoes/marcar': dict(usuario=usuario, requisicao=lambda i: (
+            'POST', '/api/notificacoes/marcar', {'json': {'ids': [do_usuario(i + k) for k in range(20)]}})),
+        'POST /api/chamados/importar': dict(usuario=ADMIN, max=20, requisicao=lambda i: (
+            'POST', '/api/chamados/importar', {'data': ndjson_importacao(i, usuario[0]),
+                                               'content_type': 'application/x-ndjson'})),
+        # Por último: cada requisição exclui um chamado diferente, do fim da tabela
+        'DELETE /api/chamados/<id>': dict(usuario=ADMIN, requisicao=lambda i: (
+            'DELETE', f'/api/chamados/{total - i}', {})),
+    }
+    return leituras, escritas
+
+
+def endpoints_sem_cenario(app, cenarios):
+    """Endpoints/métodos do routes_bp que nenhum cenário cobre (para a suíte não ficar para trás)."""
+    cobertos = {nome.split(' (')[0] for nome in cenarios}
+    faltando = []
+    for regra in app.url_map.iter_rules():
+        if not regra.endpoint.startswith('routes_bp.'):
+            continue
+        caminho = regra.rule.replace('<int:id>', '<id>')
+        for metodo in sorted(regra.methods - {'HEAD', 'OPTIONS'}):
+            if f'{metodo} {caminho}' not in cobertos:
+                faltando.append(f'{metodo} {caminho}')
+    return faltando
+
+
+# --- Socket.IO ---------------------------------------------------------------
+
+def medir_fanout(app, dashboards, repeticoes, chamado_id):
+    from app import db, socketio
+    from app import dispatcher
+    from app.models import Chamado
+
+    # Sem janela de agrupamento: o evento sai no próprio commit e o tempo medido é o do envio
+    janela_original = dispatcher.despachante.janela
+    dispatcher.despachante.janela = 0
+    # Deixa sair o que os cenários de escrita ainda tinham na janela anterior
+    eventlet.sleep(janela_original * 2)
+    dispatcher.despachante.descarregar()
+    clientes = [socketio.test_client(app, flask_test_client=cliente(app, ADMIN)) for _ in range(dashboards)]
+    tempos = []
+    try:
+        with app.app_context():
+            for i in range(repeticoes):
+                for c in clientes:
+                    c.get_received()
+                chamado = db.session.get(Chamado, chamado_id)
+                chamado.observacao = f'fan-out {i}'
+                inicio = time.perf_counter()
+                db.session.commit()
+                recebidos = sum(
+                    any(p['name'] in ('chamado_atualizado', 'chamados_lote') for p in c.get_received())
+                    for c in clientes
+                )
+                tempos.append(time.perf_counter() - inicio)
+                if recebidos != dashboards:
+                    raise RuntimeError(f"Só {recebidos} de {dashboards} dashboards receberam o evento.")
+    finally:
+        for c in clientes:
+            c.disconnect()
+        dispatcher.despachante.janela = janela_original
+
+    return {
+        'dashboards': dashboards,
+        'repeticoes': repeticoes,
+        'commit_ate_todos_ms_p50': round(percentil(tempos, 50) * 1000, 2),
+        'commit_ate_todos_ms_p95': round(percentil(tempos, 95) * 1000, 2),
+        'por_dashboard_us': round(statistics.median(tempos) / dashboards * 1e6, 1),
+    }
+
+
+# --- chatbot -----------------------------------------------------------------
+
+class _Pedaco:
+    def __init__(self, texto):
+        self.text = texto
+
+
+class ModeloFalso:
+    """Imita o GenerativeModel: bloqueia a thread como a chamada de rede do SDK."""
+
+    def __init__(self, latencia_s, pedacos=8):
+        self.latencia_s = latencia_s
+        self.pedacos = pedacos
+
+    def start_chat(self, history=None):
+        return self
+
+    def send_message(self, mensagem, stream=False):
+        if not stream:
+            _sleep_bloqueante(self.latencia_s)
+            return _Pedaco(f"Resposta para: {mensagem}")
+        return self._fluxo(mensagem)
+
+    def _fluxo(self, mensagem):
+        for i in range(self.pedacos):
+            _sleep_bloqueante(self.latencia_s / self.pedacos)
+            yield _Pedaco(f"parte {i} de '{mensagem}' ")
+
+
+def medir_chatbot(app, requisicoes, concorrencia, latencia_s):
+    from app import chatbot
+    chatbot.provedor._modelo = ModeloFalso(latencia_s)
+    chatbot.provedor._tentou = True
+
+    def completa(i):
+        c = cliente(app, (10 ** 6 + i, f'chat{i}@bench'))
+        inicio = time.perf_counter()
+        resposta = c.post('/api/chatbot', json={'message': f'pergunta única {i} {time.time_ns()}'})
+        return time.perf_counter() - inicio, resposta.status_code
+
+    def streaming(i):
+        c = cliente(app, (2 * 10 ** 6 + i, f'chat{i}@bench'))
+        inicio = time.perf_counter()
+        resposta = c.post('/api/chatbot/stream', json={'message': f'pergunta única {i} {time.time_ns()}'},
+                          buffered=False)
+        iterador = iter(resposta.response)
+        next(iterador)
+        primeiro = time.perf_counter() - inicio
+        for _ in iterador:
+            pass
+        resposta.close()
+        return primeiro, time.perf_counter() - inicio
+
+    resultado = {'latencia_modelo_ms': round(latencia_s * 1000, 1), 'concorrencia': concorrencia}
+    pool = eventlet.GreenPool(concorrencia)
+    inicio = time.perf_counter()
+    amostras = list(pool.imap(completa, range(requisicoes)))
+    resultado['POST /api/chatbot'] = resumir([a[0] for a in amostras], time.perf_counter() - inicio,
+                                            [a[1] for a in amostras])
+
+    inicio = time.perf_counter()
+    amostras = list(pool.imap(streaming, range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+    resultado['POST /api/chatbot/stream'] = {
+        **resumir([a[1] for a in amostras], duracao, [200] * len(amostras)),
+        'primeiro_trecho_p50_ms': round(percentil([a[0] for a in amostras], 50) * 1000, 2),
+        'primeiro_trecho_p95_ms': round(percentil([a[0] for a in amostras], 95) * 1000, 2),
+    }
+    resultado['executor'] = chatbot.executor_modelo.estatisticas()
+    return resultado
+
+
+# --- comparação e metadados --------------------------------------------------
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def comparar(atual, anterior):
+    print(f"\nComparação com {anterior['meta'].get('commit')} ({anterior['meta'].get('data')}):")
+    print(f"{'cenário':<42} {'p50 antes':>10} {'p50 agora':>10} {'variação':>9}")
+    for nome, medida in atual['endpoints'].items():
+        antes = anterior.get('endpoints', {}).get(nome)
+        if not antes:
+            continue
+        variacao = (medida['p50_ms'] - antes['p50_ms']) / antes['p50_ms'] * 100 if antes['p50_ms'] else 0
+        print(f"{nome:<42} {antes['p50_ms']:>10.2f} {medida['p50_ms']:>10.2f} {variacao:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banco', help='SQLite gerado por dados_sinteticos.py (copiado antes de rodar)')
+    parser.add_argument('--chamados', type=int, default=20000, help='volume do banco temporário (sem --banco)')
+    parser.add_argument('--historicos', type=int, default=200000, help='volume do banco temporário (sem --banco)')
+    parser.add_argument('--requisicoes', type=int, default=200, help='requisições por cenário')
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--dashboards', type=int, default=50)
+    parser.add_argument('--latencia-modelo-ms', type=float, default=300)
+    parser.add_argument('--saida', help='grava os resultados em JSON neste arquivo')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    banco = os.path.join(pasta, 'bench.db')
+    if args.banco:
+        # Trabalha numa cópia: os cenários de escrita alteram os dados
+        shutil.copyfile(args.banco, banco)
+    os.environ['DATABASE_URL'] = f"sqlite:///{banco}"
+    os.environ['CHATBOT_HABILITADO'] = '1'
+    os.environ.setdefault('key', 'chave-de-benchmark')
+
+    from app import create_app, db
+    from app.models import Chamado, Usuario
+    from dados_sinteticos import gerar, SENHA
+
+    app = create_app()
+    with app.app_context():
+        if not args.banco:
+            gerar(chamados=args.chamados, historicos=args.historicos)
+        total = db.session.query(db.func.max(Chamado.id)).scalar()
+        # Usuário comum com mais chamados: o pior caso de /meus-chamados e notificações
+        dono = db.session.query(Chamado.user_id).group_by(Chamado.user_id).order_by(
+            db.func.count().desc()).limit(1).scalar()
+        email_dono = db.session.get(Usuario, dono).email
+        ids_do_usuario = [i for (i,) in db.session.query(Chamado.id).filter_by(user_id=dono).limit(200)]
+        info = {
+            'chamados': total,
+            'historicos': db.session.execute(db.text('SELECT count(*) FROM historico_chamado')).scalar(),
+            'usuario_exemplo': (dono, email_dono),
+            'ids_do_usuario': ids_do_usuario,
+            'senha': SENHA,
+        }
+    resposta = cliente(app, ADMIN).get('/api/chamados')
+    info['versao'] = resposta.get_json()['versao']
+    info['etag_listagem'] = resposta.headers['ETag']
+
+    leituras, escritas = montar_cenarios(app, info)
+    faltando = endpoints_sem_cenario(app, {**leituras, **escritas})
+    if faltando:
+        print(f"⚠️ Endpoints sem cenário: {', '.join(faltando)}")
+
+    resultados = {
+        'meta': {
+            'data': datetime.utcnow().isoformat() + 'Z',
+            'commit': commit_atual(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'parametros': vars(args),
+            'dados': {'chamados': info['chamados'], 'historicos': info['historicos']},
+            'endpoints_sem_cenario': faltando,
+        },
+        'endpoints': {},
+    }
+
+    print(f"{'cenário':<42} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'req/s':>8}  status")
+    for nome, cenario in {**leituras, **escritas}.items():
+        medida = rodar_cenario(app, cenario, args.requisicoes, args.concorrencia)
+        resultados['endpoints'][nome] = medida
+        print(f"{nome:<42} {medida['p50_ms']:>9.2f} {medida['p95_ms']:>9.2f} {medida['p99_ms']:>9.2f} "
+              f"{medida['req_por_s']:>8.1f}  {medida['status']}")
+
+    resultados['socketio'] = medir_fanout(app, args.dashboards, 30, chamado_id=1)
+    print(f"\nSocket.IO: commit -> {args.dashboards} dashboards p50 "
+          f"{resultados['socketio']['commit_ate_todos_ms_p50']} ms")
+
+    resultados['chatbot'] = medir_chatbot(app, min(args.requisicoes, 50), args.concorrencia,
+                                          args.latencia_modelo_ms / 1000)
+    for nome in ('POST /api/chatbot', 'POST /api/chatbot/stream'):
+        medida = resultados['chatbot'][nome]
+        print(f"{nome}: p50 {medida['p50_ms']} ms, {medida['req_por_s']} req/s")
+    print(f"  primeiro trecho p50 {resultados['chatbot']['POST /api/chatbot/stream']['primeiro_trecho_p50_ms']} ms")
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar) as f:
+            comparar(resultados, json.load(f))
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
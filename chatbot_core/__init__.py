@@ -0,0 +1,10 @@
+# chatbot_core/__init__.py
+"""
+Peças do chatbot usadas tanto pelo sistema de chamados (app/chatbot.py) quanto pelo
+serviço separado de IA (ia_server.py): o fluxo de uma pergunta, conversas, cache de
+respostas, provedor e executor do modelo e a base das métricas do /metrics.
+
+Nada aqui importa o pacote 'app': importar 'app.qualquer_coisa' roda app/__init__.py,
+que carrega SQLAlchemy, Socket.IO e bcrypt. O ia_server não precisa de nada disso, e
+benchmarks/startup.py falha se algum desses módulos aparecer no import dele.
+"""
@@ -0,0 +1,53 @@
+# chatbot_core/cache_respostas.py
+"""
+Cache das respostas do chatbot para perguntas repetidas.
+
+Só entram no cache perguntas de primeiro turno (sem histórico): a resposta não depende
+de contexto anterior. A chave é a pergunta normalizada (sem acentos, pontuação, caixa e
+espaços extras), então "Impressora offline?" e "impressora  OFFLINE" caem na mesma entrada.
+Usado tanto por app/chatbot.py quanto pelo ia_server.py.
+"""
+import os
+import re
+import unicodedata
+from .conversas import CacheLRU
+
+# Perguntas longas quase nunca se repetem; não vale ocupar o cache com elas
+TAMANHO_MAXIMO_PERGUNTA = 300
+
+
+def normalizar_pergunta(pergunta):
+    texto = unicodedata.normalize('NFKD', pergunta or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    texto = re.sub(r'[^\w\s]', ' ', texto)
+    return ' '.join(texto.split())
+
+
+class CacheRespostas(CacheLRU):
+    def __init__(self, max_entradas=500, ttl=21600):
+        # O TTL conta da gravação: respostas velhas saem mesmo que continuem populares
+        super().__init__(max_entradas, ttl, renovar_no_acesso=False)
+
+    @staticmethod
+    def chave(pergunta):
+        chave = normalizar_pergunta(pergunta)
+        if not chave or len(chave) > TAMANHO_MAXIMO_PERGUNTA:
+            return None
+        return chave
+
+    def obter_resposta(self, pergunta):
+        chave = self.chave(pergunta)
+        return self.obter(chave) if chave else None
+
+    def gravar_resposta(self, pergunta, resposta):
+        chave = self.chave(pergunta)
+        if chave and resposta:
+            self.gravar(chave, resposta)
+
+
+def criar_cache_respostas():
+    """Cria o cache com os limites das variáveis CHAT_CACHE_MAX e CHAT_CACHE_TTL_SEGUNDOS."""
+    return CacheRespostas(
+        max_entradas=int(os.environ.get('CHAT_CACHE_MAX', 500)),
+        ttl=int(os.environ.get('CHAT_CACHE_TTL_SEGUNDOS', 21600)),
+    )
@@ -0,0 +1,126 @@
+# chatbot_core/conversas.py
+"""
+Armazenamento das conversas do chatbot em memória, com limite de tamanho.
+
+Guarda só os turnos (papel + texto) no formato aceito por start_chat(history=...),
+não os objetos de sessão do SDK. Entradas paradas há mais de 'ttl' segundos expiram
+e, ao atingir 'max_entradas', a conversa usada há mais tempo é descartada (LRU).
+Usado tanto por app/chatbot.py quanto pelo ia_server.py.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Dicionário limitado com expiração por TTL e descarte LRU, seguro entre threads/greenlets.
+
+    Com renovar_no_acesso=True o TTL conta do último acesso (tempo ocioso); com False,
+    conta da gravação (idade do valor).
+    """
+
+    def __init__(self, max_entradas, ttl, renovar_no_acesso=True):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.renovar_no_acesso = renovar_no_acesso
+        # Ordem = ordem de último acesso (LRU); o mais antigo fica no início
+        self._dados = OrderedDict()
+        # Sob eventlet.monkey_patch() este lock vira um lock de greenlet
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.despejos = 0
+        self.expiracoes = 0
+
+    def _expirar(self, agora):
+        while self._dados:
+            chave, (momento, _) = next(iter(self._dados.items()))
+            if agora - momento <= self.ttl:
+                break
+            del self._dados[chave]
+            self.expiracoes += 1
+
+    def _ler(self, chave, agora, contar=True):
+        """Lê sem copiar; deve ser chamado com o lock adquirido."""
+        entrada = self._dados.get(chave)
+        if entrada is not None and agora - entrada[0] > self.ttl:
+            del self._dados[chave]
+            self.expiracoes += 1
+            entrada = None
+        if entrada is None:
+            if contar:
+                self.faltas += 1
+            return None
+        if contar:
+            self.acertos += 1
+        if self.renovar_no_acesso:
+            self._dados[chave] = (agora, entrada[1])
+        self._dados.move_to_end(chave)
+        return entrada[1]
+
+    def obter(self, chave):
+        agora = time.monotonic()
+        with self._lock:
+            self._expirar(agora)
+            return self._ler(chave, agora)
+
+    def gravar(self, chave, valor):
+        agora = time.monotonic()
+        with self._lock:
+            self._expirar(agora)
+            self._dados[chave] = (agora, valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+                self.despejos += 1
+
+    def remover(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.faltas
+            return {
+                'entradas': len(self._dados),
+                'max_entradas': self.max_entradas,
+                'acertos': self.acertos,
+                'faltas': self.faltas,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else 0.0,
+                'despejos': self.despejos,
+                'expiracoes': self.expiracoes,
+            }
+
+
+class ArmazemConversas(CacheLRU):
+    def __init__(self, max_entradas=1000, ttl=1800, max_turnos=5):
+        super().__init__(max_entradas, ttl, renovar_no_acesso=True)
+        self.max_turnos = max_turnos
+
+    def obter(self, chave):
+        """Retorna uma cópia dos turnos da conversa (lista vazia se não houver)."""
+        return list(super().obter(chave) or [])
+
+    def salvar(self, chave, turnos):
+        """Grava os turnos, mantendo só os últimos max_turnos pares pergunta/resposta."""
+        self.gravar(chave, list(turnos)[-(self.max_turnos * 2):])
+
+    def adicionar_turno(self, chave, pergunta, resposta):
+        """Acrescenta um par pergunta/resposta ao fim da conversa."""
+        with self._lock:
+            turnos = list(self._ler(chave, time.monotonic(), contar=False) or [])
+        self.salvar(chave, turnos + [
+            {'role': 'user', 'parts': [pergunta]},
+            {'role': 'model', 'parts': [resposta]},
+        ])
+
+
+def criar_armazem(max_turnos):
+    """Cria um armazém com os limites das variáveis CHAT_MAX_SESSOES e CHAT_TTL_SEGUNDOS."""
+    return ArmazemConversas(
+        max_entradas=int(os.environ.get('CHAT_MAX_SESSOES', 1000)),
+        ttl=int(os.environ.get('CHAT_TTL_SEGUNDOS', 1800)),
+        max_turnos=max_turnos,
+    )
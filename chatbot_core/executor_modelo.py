@@ -0,0 +1,322 @@
+# chatbot_core/executor_modelo.py
+"""
+Execução das chamadas ao modelo de IA fora do hub do eventlet, com limites.
+
+O SDK do Gemini faz I/O bloqueante (gRPC/HTTP em código nativo) que o monkey_patch não
+consegue tornar cooperativo: uma resposta lenta travaria o hub inteiro, junto com as APIs
+de chamados e os heartbeats do Socket.IO. Aqui cada chamada roda numa das threads nativas
+do próprio executor (CHAT_MAX_CONCORRENTES delas, fora do eventlet.tpool, que é global e
+atende o bcrypt de senhas.py) e o greenlet da requisição só espera pelo resultado.
+
+Uma thread nativa não pode ser interrompida: no timeout a requisição recebe ModeloTimeout
+na hora, mas a vaga só volta quando a thread termina. Assim nunca há mais chamadas presas
+no modelo do que CHAT_MAX_CONCORRENTES.
+
+Limites (variáveis de ambiente, todas opcionais):
+    CHAT_MAX_CONCORRENTES    chamadas simultâneas ao modelo (padrão 4)
+    CHAT_MAX_FILA            requisições aguardando vaga; além disso falha na hora (padrão 16)
+    CHAT_ESPERA_FILA_S       tempo máximo esperando vaga na fila (padrão 10)
+    CHAT_TIMEOUT_S           tempo máximo de cada chamada ao modelo (padrão 30)
+    CHAT_CIRCUITO_FALHAS     falhas seguidas que abrem o circuito (padrão 5)
+    CHAT_CIRCUITO_ESPERA_S   tempo com o circuito aberto antes de testar de novo (padrão 30)
+
+Com o circuito aberto as chamadas falham imediatamente com ModeloIndisponivel, sem ocupar
+vaga nem thread. Passada a espera, uma única chamada de teste decide se ele fecha de novo.
+Uma resposta em streaming (iterar) conta como uma chamada só e ocupa a vaga até o fim.
+Usado tanto por app/chatbot.py quanto pelo ia_server.py.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+
+class ModeloIndisponivel(Exception):
+    """Circuito aberto ou fila cheia: o modelo não foi chamado."""
+
+
+class ModeloTimeout(Exception):
+    """O modelo não respondeu dentro de CHAT_TIMEOUT_S."""
+
+
+def _eventlet_ativo():
+    # Só olha o eventlet se alguém já o importou (o run.py importa antes do monkey_patch)
+    if 'eventlet' not in sys.modules:
+        return False
+    from eventlet import patcher
+    return patcher.is_monkey_patched('thread')
+
+
+def _trabalhador_nativo(fila):
+    """Laço de uma thread nativa: roda a função e avisa o greenlet que espera pelo socket."""
+    while True:
+        funcao, args, kwargs, caixa, aviso = fila.get()
+        try:
+            caixa['resultado'] = funcao(*args, **kwargs)
+        except BaseException as e:
+            caixa['erro'] = e
+        finally:
+            aviso.sendall(b'.')
+            aviso.close()
+
+
+class _Vaga:
+    """
+    Uma vaga de execução ocupada. liberar() pode ser chamado mais de uma vez; se uma
+    thread nativa ainda estiver rodando algo da vaga, ela só é devolvida quando a thread terminar.
+    """
+
+    def __init__(self, executor):
+        self._executor = executor
+        self._threads = 0
+        self._pedida = False
+        self._devolvida = False
+
+    def thread_iniciou(self):
+        with self._executor._lock:
+            self._threads += 1
+
+    def thread_terminou(self):
+        with self._executor._lock:
+            self._threads -= 1
+        self._devolver()
+
+    def liberar(self):
+        with self._executor._lock:
+            self._pedida = True
+        self._devolver()
+
+    def _devolver(self):
+        with self._executor._lock:
+            if self._devolvida or not self._pedida or self._threads:
+                return
+            self._devolvida = True
+            self._executor.em_execucao -= 1
+        self._executor._vagas.release()
+
+
+class ExecutorModelo:
+    FECHADO, ABERTO, MEIO_ABERTO = 'fechado', 'aberto', 'meio_aberto'
+
+    def __init__(self, max_concorrentes=4, max_fila=16, espera_fila=10, timeout=30,
+                 falhas_para_abrir=5, espera_circuito=30):
+        self.max_concorrentes = max_concorrentes
+        self.max_fila = max_fila
+        self.espera_fila = espera_fila
+        self.timeout = timeout
+        self.falhas_para_abrir = falhas_para_abrir
+        self.espera_circuito = espera_circuito
+
+        # Sob monkey_patch estes objetos viram primitivas de greenlet
+        self._vagas = threading.BoundedSemaphore(max_concorrentes)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._fila_nativa = None
+
+        self.estado = self.FECHADO
+        self._aberto_em = 0.0
+        self._falhas_seguidas = 0
+        self._teste_em_andamento = False
+        self.em_execucao = 0
+        self.na_fila = 0
+        self.metricas = {'chamadas': 0, 'sucessos': 0, 'falhas': 0, 'timeouts': 0,
+                         'rejeitadas_fila': 0, 'rejeitadas_circuito': 0}
+
+    # --- circuito -----------------------------------------------------------
+
+    def _permitir(self):
+        """Decide, com o lock adquirido, se a chamada pode seguir."""
+        if self.estado == self.ABERTO:
+            if time.monotonic() - self._aberto_em < self.espera_circuito:
+                return False
+            self.estado = self.MEIO_ABERTO
+        if self.estado == self.MEIO_ABERTO:
+            if self._teste_em_andamento:
+                return False
+            self._teste_em_andamento = True
+        return True
+
+    def _registrar_resultado(self, sucesso, timeout=False):
+        with self._lock:
+            self._teste_em_andamento = False
+            if timeout:
+                self.metricas['timeouts'] += 1
+            if sucesso:
+                self.metricas['sucessos'] += 1
+                self._falhas_seguidas = 0
+                if self.estado != self.FECHADO:
+                    logging.info("✅ Circuito do modelo de IA fechado novamente.")
+                self.estado = self.FECHADO
+                return
+            self.metricas['falhas'] += 1
+            self._falhas_seguidas += 1
+            if self.estado == self.MEIO_ABERTO or self._falhas_seguidas >= self.falhas_para_abrir:
+                if self.estado != self.ABERTO:
+                    logging.warning(f"⚠️ Circuito do modelo de IA aberto após {self._falhas_seguidas} "
+                                    f"falha(s); novas chamadas falham por {self.espera_circuito}s.")
+                self.estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+    # --- execução -----------------------------------------------------------
+
+    def _fila_de_threads(self):
+        """Fila das threads nativas deste executor, criadas no primeiro uso sob monkey_patch."""
+        if self._fila_nativa is None:
+            with self._lock:
+                if self._fila_nativa is None:
+                    from eventlet import patcher
+                    threading_nativo = patcher.original('threading')
+                    fila = patcher.original('queue').Queue()
+                    for i in range(self.max_concorrentes):
+                        threading_nativo.Thread(target=_trabalhador_nativo, args=(fila,),
+                                                name=f'modelo-ia-{i}', daemon=True).start()
+                    self._fila_nativa = fila
+        return self._fila_nativa
+
+    def _esperar_thread(self, vaga, leitura):
+        from eventlet.hubs import trampoline
+        try:
+            trampoline(leitura.fileno(), read=True)
+        finally:
+            leitura.close()
+            vaga.thread_terminou()
+
+    def _rodar_sob_eventlet(self, vaga, funcao, args, kwargs):
+        import eventlet
+        from eventlet import patcher
+        from eventlet.hubs import trampoline
+        # Socket nativo: a thread avisa sem passar pelo hub, e o greenlet espera sem travá-lo
+        leitura, aviso = patcher.original('socket').socketpair()
+        caixa = {}
+        self._fila_de_threads().put((funcao, args, kwargs, caixa, aviso))
+        try:
+            trampoline(leitura.fileno(), read=True, timeout=self.timeout,
+                       timeout_exc=ModeloTimeout(f"O modelo não respondeu em {self.timeout}s."))
+        except BaseException:
+            # A thread continua rodando: outro greenlet devolve a vaga quando ela terminar
+            eventlet.spawn_n(self._esperar_thread, vaga, leitura)
+            raise
+        leitura.close()
+        vaga.thread_terminou()
+        if 'erro' in caixa:
+            raise caixa['erro']
+        return caixa['resultado']
+
+    def _rodar(self, vaga, funcao, args, kwargs):
+        """Roda funcao(*args, **kwargs) numa thread nativa do executor, esperando no máximo self.timeout."""
+        vaga.thread_iniciou()
+        if _eventlet_ativo():
+            return self._rodar_sob_eventlet(vaga, funcao, args, kwargs)
+
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_concorrentes,
+                                                    thread_name_prefix='modelo-ia')
+        try:
+            futuro = self._pool.submit(funcao, *args, **kwargs)
+        except BaseException:
+            vaga.thread_terminou()
+            raise
+        futuro.add_done_callback(lambda _: vaga.thread_terminou())
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FuturesTimeout:
+            raise ModeloTimeout(f"O modelo não respondeu em {self.timeout}s.") from None
+
+    def _ocupar_vaga(self):
+        """Passa pelo circuito e pela fila; retorna a _Vaga ou lança ModeloIndisponivel."""
+        with self._lock:
+            if not self._permitir():
+                self.metricas['rejeitadas_circuito'] += 1
+                raise ModeloIndisponivel("Circuito do modelo aberto.")
+            if self.na_fila >= self.max_fila:
+                self._teste_em_andamento = False
+                self.metricas['rejeitadas_fila'] += 1
+                raise ModeloIndisponivel("Fila de chamadas ao modelo cheia.")
+            self.na_fila += 1
+
+        obteve_vaga = self._vagas.acquire(timeout=self.espera_fila)
+        with self._lock:
+            self.na_fila -= 1
+            if not obteve_vaga:
+                self._teste_em_andamento = False
+                self.metricas['rejeitadas_fila'] += 1
+            else:
+                self.em_execucao += 1
+                self.metricas['chamadas'] += 1
+        if not obteve_vaga:
+            raise ModeloIndisponivel("Tempo de espera por uma vaga no modelo esgotado.")
+        return _Vaga(self)
+
+    def executar(self, funcao, *args, **kwargs):
+        """Executa funcao(*args, **kwargs) numa thread nativa, respeitando fila, timeout e circuito."""
+        vaga = self._ocupar_vaga()
+        try:
+            resultado = self._rodar(vaga, funcao, args, kwargs)
+        except ModeloTimeout:
+            self._registrar_resultado(False, timeout=True)
+            raise
+        except Exception:
+            self._registrar_resultado(False)
+            raise
+        else:
+            self._registrar_resultado(True)
+            return resultado
+        finally:
+            vaga.liberar()
+
+    def iterar(self, funcao, *args, **kwargs):
+        """
+        Chama funcao(*args, **kwargs), que devolve um iterador bloqueante (ex.: send_message
+        com stream=True), e gera os pedaços dele. Conta como uma chamada: a vaga fica ocupada
+        até o fim do stream e o timeout vale para a chamada e para cada pedaço.
+        """
+        vaga = self._ocupar_vaga()
+        sucesso = timeout = False
+        try:
+            iterador = iter(self._rodar(vaga, funcao, args, kwargs))
+            fim = object()
+            while True:
+                pedaco = self._rodar(vaga, next, (iterador, fim), {})
+                if pedaco is fim:
+                    break
+                yield pedaco
+            sucesso = True
+        except GeneratorExit:
+            # Quem consumia desistiu (ex.: cliente do SSE desconectou); não é falha do modelo
+            sucesso = True
+            raise
+        except ModeloTimeout:
+            timeout = True
+            raise
+        finally:
+            self._registrar_resultado(sucesso, timeout=timeout)
+            vaga.liberar()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'estado_circuito': self.estado,
+                'falhas_seguidas': self._falhas_seguidas,
+                'em_execucao': self.em_execucao,
+                'na_fila': self.na_fila,
+                'max_concorrentes': self.max_concorrentes,
+                'max_fila': self.max_fila,
+                'timeout_s': self.timeout,
+                **self.metricas,
+            }
+
+
+def criar_executor():
+    """Cria um executor com os limites das variáveis CHAT_* descritas no topo do módulo."""
+    return ExecutorModelo(
+        max_concorrentes=int(os.environ.get('CHAT_MAX_CONCORRENTES', 4)),
+        max_fila=int(os.environ.get('CHAT_MAX_FILA', 16)),
+        espera_fila=float(os.environ.get('CHAT_ESPERA_FILA_S', 10)),
+        timeout=float(os.environ.get('CHAT_TIMEOUT_S', 30)),
+        falhas_para_abrir=int(os.environ.get('CHAT_CIRCUITO_FALHAS', 5)),
+        espera_circuito=float(os.environ.get('CHAT_CIRCUITO_ESPERA_S', 30)),
+    )
@@ -0,0 +1,108 @@
+# chatbot_core/fluxo.py
+"""
+Fluxo de uma pergunta ao chatbot, igual no sistema de chamados (app/chatbot.py) e no
+ia_server.py: histórico da conversa, cache da primeira pergunta, chamada ao modelo pelo
+executor (com ou sem streaming) e as respostas de erro. Cada serviço monta o seu
+FluxoChatbot com o próprio provedor, armazém, cache, executor, logger e mensagens.
+"""
+import json
+from .executor_modelo import ModeloIndisponivel
+
+MENSAGENS_PADRAO = {
+    'indisponivel': "Desculpe, o serviço está temporariamente indisponível. Tente novamente mais tarde.",
+    'erro': "Desculpe, tive um problema técnico. Tente novamente mais tarde.",
+}
+
+
+class FluxoChatbot:
+    def __init__(self, provedor, histories, respostas_cache, executor_modelo, logger, mensagens=None):
+        self.provedor = provedor
+        self.histories = histories
+        self.respostas_cache = respostas_cache
+        self.executor_modelo = executor_modelo
+        self.logger = logger
+        self.mensagens = {**MENSAGENS_PADRAO, **(mensagens or {})}
+
+    def _preparar_conversa(self, user_id, message):
+        """Retorna (historico, resposta_do_cache). Só a primeira pergunta da conversa consulta o cache."""
+        historico = self.histories.obter(user_id)
+        if not historico:
+            self.logger.info(f"[{user_id}] Nova sessão")
+            resposta_cache = self.respostas_cache.obter_resposta(message)
+            if resposta_cache:
+                self.logger.info(f"[{user_id}] Resposta servida do cache")
+                self.histories.adicionar_turno(user_id, message, resposta_cache)
+                return historico, resposta_cache
+        return historico, None
+
+    def _registrar_resposta(self, user_id, message, historico, resposta):
+        self.histories.adicionar_turno(user_id, message, resposta)
+        if not historico:
+            self.respostas_cache.gravar_resposta(message, resposta)
+
+    def gerar(self, user_id, message):
+        """Resposta completa a uma mensagem; nunca lança, devolve o texto de erro ao usuário."""
+        gemini_model = self.provedor.obter()
+        if not gemini_model:
+            self.logger.error(f"[{user_id}] Chatbot chamado, mas modelo não inicializado.")
+            return self.mensagens['indisponivel']
+
+        try:
+            historico, resposta_cache = self._preparar_conversa(user_id, message)
+            if resposta_cache:
+                return resposta_cache
+            # A sessão do SDK é recriada a cada mensagem a partir dos turnos guardados (baratos em memória)
+            chat_session = gemini_model.start_chat(history=historico)
+
+            response = self.executor_modelo.executar(chat_session.send_message, message)
+            self._registrar_resposta(user_id, message, historico, response.text)
+            return response.text
+        except ModeloIndisponivel as e:
+            self.logger.warning(f"[{user_id}] Modelo indisponível: {e}")
+            return self.mensagens['indisponivel']
+        except Exception as e:
+            self.logger.exception(f"[{user_id}] ❌ Erro na API Gemini: {e}")
+            self.histories.remover(user_id)
+            return self.mensagens['erro']
+
+    def gerar_stream(self, user_id, message):
+        """
+        Versão em streaming de gerar: gera os pedaços da resposta à medida que o modelo
+        os produz. O turno só é gravado no histórico quando a resposta termina.
+        """
+        gemini_model = self.provedor.obter()
+        if not gemini_model:
+            self.logger.error(f"[{user_id}] Chatbot chamado, mas modelo não inicializado.")
+            yield self.mensagens['indisponivel']
+            return
+
+        partes = []
+        try:
+            historico, resposta_cache = self._preparar_conversa(user_id, message)
+            if resposta_cache:
+                yield resposta_cache
+                return
+            chat_session = gemini_model.start_chat(history=historico)
+
+            for chunk in self.executor_modelo.iterar(chat_session.send_message, message, stream=True):
+                if chunk.text:
+                    partes.append(chunk.text)
+                    yield chunk.text
+        except ModeloIndisponivel as e:
+            self.logger.warning(f"[{user_id}] Modelo indisponível: {e}")
+            if not partes:
+                yield self.mensagens['indisponivel']
+            return
+        except Exception as e:
+            self.logger.exception(f"[{user_id}] ❌ Erro na API Gemini (streaming): {e}")
+            self.histories.remover(user_id)
+            yield self.mensagens['erro']
+            return
+
+        self._registrar_resposta(user_id, message, historico, ''.join(partes))
+
+
+def formatar_sse(dados, evento=None):
+    """Formata uma mensagem Server-Sent Events."""
+    prefixo = f"event: {evento}\n" if evento else ""
+    return f"{prefixo}data: {json.dumps(dados, ensure_ascii=False)}\n\n"
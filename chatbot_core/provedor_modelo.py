@@ -0,0 +1,62 @@
+# chatbot_core/provedor_modelo.py
+"""
+Criação preguiçosa do modelo Gemini.
+
+Importar google.generativeai carrega gRPC e protobuf, o que custa centenas de
+milissegundos e dezenas de MB por processo. Com o provedor, o SDK só é importado e o
+modelo só é criado na primeira vez que o chatbot precisa dele. Workers que nunca
+atendem o chatbot, o 'flask db upgrade' do deploy e os comandos CLI não pagam esse custo.
+Usado tanto por app/chatbot.py quanto pelo ia_server.py.
+"""
+import os
+import logging
+import threading
+
+
+class ProvedorModelo:
+    def __init__(self, model_name, system_instruction, generation_config=None, variavel_chave='key'):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.generation_config = generation_config
+        self.variavel_chave = variavel_chave
+        self._modelo = None
+        self._tentou = False
+        self._lock = threading.Lock()
+
+    @property
+    def configurado(self):
+        """Há chave de API? Não importa o SDK."""
+        return bool(os.getenv(self.variavel_chave))
+
+    @property
+    def carregado(self):
+        return self._modelo is not None
+
+    def obter(self):
+        """Retorna o modelo, criando-o na primeira chamada; None se não houver chave ou a criação falhar."""
+        if self._tentou:
+            return self._modelo
+        with self._lock:
+            if self._tentou:
+                return self._modelo
+            self._modelo = self._criar()
+            self._tentou = True
+        return self._modelo
+
+    def _criar(self):
+        chave = os.getenv(self.variavel_chave)
+        if not chave:
+            logging.warning(f"Variável de ambiente '{self.variavel_chave}' não configurada. O chatbot não será inicializado.")
+            return None
+        try:
+            import google.generativeai as genai
+            genai.configure(api_key=chave)
+            opcoes = {'model_name': self.model_name, 'system_instruction': self.system_instruction}
+            if self.generation_config:
+                opcoes['generation_config'] = self.generation_config
+            modelo = genai.GenerativeModel(**opcoes)
+            logging.info("✅ Modelo Gemini (API) configurado com sucesso.")
+            return modelo
+        except Exception as e:
+            logging.error(f"❌ Erro ao configurar Gemini API: {e}")
+            return None
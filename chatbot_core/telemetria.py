@@ -0,0 +1,228 @@
+# chatbot_core/telemetria.py
+"""
+Base das métricas no formato texto do Prometheus, expostas em GET /metrics: tipos
+Contador e Histograma, medição das requisições HTTP e coletores lidos na hora da coleta.
+Só depende do Flask; o sistema de chamados acrescenta SQL, pool e Socket.IO em
+app/telemetria.py, e o ia_server usa esta base diretamente.
+
+Por requisição HTTP (rótulo 'rota' = regra da URL, ex. /api/chamados/<int:id>):
+    chamados_http_requisicoes_total            contagem por método, rota e status
+    chamados_http_duracao_segundos             histograma da latência por método e rota
+    chamados_http_sql_consultas                histograma de consultas SQL por requisição
+    chamados_http_sql_duracao_segundos         histograma do tempo gasto em SQL por requisição
+As duas de SQL ficam zeradas se ninguém contar as consultas (ver contar_consulta).
+
+Variáveis (todas opcionais):
+    METRICAS_HABILITADAS   liga a instrumentação e a rota /metrics (padrão 1)
+    METRICAS_TOKEN         se definido, /metrics exige 'Authorization: Bearer <token>'
+
+O custo por requisição é o de dois perf_counter, uma busca binária nos limites do
+histograma e um lock; nada é formatado até alguém ler /metrics. Respostas em
+streaming (SSE do chatbot) são medidas até o fim do corpo, não até o primeiro byte.
+Os números são do processo: com vários workers, o Prometheus coleta cada um.
+"""
+import os
+import time
+import threading
+from bisect import bisect_left
+from flask import request, g, has_request_context, Response
+
+HABILITADAS = os.environ.get('METRICAS_HABILITADAS', '1').lower() in ('1', 'true', 'yes')
+TOKEN = os.environ.get('METRICAS_TOKEN')
+
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LIMITES_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+_lock = threading.Lock()
+_coletores = []
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_rotulos(nomes, valores, extra=''):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _formatar_numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    tipo = 'counter'
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self._series = {}
+
+    def incrementar(self, valores=(), quantidade=1):
+        with _lock:
+            self._series[valores] = self._series.get(valores, 0) + quantidade
+
+    def linhas(self):
+        with _lock:
+            series = sorted(self._series.items())
+        for valores, total in series:
+            yield f"{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_formatar_numero(total)}"
+
+
+class Histograma:
+    """Histograma cumulativo do Prometheus; por série guarda [contagem por faixa..., soma]."""
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, limites, rotulos=()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self.limites = tuple(limites)
+        self._series = {}
+
+    def observar(self, valores, valor):
+        # bisect_left: um valor igual ao limite conta na faixa 'le' daquele limite
+        faixa = bisect_left(self.limites, valor)
+        with _lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * (len(self.limites) + 1) + [0.0]
+            serie[faixa] += 1
+            serie[-1] += valor
+
+    def linhas(self):
+        with _lock:
+            series = sorted((valores, list(serie)) for valores, serie in self._series.items())
+        for valores, serie in series:
+            acumulado = 0
+            for limite, quantidade in zip(self.limites + (float('inf'),), serie):
+                acumulado += quantidade
+                le = f'le="{_formatar_numero(limite)}"'
+                yield f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, valores, le)} {acumulado}"
+            rotulos = _formatar_rotulos(self.rotulos, valores)
+            yield f"{self.nome}_sum{rotulos} {_formatar_numero(serie[-1])}"
+            yield f"{self.nome}_count{rotulos} {acumulado}"
+
+
+requisicoes = Contador('chamados_http_requisicoes_total', 'Requisições HTTP atendidas.',
+                       ('metodo', 'rota', 'status'))
+duracao = Histograma('chamados_http_duracao_segundos', 'Latência das requisições HTTP.',
+                     LIMITES_LATENCIA, ('metodo', 'rota'))
+sql_por_requisicao = Histograma('chamados_http_sql_consultas', 'Consultas SQL executadas por requisição.',
+                                LIMITES_CONSULTAS, ('metodo', 'rota'))
+sql_duracao_por_requisicao = Histograma('chamados_http_sql_duracao_segundos',
+                                        'Tempo gasto em SQL por requisição.',
+                                        LIMITES_LATENCIA, ('metodo', 'rota'))
+sql_total = Contador('chamados_sql_consultas_total', 'Consultas SQL executadas, dentro ou fora de requisições.',
+                     ('contexto',))
+
+# Exportadas nesta ordem; app/telemetria.py acrescenta as suas
+METRICAS = [requisicoes, duracao, sql_por_requisicao, sql_duracao_por_requisicao, sql_total]
+
+
+# --- coletores lidos na hora da coleta ------------------------------------------
+
+def registrar_coletor(funcao):
+    """
+    'funcao' devolve uma lista de (nome, tipo, ajuda, amostras), com amostras =
+    [(dict_de_rotulos, valor), ...]. Ela só roda quando /metrics é lido.
+    """
+    if funcao not in _coletores:
+        _coletores.append(funcao)
+    return funcao
+
+
+def registrar_executor_modelo(executor, servico):
+    """Expõe fila, concorrência, circuito e contadores de um ExecutorModelo (ver executor_modelo.py)."""
+    def coletar():
+        dados = executor.estatisticas()
+        rotulo = {'servico': servico}
+        return [
+            ('chamados_modelo_em_execucao', 'gauge', 'Chamadas ao modelo de IA em andamento.',
+             [(rotulo, dados['em_execucao'])]),
+            ('chamados_modelo_na_fila', 'gauge', 'Chamadas ao modelo de IA esperando vaga.',
+             [(rotulo, dados['na_fila'])]),
+            ('chamados_modelo_circuito_aberto', 'gauge', '1 quando o circuito do modelo não está fechado.',
+             [(rotulo, int(dados['estado_circuito'] != executor.FECHADO))]),
+            ('chamados_modelo_chamadas_total', 'counter', 'Chamadas ao modelo de IA por resultado.',
+             [({**rotulo, 'resultado': chave}, dados[chave])
+              for chave in ('sucessos', 'falhas', 'timeouts', 'rejeitadas_fila', 'rejeitadas_circuito')]),
+        ]
+    return registrar_coletor(coletar)
+
+
+# --- SQL por requisição ---------------------------------------------------------
+
+def contar_consulta(decorrido):
+    """Soma uma consulta SQL à requisição atual (ou ao total fora de requisições)."""
+    if has_request_context() and 'telemetria_sql' in g:
+        g.telemetria_sql[0] += 1
+        g.telemetria_sql[1] += decorrido
+    else:
+        sql_total.incrementar(('fora_de_requisicao',))
+
+
+# --- HTTP -----------------------------------------------------------------------
+
+def _inicio_requisicao():
+    g.telemetria_inicio = time.perf_counter()
+    g.telemetria_sql = [0, 0.0]
+
+
+def _registrar(metodo, rota, status, inicio, sql):
+    decorrido = time.perf_counter() - inicio
+    requisicoes.incrementar((metodo, rota, str(status)))
+    duracao.observar((metodo, rota), decorrido)
+    sql_por_requisicao.observar((metodo, rota), sql[0])
+    sql_duracao_por_requisicao.observar((metodo, rota), sql[1])
+    if sql[0]:
+        sql_total.incrementar(('requisicao',), sql[0])
+
+
+def _fim_requisicao(resposta):
+    inicio = g.pop('telemetria_inicio', None)
+    if inicio is None:
+        return resposta
+    # Só regras conhecidas viram rótulo; 404 de URLs arbitrárias não criam séries novas
+    rota = request.url_rule.rule if request.url_rule else 'sem_rota'
+    argumentos = (request.method, rota, resposta.status_code, inicio, g.telemetria_sql)
+    if resposta.is_streamed:
+        # O corpo ainda vai ser gerado (SSE, exportações): mede até o fechamento da resposta
+        resposta.call_on_close(lambda: _registrar(*argumentos))
+    else:
+        _registrar(*argumentos)
+    return resposta
+
+
+def exportar():
+    """Todas as métricas no formato texto do Prometheus (0.0.4)."""
+    linhas = []
+    for metrica in METRICAS:
+        linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+        linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+        linhas.extend(metrica.linhas())
+    for coletor in _coletores:
+        for nome, tipo, ajuda, amostras in coletor():
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for rotulos, valor in amostras:
+                linhas.append(f"{nome}{_formatar_rotulos(rotulos.keys(), rotulos.values())} "
+                              f"{_formatar_numero(valor)}")
+    return '\n'.join(linhas) + '\n'
+
+
+def metricas_prometheus():
+    if TOKEN and request.headers.get('Authorization') != f'Bearer {TOKEN}':
+        return Response('Não autorizado\n', 401, mimetype='text/plain')
+    return Response(exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_telemetria(app):
+    """Instala a medição das requisições e a rota /metrics. Deve vir antes de init_compressao."""
+    if not HABILITADAS:
+        return
+    # after_request roda na ordem inversa do registro: registrado primeiro, mede a compressão também
+    app.before_request(_inicio_requisicao)
+    app.after_request(_fim_requisicao)
+    app.add_url_rule('/metrics', 'metricas_prometheus', metricas_prometheus)
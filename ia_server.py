@@ -1,10 +1,16 @@
 import os
 import logging
 import time
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, Response, stream_with_context
 from flask_cors import CORS
-import google.generativeai as genai
 from dotenv import load_dotenv
+# Só chatbot_core: importar 'app' carregaria o banco e o Socket.IO do sistema de chamados
+from chatbot_core.conversas import criar_armazem
+from chatbot_core.cache_respostas import criar_cache_respostas
+from chatbot_core.executor_modelo import criar_executor
+from chatbot_core.provedor_modelo import ProvedorModelo
+from chatbot_core.telemetria import init_telemetria, registrar_executor_modelo
+from chatbot_core.fluxo import FluxoChatbot, formatar_sse
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -19,42 +25,52 @@ logger = logging.getLogger(__name__)
 # Configuração do CORS
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-# Configuração da API Gemini
-GEMINI_API_KEY = os.getenv("key")
-gemini_model = None
+# Latência por rota e estado do executor do modelo em /metrics (ver chatbot_core/telemetria.py)
+init_telemetria(app)
 
+# Configuração da API Gemini
 SYSTEM_INSTRUCTION = """
 Você é um assistente virtual especializado em TI da Nicopel Embalagens.
 Responda apenas perguntas sobre hardware, software, redes e programação.
 Seja conciso e direto nas respostas.
 """
 
-# Inicialização do modelo Gemini com tratamento de erro detalhado
-if GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash-latest",
-            system_instruction=SYSTEM_INSTRUCTION,
-            generation_config={"max_output_tokens": 500}
-        )
-        logger.info("✅ Modelo Gemini configurado com sucesso")
-    except Exception as e:
-        logger.error(f"❌ Erro ao configurar Gemini: {e}")
-        logger.error("Verifique se sua API key está correta")
-else:
+# O SDK e o modelo são carregados no primeiro uso (ver chatbot_core/provedor_modelo.py)
+provedor = ProvedorModelo(
+    "gemini-1.5-flash-latest",
+    SYSTEM_INSTRUCTION,
+    generation_config={"max_output_tokens": 500}
+)
+if not provedor.configurado:
     logger.error("❌ Variável de ambiente 'key' não configurada")
     logger.error("Configure a variável 'key' no painel do Render")
 
-# Histórico em memória
-histories = {}
+# Histórico em memória (limitado por tamanho e por tempo ocioso, ver chatbot_core/conversas.py)
 MAX_HISTORY_TURNS = 3
+histories = criar_armazem(MAX_HISTORY_TURNS)
+respostas_cache = criar_cache_respostas()
+# Limite de concorrência, timeout e circuito das chamadas ao modelo (ver chatbot_core/executor_modelo.py)
+executor_modelo = criar_executor()
+registrar_executor_modelo(executor_modelo, 'ia_server')
+
+# Lógica do chatbot, compartilhada com o sistema de chamados (ver chatbot_core/fluxo.py)
+fluxo = FluxoChatbot(provedor, histories, respostas_cache, executor_modelo, logger)
+generate_with_gemini = fluxo.gerar
+stream_with_gemini = fluxo.gerar_stream
 
 # Rota de health check
 @app.route('/health')
 def health_check():
     logger.info("Health check solicitado")
-    return jsonify({"status": "ok", "timestamp": time.time(), "model_loaded": gemini_model is not None})
+    return jsonify({
+        "status": "ok",
+        "timestamp": time.time(),
+        "model_configured": provedor.configurado,
+        "model_loaded": provedor.carregado,
+        "sessoes": histories.estatisticas(),
+        "cache_respostas": respostas_cache.estatisticas(),
+        "modelo": executor_modelo.estatisticas()
+    })
 
 # Rota principal
 @app.route('/')
@@ -66,32 +82,6 @@ def index():
         logger.error(f"Erro ao servir chatbot.html: {e}")
         return "Erro ao carregar a página", 500
 
-# Lógica do chatbot
-def generate_with_gemini(user_id, message):
-    if not gemini_model:
-        logger.error("Tentativa de uso do chatbot com modelo não inicializado")
-        return "Desculpe, o serviço está temporariamente indisponível. Tente novamente mais tarde."
-    
-    try:
-        chat_session = histories.get(user_id)
-        if not chat_session:
-            chat_session = gemini_model.start_chat(history=[])
-            histories[user_id] = chat_session
-            logger.info(f"Nova sessão criada para o usuário {user_id}")
-        
-        # Limita histórico
-        if len(chat_session.history) > MAX_HISTORY_TURNS * 2:
-            chat_session.history = chat_session.history[-(MAX_HISTORY_TURNS * 2):]
-            logger.info(f"Histórico truncado para o usuário {user_id}")
-        
-        response = chat_session.send_message(message)
-        return response.text
-    except Exception as e:
-        logger.error(f"Erro na API Gemini para o usuário {user_id}: {e}")
-        if user_id in histories:
-            del histories[user_id]
-        return "Desculpe, tive um problema técnico. Tente novamente mais tarde."
-
 # Rota da API
 @app.route('/api/chatbot', methods=['POST'])
 def chatbot():
@@ -118,6 +108,36 @@ def chatbot():
     
     return jsonify({"reply": ai_response})
 
+@app.route('/api/chatbot/stream', methods=['POST'])
+def chatbot_stream():
+    start_time = time.time()
+    logger.info("Requisição recebida na rota /api/chatbot/stream")
+
+    data = request.json
+    if not data or 'message' not in data:
+        logger.warning("Requisição sem mensagem")
+        return jsonify({"error": "Mensagem não fornecida"}), 400
+
+    user_message = data.get('message')
+    user_id = session.get('user_id', request.remote_addr)
+
+    if 'user_id' not in session:
+        session['user_id'] = user_id
+        logger.info(f"Novo usuário: {user_id}")
+
+    def eventos():
+        primeiro = None
+        for parte in stream_with_gemini(user_id, user_message):
+            if primeiro is None:
+                primeiro = time.time() - start_time
+                logger.info(f"Primeiro trecho enviado em {primeiro:.2f}s")
+            yield formatar_sse({"texto": parte})
+        yield formatar_sse({}, evento="fim")
+        logger.info(f"Streaming concluído em {time.time() - start_time:.2f}s")
+
+    return Response(stream_with_context(eventos()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 10000))
     logger.info(f"Iniciando servidor na porta {port}")
@@ -90,9 +90,20 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # O índice de busca (app/busca.py) existe só no banco, fora dos modelos:
+    # o autogenerate não deve propor removê-lo.
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == 'table' and name.startswith('chamados_fts'):
+            return False
+        if name in ('busca_vetor', 'ix_chamados_busca_vetor'):
+            return False
+        return True
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
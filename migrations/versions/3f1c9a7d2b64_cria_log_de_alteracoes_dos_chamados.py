@@ -0,0 +1,36 @@
+"""Cria o log de alterações dos chamados para sincronização incremental
+
+Revision ID: 3f1c9a7d2b64
+Revises: 827047bbc3ad
+Create Date: 2026-10-18 17:40:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b64'
+down_revision = '827047bbc3ad'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chamado_alteracao',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('chamado_id', sa.Integer(), nullable=False),
+    sa.Column('operacao', sa.String(length=10), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('chamado_alteracao', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_chamado_alteracao_criado_em'), ['criado_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('chamado_alteracao', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_chamado_alteracao_criado_em'))
+
+    op.drop_table('chamado_alteracao')
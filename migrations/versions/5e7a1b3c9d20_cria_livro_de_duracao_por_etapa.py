@@ -0,0 +1,94 @@
+"""Cria o livro de durações por etapa e o resumo por status
+
+Revision ID: 5e7a1b3c9d20
+Revises: c4d8e2f6a913
+Create Date: 2026-10-18 18:31:20.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7a1b3c9d20'
+down_revision = 'c4d8e2f6a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('etapa_chamado',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('chamado_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('entrou_em', sa.DateTime(), nullable=False),
+    sa.Column('saiu_em', sa.DateTime(), nullable=False),
+    sa.Column('segundos', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('etapa_chamado', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_etapa_chamado_chamado_id'), ['chamado_id'], unique=False)
+
+    op.create_table('resumo_etapa',
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total_segundos', sa.Float(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status')
+    )
+    _preencher_com_o_historico()
+
+
+def _preencher_com_o_historico():
+    """
+    Fecha as etapas do histórico que já existe, como reconstruir_etapas em etapas.py:
+    sem isso as médias por etapa só contariam as transições feitas depois do deploy.
+    """
+    historico = sa.table('historico_chamado',
+        sa.column('id', sa.Integer), sa.column('chamado_id', sa.Integer),
+        sa.column('campo_alterado', sa.String), sa.column('valor_anterior', sa.String),
+        sa.column('timestamp', sa.DateTime))
+    chamados = sa.table('chamados', sa.column('id', sa.Integer), sa.column('criado_em', sa.DateTime))
+    etapas_tabela = sa.table('etapa_chamado',
+        sa.column('chamado_id', sa.Integer), sa.column('status', sa.String), sa.column('entrou_em', sa.DateTime),
+        sa.column('saiu_em', sa.DateTime), sa.column('segundos', sa.Float))
+    resumo_tabela = sa.table('resumo_etapa',
+        sa.column('status', sa.String), sa.column('total_segundos', sa.Float), sa.column('quantidade', sa.Integer))
+
+    conexao = op.get_bind()
+    linhas = conexao.execution_options(yield_per=1000).execute(sa.select(
+        historico.c.chamado_id, historico.c.valor_anterior, historico.c.timestamp, chamados.c.criado_em
+    ).select_from(historico.join(chamados, chamados.c.id == historico.c.chamado_id)).where(
+        historico.c.campo_alterado == 'status'
+    ).order_by(historico.c.chamado_id, historico.c.timestamp, historico.c.id))
+
+    etapas, resumo = [], {}
+    chamado_atual, entrou_em = None, None
+    for chamado_id, valor_anterior, timestamp, criado_em in linhas:
+        if chamado_id != chamado_atual:
+            chamado_atual, entrou_em = chamado_id, criado_em
+        if entrou_em and valor_anterior:
+            segundos = max((timestamp - entrou_em).total_seconds(), 0.0)
+            etapas.append({'chamado_id': chamado_id, 'status': valor_anterior, 'entrou_em': entrou_em,
+                           'saiu_em': timestamp, 'segundos': segundos})
+            soma, quantidade = resumo.get(valor_anterior, (0.0, 0))
+            resumo[valor_anterior] = (soma + segundos, quantidade + 1)
+            if len(etapas) >= 1000:
+                conexao.execute(etapas_tabela.insert(), etapas)
+                etapas = []
+        entrou_em = timestamp
+
+    if etapas:
+        conexao.execute(etapas_tabela.insert(), etapas)
+    if resumo:
+        conexao.execute(resumo_tabela.insert(), [
+            {'status': status, 'total_segundos': soma, 'quantidade': quantidade}
+            for status, (soma, quantidade) in resumo.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('resumo_etapa')
+    with op.batch_alter_table('etapa_chamado', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_etapa_chamado_chamado_id'))
+
+    op.drop_table('etapa_chamado')
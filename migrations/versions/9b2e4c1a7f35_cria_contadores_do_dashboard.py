@@ -0,0 +1,47 @@
+"""Cria as tabelas de contadores do dashboard
+
+Revision ID: 9b2e4c1a7f35
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 17:55:03.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2e4c1a7f35'
+down_revision = '3f1c9a7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('contador_chamados',
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('setor', sa.String(length=50), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status', 'setor')
+    )
+    op.create_table('fechamento_diario',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia')
+    )
+    # Preenche com os chamados que já existem (como reconstruir_contadores em contadores.py):
+    # partindo do zero, a primeira mudança de status de um chamado antigo deixaria -1
+    op.execute("""INSERT INTO contador_chamados (status, setor, total)
+        SELECT status, setor, COUNT(*) FROM chamados
+        WHERE sistema_origem = 'novo'
+        GROUP BY status, setor""")
+    # date() devolve 'AAAA-MM-DD' no SQLite (o formato do tipo Date lá) e date no Postgres
+    op.execute("""INSERT INTO fechamento_diario (dia, total)
+        SELECT date(concluido_em), COUNT(*) FROM chamados
+        WHERE sistema_origem = 'novo' AND concluido_em IS NOT NULL
+          AND status IN ('Finalizado', 'Resolvido', 'Concluído')
+        GROUP BY date(concluido_em)""")
+
+
+def downgrade():
+    op.drop_table('fechamento_diario')
+    op.drop_table('contador_chamados')
@@ -0,0 +1,60 @@
+"""Índice de busca textual dos chamados (FTS5 no SQLite, tsvector + GIN no Postgres)
+
+Revision ID: a7c3e9f1b2d4
+Revises: 5e7a1b3c9d20
+Create Date: 2026-10-18 19:05:40.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f1b2d4'
+down_revision = '5e7a1b3c9d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("""CREATE VIRTUAL TABLE chamados_fts USING fts5(
+            nome, descricao, observacao,
+            content='chamados', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )""")
+        op.execute("""CREATE TRIGGER chamados_fts_ai AFTER INSERT ON chamados BEGIN
+            INSERT INTO chamados_fts(rowid, nome, descricao, observacao)
+            VALUES (new.id, new.nome, new.descricao, new.observacao);
+        END""")
+        op.execute("""CREATE TRIGGER chamados_fts_ad AFTER DELETE ON chamados BEGIN
+            INSERT INTO chamados_fts(chamados_fts, rowid, nome, descricao, observacao)
+            VALUES ('delete', old.id, old.nome, old.descricao, old.observacao);
+        END""")
+        op.execute("""CREATE TRIGGER chamados_fts_au AFTER UPDATE OF nome, descricao, observacao ON chamados BEGIN
+            INSERT INTO chamados_fts(chamados_fts, rowid, nome, descricao, observacao)
+            VALUES ('delete', old.id, old.nome, old.descricao, old.observacao);
+            INSERT INTO chamados_fts(rowid, nome, descricao, observacao)
+            VALUES (new.id, new.nome, new.descricao, new.observacao);
+        END""")
+        # Indexa os chamados que já existem
+        op.execute("INSERT INTO chamados_fts(chamados_fts) VALUES ('rebuild')")
+    else:
+        # A coluna gerada é calculada para as linhas existentes na própria criação
+        op.execute("""ALTER TABLE chamados ADD COLUMN busca_vetor tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('portuguese', coalesce(nome, '')), 'A') ||
+            setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'B') ||
+            setweight(to_tsvector('portuguese', coalesce(observacao, '')), 'C')
+        ) STORED""")
+        op.execute("CREATE INDEX ix_chamados_busca_vetor ON chamados USING GIN (busca_vetor)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS chamados_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS chamados_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS chamados_fts_ai")
+        op.execute("DROP TABLE IF EXISTS chamados_fts")
+    else:
+        op.execute("DROP INDEX IF EXISTS ix_chamados_busca_vetor")
+        op.execute("ALTER TABLE chamados DROP COLUMN IF EXISTS busca_vetor")
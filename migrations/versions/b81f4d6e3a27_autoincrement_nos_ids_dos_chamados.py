@@ -0,0 +1,64 @@
+"""AUTOINCREMENT no id dos chamados (SQLite): ids arquivados nunca são reaproveitados
+
+Revision ID: b81f4d6e3a27
+Revises: e2b6d0c8a145
+Create Date: 2026-10-18 22:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f4d6e3a27'
+down_revision = 'e2b6d0c8a145'
+branch_labels = None
+depends_on = None
+
+# Os triggers do índice de busca (a7c3e9f1b2d4) somem junto com a tabela antiga na recriação
+TRIGGERS_BUSCA = [
+    """CREATE TRIGGER chamados_fts_ai AFTER INSERT ON chamados BEGIN
+        INSERT INTO chamados_fts(rowid, nome, descricao, observacao)
+        VALUES (new.id, new.nome, new.descricao, new.observacao);
+    END""",
+    """CREATE TRIGGER chamados_fts_ad AFTER DELETE ON chamados BEGIN
+        INSERT INTO chamados_fts(chamados_fts, rowid, nome, descricao, observacao)
+        VALUES ('delete', old.id, old.nome, old.descricao, old.observacao);
+    END""",
+    """CREATE TRIGGER chamados_fts_au AFTER UPDATE OF nome, descricao, observacao ON chamados BEGIN
+        INSERT INTO chamados_fts(chamados_fts, rowid, nome, descricao, observacao)
+        VALUES ('delete', old.id, old.nome, old.descricao, old.observacao);
+        INSERT INTO chamados_fts(rowid, nome, descricao, observacao)
+        VALUES (new.id, new.nome, new.descricao, new.observacao);
+    END""",
+]
+
+
+def _recriar_chamados(autoincrement):
+    for nome in ('chamados_fts_au', 'chamados_fts_ad', 'chamados_fts_ai'):
+        op.execute(f"DROP TRIGGER IF EXISTS {nome}")
+    with op.batch_alter_table('chamados', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    for comando in TRIGGERS_BUSCA:
+        op.execute(comando)
+
+
+def upgrade():
+    # No Postgres o id já vem de uma sequence, que nunca volta atrás
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _recriar_chamados(True)
+    # Sem AUTOINCREMENT o próximo id era max(id) + 1 da tabela quente: se o maior tivesse
+    # sido apagado, um id já usado no arquivo voltaria. A sequência parte do maior dos dois.
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'chamados'")
+    op.execute("""INSERT INTO sqlite_sequence (name, seq) SELECT 'chamados', max(
+        coalesce((SELECT max(id) FROM chamados), 0),
+        coalesce((SELECT max(id) FROM chamados_arquivo), 0)
+    )""")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _recriar_chamados(False)
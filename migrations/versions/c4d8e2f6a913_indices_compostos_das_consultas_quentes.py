@@ -0,0 +1,40 @@
+"""Índices compostos para as consultas quentes de chamados e histórico
+
+Revision ID: c4d8e2f6a913
+Revises: 9b2e4c1a7f35
+Create Date: 2026-10-18 18:12:47.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d8e2f6a913'
+down_revision = '9b2e4c1a7f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('chamados', schema=None) as batch_op:
+        # notificacoes: user_id = ? AND status IN (...) AND notificado = ?
+        batch_op.create_index('ix_chamados_user_status_notificado', ['user_id', 'status', 'notificado'], unique=False)
+        # meus_chamados: user_id = ? ... ORDER BY criado_em
+        batch_op.create_index('ix_chamados_user_criado_em', ['user_id', 'criado_em'], unique=False)
+        # api_listar_chamados: sistema_origem = ? ORDER BY criado_em, id (paginação por cursor)
+        batch_op.create_index('ix_chamados_origem_criado_em', ['sistema_origem', 'criado_em', 'id'], unique=False)
+
+    with op.batch_alter_table('historico_chamado', schema=None) as batch_op:
+        # historico_chamado, metricas_chamado e tempo_por_etapa: chamado_id = ? ORDER BY timestamp
+        batch_op.create_index('ix_historico_chamado_chamado_timestamp', ['chamado_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('historico_chamado', schema=None) as batch_op:
+        batch_op.drop_index('ix_historico_chamado_chamado_timestamp')
+
+    with op.batch_alter_table('chamados', schema=None) as batch_op:
+        batch_op.drop_index('ix_chamados_origem_criado_em')
+        batch_op.drop_index('ix_chamados_user_criado_em')
+        batch_op.drop_index('ix_chamados_user_status_notificado')
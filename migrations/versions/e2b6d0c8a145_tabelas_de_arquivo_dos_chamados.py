@@ -0,0 +1,70 @@
+"""Tabelas de arquivo dos chamados finalizados e do histórico deles
+
+Revision ID: e2b6d0c8a145
+Revises: a7c3e9f1b2d4
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b6d0c8a145'
+down_revision = 'a7c3e9f1b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chamados_arquivo',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('nome', sa.String(length=100), nullable=False),
+    sa.Column('setor', sa.String(length=50), nullable=False),
+    sa.Column('descricao', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('anydesk', sa.String(length=50), nullable=True),
+    sa.Column('sistema_origem', sa.String(length=20), nullable=False),
+    sa.Column('imagem_url', sa.String(length=200), nullable=True),
+    sa.Column('observacao', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('funcionario_id', sa.Integer(), nullable=True),
+    sa.Column('notificado', sa.Boolean(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=True),
+    sa.Column('iniciado_em', sa.DateTime(), nullable=True),
+    sa.Column('andamento_em', sa.DateTime(), nullable=True),
+    sa.Column('concluido_em', sa.DateTime(), nullable=True),
+    sa.Column('arquivado_em', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('chamados_arquivo', schema=None) as batch_op:
+        batch_op.create_index('ix_chamados_arquivo_criado_em', ['criado_em'], unique=False)
+        batch_op.create_index('ix_chamados_arquivo_user_criado_em', ['user_id', 'criado_em'], unique=False)
+
+    op.create_table('historico_chamado_arquivo',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('chamado_id', sa.Integer(), nullable=False),
+    sa.Column('campo_alterado', sa.String(length=50), nullable=True),
+    sa.Column('valor_anterior', sa.String(length=100), nullable=True),
+    sa.Column('valor_novo', sa.String(length=100), nullable=False),
+    sa.Column('observacao', sa.Text(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['chamado_id'], ['chamados_arquivo.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('historico_chamado_arquivo', schema=None) as batch_op:
+        batch_op.create_index('ix_historico_chamado_arquivo_chamado_timestamp', ['chamado_id', 'timestamp'], unique=False)
+    # As tabelas começam vazias; rode 'flask arquivar-chamados' para mover os finalizados antigos.
+
+
+def downgrade():
+    with op.batch_alter_table('historico_chamado_arquivo', schema=None) as batch_op:
+        batch_op.drop_index('ix_historico_chamado_arquivo_chamado_timestamp')
+
+    op.drop_table('historico_chamado_arquivo')
+    with op.batch_alter_table('chamados_arquivo', schema=None) as batch_op:
+        batch_op.drop_index('ix_chamados_arquivo_user_criado_em')
+        batch_op.drop_index('ix_chamados_arquivo_criado_em')
+
+    op.drop_table('chamados_arquivo')
@@ -3,6 +3,12 @@ import eventlet
 import os
 import logging
 eventlet.monkey_patch()
+try:
+    # Torna o psycopg2 cooperativo com o eventlet: sem isso cada consulta ao Postgres bloqueia o hub inteiro.
+    from psycogreen.eventlet import patch_psycopg
+    patch_psycopg()
+except ImportError:
+    pass
 from app import create_app, socketio
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 